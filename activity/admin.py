@@ -1,6 +1,6 @@
 from django.contrib.admin import SimpleListFilter
 from django.contrib import admin
-from .models import Organization, Session, Activity, Meeting, Student, Enrollment, AttendanceRecord, Contact, Location
+from .models import Organization, Session, Activity, Meeting, Student, Enrollment, AttendanceRecord, Contact, Location, OutboundMessage, SignInSheetFile, SignInSheetJob
 from django.db import models
 from django.shortcuts import render, get_object_or_404
 from django.utils.html import format_html
@@ -135,6 +135,13 @@ class ActivityAdmin(admin.ModelAdmin):
 
 admin.site.register(Activity, ActivityAdmin)
 admin.site.register(Meeting)
+
+class SignInSheetFileAdmin(admin.ModelAdmin):
+	list_display = ('activity', 'spreadsheet_id', 'validated_at')
+	search_fields = ('spreadsheet_id',)
+
+admin.site.register(SignInSheetFile, SignInSheetFileAdmin)
+
 class StudentAdmin(admin.ModelAdmin):
 
 	list_display = (
@@ -208,3 +215,31 @@ class EnrollmentAdmin(admin.ModelAdmin):
 
 admin.site.register(Enrollment, EnrollmentAdmin)
 admin.site.register(AttendanceRecord)
+
+class OutboundMessageAdmin(admin.ModelAdmin):
+	list_display = ('id', 'kind', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+	list_display_links = ('id',)
+	list_filter = ('status', 'kind')
+	search_fields = ('subject', 'last_error')
+	actions = ['requeue_messages']
+
+	def requeue_messages(self, request, queryset):
+		from django.utils import timezone
+		queryset.update(status='pending', attempts=0, next_attempt_at=timezone.now(), claimed_at=None)
+	requeue_messages.short_description = 'Requeue selected messages'
+
+admin.site.register(OutboundMessage, OutboundMessageAdmin)
+
+class SignInSheetJobAdmin(admin.ModelAdmin):
+	list_display = ('id', 'activity', 'status', 'attempts', 'requested_by', 'created_at', 'finished_at')
+	list_display_links = ('id',)
+	list_filter = ('status',)
+	raw_id_fields = ('activity', 'requested_by')
+	actions = ['requeue_jobs']
+
+	def requeue_jobs(self, request, queryset):
+		# Reruns write to the worksheet the job already added, if any
+		queryset.exclude(status='running').update(status='queued', error='', claimed_at=None, finished_at=None)
+	requeue_jobs.short_description = 'Requeue selected jobs'
+
+admin.site.register(SignInSheetJob, SignInSheetJobAdmin)
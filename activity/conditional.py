@@ -0,0 +1,75 @@
+"""
+Conditional GET (ETag / Last-Modified) for API read endpoints
+"""
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from activity.models import ChangeVersion
+
+
+class NotModified(Exception):
+    """Raised from initial() to skip the handler; carries the 304 (or 412) response."""
+
+    def __init__(self, response):
+        super().__init__('Not modified')
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET and HEAD requests with 304 Not Modified when none of the
+    view's change_families has changed since the client's copy.
+
+    The ETag and Last-Modified come from the ChangeVersion rows of the
+    families (one small query), and are checked after authentication but
+    before the handler runs, so an unchanged response costs no other queries
+    and no serializing. Responses are marked "private, no-cache": the browser
+    keeps them but revalidates on every request.
+
+    Set change_families to every family whose data the response includes.
+    """
+    change_families = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._conditional_headers = None
+        if request.method not in ('GET', 'HEAD') or not self.change_families:
+            return
+
+        etag, last_modified = self.get_validators(request)
+        self._conditional_headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if last_modified is not None:
+            self._conditional_headers['Last-Modified'] = http_date(last_modified)
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise NotModified(response)
+
+    def get_validators(self, request):
+        """
+        Returns:
+            (etag, last_modified) where last_modified is a Unix timestamp or None
+        """
+        rows = ChangeVersion.objects.filter(family__in=self.change_families).values_list('family', 'version', 'changed_at')
+        versions = {family: version for family, version, _ in rows}
+        last_modified = max((changed_at for _, _, changed_at in rows), default=None)
+
+        # The same URL can be rendered as JSON or as the browsable API
+        parts = [f'{family}.{versions.get(family, 0)}' for family in sorted(self.change_families)]
+        parts.append(request.accepted_renderer.format)
+        etag = '"{}"'.format('-'.join(parts))
+        return etag, int(last_modified.timestamp()) if last_modified else None
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        headers = getattr(self, '_conditional_headers', None)
+        if headers and response.status_code in (200, 304):
+            for name, value in headers.items():
+                response[name] = value
+            patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
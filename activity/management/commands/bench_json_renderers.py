@@ -0,0 +1,122 @@
+import time
+import tracemalloc
+from datetime import date, time as dt_time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from activity.models import Activity, AttendanceRecord, Enrollment, Location, Meeting, Organization, Session, Student
+from activity.renderers import FastJSONRenderer, orjson
+from activity.views import ActivityListView, EndOfSessionReportView
+from activity.views.attendance import MeetingGetOrCreateView
+
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+RENDERERS = (('json', JSONRenderer), ('fast', FastJSONRenderer))
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares JSON rendering time and peak memory of the standard and fast renderers '
+        'for the largest API responses, using generated data that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classes', type=int, default=20, help='Classes in the generated session')
+        parser.add_argument('--students', type=int, default=40, help='Students per class')
+        parser.add_argument('--weeks', type=int, default=12, help='Meetings per class')
+        parser.add_argument('--repeat', type=int, default=20, help='Renders timed per endpoint and renderer')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: the fast renderer falls back to the standard one'))
+
+        self.stdout.write(f"{'endpoint':<20}  {'renderer':<8}  {'bytes':>9}  {'ms/render':>9}  {'peak KiB':>8}  {'same':<4}")
+        with transaction.atomic():
+            session, activity = self._build_data(options)
+            for name, data in self._responses(session, activity):
+                baseline = None
+                for renderer_name, renderer_class in RENDERERS:
+                    output, seconds, peak = self._measure(renderer_class(), data, options['repeat'])
+                    baseline = baseline or output
+                    self.stdout.write(
+                        f'{name:<20}  {renderer_name:<8}  {len(output):>9}  {seconds * 1000:>9.2f}  '
+                        f'{peak / 1024:>8.0f}  {"yes" if output == baseline else "NO":<4}'
+                    )
+            # Leave the database as it was
+            transaction.set_rollback(True)
+
+    def _measure(self, renderer, data, repeat):
+        tracemalloc.start()
+        output = renderer.render(data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            renderer.render(data)
+        return output, (time.perf_counter() - started) / repeat, peak
+
+    def _responses(self, session, activity):
+        """Yield (name, response data) for each endpoint, before rendering."""
+        factory = APIRequestFactory()
+        user = User(username='benchmark')
+
+        def call(view, request):
+            force_authenticate(request, user=user)
+            response = view.as_view()(request)
+            assert response.status_code == 200, response.data
+            return response.data
+
+        yield 'end-of-session', call(EndOfSessionReportView, factory.get(
+            '/api/reports/end-of-session/',
+            {'organization_id': session.organization_id, 'session_id': session.id},
+        ))
+        yield 'classes', call(ActivityListView, factory.get('/api/classes/'))
+        yield 'meeting', call(MeetingGetOrCreateView, factory.post(
+            '/api/meetings/get-or-create/',
+            {'activity_id': activity.id, 'date': str(session.start_date)},
+            format='json',
+        ))
+
+    def _build_data(self, options):
+        organization = Organization.objects.create(name='Benchmark')
+        location = Location.objects.create(organization=organization, name='Benchmark Gym', address='1 Main St')
+        start = date(2025, 1, 6)
+        session = Session.objects.create(
+            organization=organization, name='Benchmark',
+            start_date=start, end_date=start + timedelta(weeks=options['weeks']),
+        )
+        activities = Activity.objects.bulk_create([
+            Activity(
+                type='Zumba', session=session, location=location,
+                day_of_week=DAYS[i % len(DAYS)], time=dt_time(8 + i % 12, 0),
+            )
+            for i in range(options['classes'])
+        ])
+
+        students = Student.objects.bulk_create([
+            Student(first_name=f'First{i}', last_name=f'Last{i:05d}', email=f'student{i}@example.com')
+            for i in range(options['classes'] * options['students'])
+        ])
+        per_class = options['students']
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, activity=activity, status='active' if j < per_class * 4 // 5 else 'waiting')
+            for a, activity in enumerate(activities)
+            for j, student in enumerate(students[a * per_class:(a + 1) * per_class])
+        ])
+
+        meetings = Meeting.objects.bulk_create([
+            Meeting(activity=activity, date=start + timedelta(weeks=week))
+            for activity in activities
+            for week in range(options['weeks'])
+        ])
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(meeting=meeting, student=student, status='present' if (i + j) % 3 else 'unexpected_absence')
+            for i, meeting in enumerate(meetings)
+            for j, student in enumerate(students[(i // options['weeks']) * per_class:(i // options['weeks'] + 1) * per_class])
+        ])
+        return session, activities[0]
@@ -0,0 +1,108 @@
+import time
+from datetime import date, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from activity.models import Activity, Organization, Session, SignInSheetFile, Student
+from activity.testing.fake_google import api_values, fake_google_clients
+from activity.utils.google_resilience import metrics
+from activity.utils.google_sheets import create_signin_sheet
+from activity.utils.signin_data import build_signin_layout
+
+
+SCENARIOS = (
+    ('new', 'no spreadsheet yet: search, create, rename'),
+    ('search', 'spreadsheet found by folder search'),
+    ('cached', 'spreadsheet ID cached for the activity'),
+)
+
+
+def parse_sizes(value):
+    try:
+        return [int(size) for size in value.split(',')]
+    except ValueError:
+        raise CommandError(f'Invalid sizes "{value}", expected e.g. 10,50,200')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures Google API calls and wall time for create_signin_sheet at different roster sizes, '
+        'using in-process fake Google APIs. Nothing is written to Google or kept in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=parse_sizes, default=[10, 50, 200], help='Comma separated roster sizes')
+        parser.add_argument('--weeks', type=int, default=7, help='Date columns per sheet')
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds added to every fake API call')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fraction of fake API calls that fail with a 429')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for injected errors')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'students':>8}  {'scenario':<8}  {'calls':>5}  {'retries':>7}  {'time (s)':>8}  {'result':<8}  calls by method")
+        for size in options['sizes']:
+            for scenario, _ in SCENARIOS:
+                with transaction.atomic():
+                    self._run(size, scenario, options)
+                    # Leave the database as it was
+                    transaction.set_rollback(True)
+
+        self.stdout.write('')
+        for scenario, description in SCENARIOS:
+            self.stdout.write(f'  {scenario:<8} {description}')
+
+    def _run(self, size, scenario, options):
+        activity, sheet_data = self._build_sheet_data(size, options['weeks'])
+        layout = build_signin_layout(**sheet_data)
+
+        with fake_google_clients(latency=options['latency'], error_rate=options['error_rate'], seed=options['seed']) as fake:
+            if scenario in ('search', 'cached'):
+                spreadsheet = fake.add_file(layout.title, parents=[settings.GOOGLE_DRIVE_FOLDER_ID])
+                if scenario == 'cached':
+                    SignInSheetFile.objects.create(activity=activity, spreadsheet_id=spreadsheet.id, url=spreadsheet.url)
+
+            metrics.reset()
+            started = time.perf_counter()
+            try:
+                url = create_signin_sheet(**sheet_data)
+                result = 'ok' if self._written_values(fake, url) == api_values(layout.rows) else 'MISMATCH'
+            except Exception as e:
+                result = f'error: {e.__class__.__name__}'
+            elapsed = time.perf_counter() - started
+
+        counts = fake.call_counts()
+        retries = sum(stats['retries'] for stats in metrics.snapshot().values())
+        by_method = ', '.join(f'{method}={count}' for method, count in sorted(counts.items()))
+        self.stdout.write(f'{size:>8}  {scenario:<8}  {sum(counts.values()):>5}  {retries:>7}  {elapsed:>8.3f}  {result:<8}  {by_method}')
+
+    def _build_sheet_data(self, size, weeks):
+        organization = Organization.objects.create(name='Benchmark')
+        session = Session.objects.create(
+            organization=organization, name='Benchmark',
+            start_date=date(2025, 1, 6), end_date=date(2025, 1, 6) + timedelta(weeks=weeks),
+        )
+        activity = Activity.objects.create(type='Zumba', session=session, day_of_week='Monday', time=dt_time(18, 0))
+
+        # Students are never saved; the sheet only needs their names and IDs
+        students = [Student(id=i, first_name=f'First{i}', last_name=f'Last{i:04d}') for i in range(1, size + 1)]
+        enrolled_count = size * 3 // 4
+        dates = [(session.start_date + timedelta(weeks=week)).strftime('%Y-%m-%d') for week in range(weeks)]
+        attendance_data = {
+            student.id: {date_str: 'present' for date_str in dates[:student.id % (weeks + 1)]}
+            for student in students
+        }
+        return activity, {
+            'activity': activity,
+            'start_date': session.start_date,
+            'num_weeks': weeks,
+            'enrolled_students': students[:enrolled_count],
+            'waitlist_students': students[enrolled_count:],
+            'dropin_students': [],
+            'attendance_data': attendance_data,
+        }
+
+    def _written_values(self, fake, url):
+        spreadsheet = fake.files[url.rsplit('/', 1)[-1]]
+        return spreadsheet.worksheets_list[-1]._values()
+
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from activity.utils.cancellations import bulk_cancel_classes
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Cancels every open class over a date or date range (e.g. a holiday or winter break).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('start_date', type=parse_date, help='First date to cancel (YYYY-MM-DD)')
+        parser.add_argument('end_date', type=parse_date, nargs='?', help='Last date to cancel (YYYY-MM-DD), defaults to start_date')
+        parser.add_argument('--organization', type=int, help='Only cancel classes for this organization ID')
+        parser.add_argument('--location', type=int, help='Only cancel classes at this location ID')
+        parser.add_argument('--all-organizations', action='store_true', help='Cancel classes for every organization')
+        parser.add_argument('--reason', default='', help='Reason stored on each cancellation')
+        parser.add_argument('--delete-empty-meetings', action='store_true', help='Delete meetings on cancelled dates with no recorded attendance')
+        parser.add_argument('--no-notify', action='store_true', help='Do not email students about the cancellations')
+        parser.add_argument('--dry-run', action='store_true', help='Show what would be cancelled without changing anything')
+
+    def handle(self, *args, **options):
+        start_date = options['start_date']
+        end_date = options['end_date'] or start_date
+
+        if end_date < start_date:
+            raise CommandError('end_date must not be before start_date')
+        if not options['organization'] and not options['location'] and not options['all_organizations']:
+            raise CommandError('Pass --organization, --location or --all-organizations')
+
+        result = bulk_cancel_classes(
+            start_date,
+            end_date,
+            organization_id=options['organization'],
+            location_id=options['location'],
+            reason=options['reason'],
+            delete_empty_meetings=options['delete_empty_meetings'],
+            notify=not options['no_notify'],
+            dry_run=options['dry_run'],
+        )
+
+        verb = 'Would cancel' if options['dry_run'] else 'Cancelled'
+        for cancellation in sorted(result['cancellations'], key=lambda c: (c.date, c.activity.session.organization.name)):
+            activity = cancellation.activity
+            self.stdout.write(f'  {verb} {cancellation.date}: {activity} [{activity.session.organization.name}]')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result["created"]} classes '
+            f'({result["already_cancelled"]} already cancelled, '
+            f'{result["meetings_deleted"]} empty meetings deleted, '
+            f'{result["notices_queued"]} notices queued)'
+        ))
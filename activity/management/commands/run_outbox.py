@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from activity.utils.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued outbound email. Several workers can run in parallel safely.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Messages claimed per batch')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        poll_interval = options['poll_interval']
+        once = options['once']
+
+        self.stdout.write(self.style.SUCCESS('--- Outbox worker started ---'))
+
+        try:
+            while True:
+                sent, failed = process_batch(batch_size)
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent}, failed {failed}')
+                    continue
+
+                if once:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('--- Outbox worker stopped ---'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from activity.utils.signin_jobs import process_jobs
+
+
+class Command(BaseCommand):
+    help = 'Generates queued Google sign-in sheets. Several workers can run in parallel safely.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs run before checking for new ones')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        poll_interval = options['poll_interval']
+        once = options['once']
+
+        self.stdout.write(self.style.SUCCESS('--- Sign-in sheet worker started ---'))
+
+        try:
+            while True:
+                succeeded, failed = process_jobs(batch_size)
+                if succeeded or failed:
+                    self.stdout.write(f'Created {succeeded}, failed {failed}')
+                    continue
+
+                if once:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('--- Sign-in sheet worker stopped ---'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0025_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('schedule', models.JSONField(default=dict)),
+                ('sent_at', models.DateTimeField(auto_now=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_snapshots', to='activity.session')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_snapshots', to='activity.student')),
+            ],
+            options={
+                'unique_together': {('session', 'student')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0026_notificationsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignInSheetFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('spreadsheet_id', models.CharField(max_length=100)),
+                ('url', models.URLField(blank=True, max_length=255)),
+                ('validated_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the file was last confirmed to exist and not be trashed')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='signin_sheet_file', to='activity.activity')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:51
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0028_signinsheetjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), django.db.models.functions.text.Lower('first_name'), models.F('id'), name='activity_student_name_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_change_versions(apps, schema_editor):
+    """Start every family at version 1."""
+    ChangeVersion = apps.get_model('activity', 'ChangeVersion')
+    for family in ('organization', 'session', 'activity', 'student'):
+        ChangeVersion.objects.get_or_create(family=family, defaults={'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0029_student_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('family', models.CharField(choices=[('organization', 'Organizations'), ('session', 'Sessions'), ('activity', 'Classes'), ('student', 'Students')], max_length=20, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_change_versions, migrations.RunPython.noop),
+    ]
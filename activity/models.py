@@ -1,7 +1,12 @@
-from django.db import models
-from django.db.models.signals import post_save
+import threading
+
+from django.db import models, transaction
+from django.conf import settings
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
 
 
 class Organization(models.Model):
@@ -76,6 +81,12 @@ class Location(models.Model):
 	def __str__(self):
 		return f"{self.name} ({self.organization.name})"
 
+# Python weekday numbers (date.weekday()) of Activity.day_of_week values
+DAY_NUMBERS = {
+	'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3,
+	'Friday': 4, 'Saturday': 5, 'Sunday': 6
+}
+
 class Activity(models.Model):
 	class Meta:
 		verbose_name_plural = "Activities"
@@ -136,6 +147,20 @@ class Activity(models.Model):
 		"""
 		return list(self.cancellations.values_list('date', flat=True))
 
+class SignInSheetFile(models.Model):
+	"""
+	The Google spreadsheet that holds an activity's sign-in sheets, so new
+	worksheets can be added without searching the Drive folder by name.
+	"""
+	activity = models.OneToOneField(Activity, on_delete=models.CASCADE, related_name='signin_sheet_file')
+	spreadsheet_id = models.CharField(max_length=100)
+	url = models.URLField(max_length=255, blank=True)
+	validated_at = models.DateTimeField(default=timezone.now, help_text="When the file was last confirmed to exist and not be trashed")
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	def __str__(self):
+		return f"{self.activity} [{self.activity.session.name}]: {self.spreadsheet_id}"
+
 class Meeting(models.Model):
 	"""
 	Represents a single scheduled occurrence (date) of an Activity.
@@ -188,6 +213,12 @@ class Student(models.Model):
 	emergency_contact_phone = models.CharField(max_length=20, blank=True, null=True)
 	notes = models.TextField(blank=True, null=True, max_length=2048)
 
+	class Meta:
+		indexes = [
+			# The student list is ordered and paged by name, ignoring case
+			models.Index(Lower('last_name'), Lower('first_name'), 'id', name='activity_student_name_idx'),
+		]
+
 	def __str__(self):
 		return f"{self.first_name} {self.last_name}"
 
@@ -229,3 +260,175 @@ class AttendanceRecord(models.Model):
 
 	def __str__(self):
 		return f"{self.student} - {self.meeting}: {self.status}"
+
+class OutboundMessage(models.Model):
+	"""
+	A queued outgoing email. Rows are written in the same transaction as the change
+	that triggered them and delivered later by the run_outbox worker.
+	"""
+	STATUS_CHOICES = [
+		('pending', 'Pending'),
+		('sending', 'Sending'),
+		('sent', 'Sent'),
+		('dead', 'Dead'),
+	]
+	KIND_CHOICES = [
+		('session_email', 'Session Email'),
+		('cancellation', 'Cancellation'),
+	]
+	kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+	to_email = models.EmailField(blank=True)
+	bcc = models.JSONField(default=list, blank=True, help_text="List of BCC email addresses")
+	subject = models.CharField(max_length=255)
+	body = models.TextField()
+	html_body = models.TextField(blank=True)
+	status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+	attempts = models.PositiveIntegerField(default=0)
+	next_attempt_at = models.DateTimeField(default=timezone.now)
+	claimed_at = models.DateTimeField(null=True, blank=True)
+	last_error = models.TextField(blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	sent_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ['next_attempt_at', 'id']
+		indexes = [
+			models.Index(fields=['status', 'next_attempt_at']),
+		]
+
+	def __str__(self):
+		return f"{self.get_kind_display()}: {self.subject} ({self.status})"
+
+class NotificationSnapshot(models.Model):
+	"""
+	The class schedule (classes, dates and cancellations) a student was last emailed for a session.
+	Used to send "changes only" notifications.
+	"""
+	student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='notification_snapshots')
+	session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='notification_snapshots')
+	fingerprint = models.CharField(max_length=64)
+	schedule = models.JSONField(default=dict)
+	sent_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		unique_together = [['session', 'student']]
+
+	def __str__(self):
+		return f"{self.student} - {self.session.name} ({self.sent_at:%Y-%m-%d})"
+
+class SignInSheetJob(models.Model):
+	"""
+	A queued request to generate a Google sign-in sheet. The Google calls run
+	outside the web request, on a background thread or the run_signin_sheet_jobs
+	worker, and the client polls the job for the sheet URL.
+	"""
+	STATUS_CHOICES = [
+		('queued', 'Queued'),
+		('running', 'Running'),
+		('succeeded', 'Succeeded'),
+		('failed', 'Failed'),
+	]
+	activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='signin_sheet_jobs')
+	start_date = models.DateField()
+	num_weeks = models.PositiveIntegerField()
+	status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+	sheet_url = models.URLField(max_length=255, blank=True)
+	spreadsheet_id = models.CharField(max_length=100, blank=True, help_text="Spreadsheet of the worksheet added for this job")
+	worksheet_id = models.PositiveIntegerField(null=True, blank=True, help_text="Worksheet added for this job, written to again if the job is retried")
+	error = models.TextField(blank=True)
+	attempts = models.PositiveIntegerField(default=0)
+	requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='signin_sheet_jobs')
+	created_at = models.DateTimeField(auto_now_add=True)
+	claimed_at = models.DateTimeField(null=True, blank=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ['created_at', 'id']
+		indexes = [
+			models.Index(fields=['status', 'created_at']),
+		]
+
+	def __str__(self):
+		return f"Sign-in sheet for {self.activity} from {self.start_date} ({self.status})"
+
+class ChangeVersion(models.Model):
+	"""
+	A counter per family of API data, bumped whenever a model in the family is
+	saved or deleted. Read endpoints build their ETag and Last-Modified from it,
+	so unchanged data can be answered with 304 Not Modified without querying it.
+	"""
+	FAMILY_CHOICES = [
+		('organization', 'Organizations'),
+		('session', 'Sessions'),
+		('activity', 'Classes'),
+		('student', 'Students'),
+	]
+	family = models.CharField(max_length=20, choices=FAMILY_CHOICES, unique=True)
+	version = models.PositiveBigIntegerField(default=0)
+	changed_at = models.DateTimeField(default=timezone.now)
+
+	def __str__(self):
+		return f"{self.family} v{self.version}"
+
+	@classmethod
+	def bump(cls, *families):
+		"""
+		Mark families as changed once the current transaction commits.
+		Call this after bulk updates, which don't send model signals.
+
+		Bumps are collected per thread and written by the first on_commit
+		callback that runs, so saving many rows in one transaction updates
+		each family once. Families bumped in a transaction that rolled back
+		are written with the next commit, which only costs a spurious 304 miss.
+		"""
+		pending = getattr(_pending_bumps, 'families', None)
+		if pending is None:
+			pending = _pending_bumps.families = set()
+		pending.update(families)
+		transaction.on_commit(cls._bump_pending)
+
+	@classmethod
+	def _bump_pending(cls):
+		families = getattr(_pending_bumps, 'families', None)
+		if families:
+			_pending_bumps.families = set()
+			cls._bump_now(families)
+
+	@classmethod
+	def _bump_now(cls, families):
+		now = timezone.now()
+		increment = {'version': models.F('version') + 1, 'changed_at': now}
+		updated = cls.objects.filter(family__in=families).update(**increment)
+		if updated < len(families):
+			# First bump of a family: make sure its row exists (another process
+			# may be creating it too), then increment the rows the update above
+			# missed: new ones, and any another process created in between
+			cls.objects.bulk_create([cls(family=family, changed_at=now) for family in families], ignore_conflicts=True)
+			cls.objects.filter(
+				models.Q(version=0) | ~models.Q(changed_at=now), family__in=families,
+			).update(**increment)
+
+# Families bumped in this thread's transaction, written when it commits
+_pending_bumps = threading.local()
+
+# The families whose responses include each model's data
+CHANGE_FAMILIES = {
+	Organization: ('organization', 'session', 'activity'),
+	Contact: ('organization',),
+	Location: ('organization', 'session', 'activity', 'student'),
+	Session: ('session', 'activity', 'student'),
+	Activity: ('activity', 'session', 'student'),
+	Enrollment: ('activity', 'session', 'student'),
+	Student: ('student', 'activity'),
+	Meeting: ('student',),
+	AttendanceRecord: ('student',),
+}
+
+def bump_change_versions(sender, **kwargs):
+	if not kwargs.get('raw'):
+		ChangeVersion.bump(*CHANGE_FAMILIES[sender])
+
+# Only these models get listeners: a post_delete listener turns off fast deletes
+for model in CHANGE_FAMILIES:
+	post_save.connect(bump_change_versions, sender=model, dispatch_uid=f'bump_change_versions_save_{model.__name__}')
+	post_delete.connect(bump_change_versions, sender=model, dispatch_uid=f'bump_change_versions_delete_{model.__name__}')
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination for API list views
+"""
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pages through a queryset by the values of its ordering fields instead
+    of by offset, so every page costs the same however deep it is.
+
+    The view orders the queryset by a unique combination of non-null fields
+    ending in 'id'; the cursor holds those values from the last row of the page,
+    and the next page is the rows that sort after them. New or deleted rows
+    never cause rows to be skipped or repeated between pages.
+
+    Pagination is opt-in: without a cursor or page_size parameter the whole
+    list is returned, as before.
+
+    Response:
+        {"next": url of the next page or null, "results": [...]}
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.ordering = [str(field) for field in queryset.query.order_by]
+        if not self.ordering or self.ordering[-1].lstrip('-') not in ('id', 'pk'):
+            raise ValueError('KeysetPagination needs a queryset ordered by unique fields ending in id')
+
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(params.get(self.cursor_query_param))
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+
+        # One extra row tells us whether there is a next page
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Must be a whole number'})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: 'Must be at least 1'})
+        return min(page_size, self.max_page_size)
+
+    def after(self, values):
+        """
+        Rows that sort after the given ordering values, i.e. the row-value
+        comparison (a, b, id) > (x, y, z) spelled out for any mix of directions.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {f.lstrip('-'): value for f, value in zip(self.ordering[:i], values)}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[i]})
+        return condition
+
+    def encode_cursor(self, row):
+        values = [getattr(row, field.lstrip('-')) for field in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+        return values
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,50 @@
+"""
+Faster JSON rendering for API responses
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    The output matches what JSONRenderer produces with the project's
+    settings (compact, UTF-8, \\u2028/\\u2029 escaped): dates, times,
+    decimals and anything else orjson doesn't handle natively go through
+    DRF's JSONEncoder. Falls back to JSONRenderer when orjson is missing,
+    when indented output is asked for (e.g. by the browsable API), or when
+    the settings ask for ASCII or non-compact output.
+
+    Differences from JSONRenderer:
+    - NaN and infinity are written as null instead of raising an error.
+    - Floats may be formatted differently, e.g. 1.5e20 rather than 1.5e+20.
+    """
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except TypeError:
+            # e.g. integers too large for 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as JSONRenderer: keep the output a strict JavaScript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
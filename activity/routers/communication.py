@@ -1,7 +1,8 @@
 from django.urls import path
-from activity.views import SessionEnrollmentCombinationsView, EmailDetailsView
+from activity.views import SessionEnrollmentCombinationsView, EmailDetailsView, EmailSendView
 
 urlpatterns = [
     path('session-enrollments/', SessionEnrollmentCombinationsView.as_view(), name='session-enrollments'),
     path('email-details/<str:combination_id>/', EmailDetailsView.as_view(), name='email-details'),
+    path('email-send/<str:combination_id>/', EmailSendView.as_view(), name='email-send'),
 ]
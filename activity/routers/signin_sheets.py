@@ -1,6 +1,20 @@
 from django.urls import path
-from activity.views.signin_sheets import GenerateSignInSheetView
+from activity.views.signin_sheets import (
+    GenerateSignInSheetView,
+    SignInSheetJobView,
+    GenerateSessionSignInSheetsView,
+    DownloadSignInSheetView,
+    SignInSheetBundleView,
+    ImportSignInSheetView,
+    GoogleApiMetricsView,
+)
 
 urlpatterns = [
     path('signin-sheet/generate/', GenerateSignInSheetView.as_view(), name='signin-sheet-generate'),
+    path('signin-sheet/jobs/<int:job_id>/', SignInSheetJobView.as_view(), name='signin-sheet-job'),
+    path('signin-sheet/download/', DownloadSignInSheetView.as_view(), name='signin-sheet-download'),
+    path('signin-sheet/bundle/', SignInSheetBundleView.as_view(), name='signin-sheet-bundle'),
+    path('signin-sheet/import/', ImportSignInSheetView.as_view(), name='signin-sheet-import'),
+    path('signin-sheet/google-metrics/', GoogleApiMetricsView.as_view(), name='signin-sheet-google-metrics'),
+    path('signin-sheet/generate-session/', GenerateSessionSignInSheetsView.as_view(), name='signin-sheet-generate-session'),
 ]
@@ -3,6 +3,59 @@ from .models import Organization, Contact, Location
 from .models import Student, Activity, Enrollment, Meeting, AttendanceRecord, ClassCancellation
 
 
+class SparseFieldsetMixin:
+    """
+    Lets callers ask for only some fields of a serializer, either with
+    fields=/omit= arguments or with ?fields=a,b / ?omit=c,d on the request.
+
+    Fields that aren't wanted are dropped before serializing, so their
+    SerializerMethodFields and nested serializers never run. Views can check
+    get_serializer().fields to leave out prefetches for dropped fields.
+
+    The query parameters only apply to the top-level serializer (or the
+    items of a top-level list) when it is reading, never when it validates
+    submitted data.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sparse_fields = fields
+        self._sparse_omit = omit
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted, omitted = self._get_sparse_fieldset()
+        if wanted is None and not omitted:
+            return fields
+
+        unknown = (set(wanted or ()) | set(omitted)) - set(fields)
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': f"Unknown field(s): {', '.join(sorted(unknown))}"
+            })
+        return {
+            name: field for name, field in fields.items()
+            if (wanted is None or name in wanted) and name not in omitted
+        }
+
+    def _get_sparse_fieldset(self):
+        if self._sparse_fields is not None or self._sparse_omit is not None:
+            return self._sparse_fields, set(self._sparse_omit or ())
+
+        request = self.context.get('request')
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if request is None or parent is not None or hasattr(self.root, 'initial_data'):
+            return None, set()
+
+        def param(name):
+            value = request.query_params.get(name)
+            return [f.strip() for f in value.split(',') if f.strip()] if value else None
+
+        return param('fields'), set(param('omit') or ())
+
+
 class ActivitySerializer(serializers.ModelSerializer):
     attendance_stats = serializers.SerializerMethodField()
     session_name = serializers.CharField(source='session.name', read_only=True)
@@ -38,7 +91,7 @@ class ActivitySerializer(serializers.ModelSerializer):
     def get_location_name(self, obj):
         return obj.location.name if obj.location else None
 
-class StudentDetailSerializer(serializers.ModelSerializer):
+class StudentDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     current_classes = serializers.SerializerMethodField()
     waitlist_classes = serializers.SerializerMethodField()
@@ -53,15 +106,15 @@ class StudentDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_current_classes(self, obj):
-        include_closed = self.context.get('include_closed', False)
-        enrollments = obj.enrollments.filter(status='active')
-        activities = [e.activity for e in enrollments if include_closed or not e.activity.closed]
-        # Pass student_id in context for attendance stats
-        return ActivitySerializer(activities, many=True, context={'student_id': obj.id}).data
+        return self._classes(obj, 'active')
 
     def get_waitlist_classes(self, obj):
+        return self._classes(obj, 'waiting')
+
+    def _classes(self, obj, status):
         include_closed = self.context.get('include_closed', False)
-        enrollments = obj.enrollments.filter(status='waiting')
+        # Uses the enrollments prefetched by StudentDetailView when there are any
+        enrollments = [e for e in obj.enrollments.all() if e.status == status]
         activities = [e.activity for e in enrollments if include_closed or not e.activity.closed]
         # Pass student_id in context for attendance stats
         return ActivitySerializer(activities, many=True, context={'student_id': obj.id}).data
@@ -81,7 +134,7 @@ class LocationSerializer(serializers.ModelSerializer):
         model = Location
         fields = ['id', 'name', 'address', 'description', 'organization', 'organization_name', 'organization_id']
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     contacts = ContactSerializer(many=True, read_only=True)
     contact_count = serializers.SerializerMethodField()
     num_locations = serializers.SerializerMethodField()
@@ -91,14 +144,20 @@ class OrganizationSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'contacts', 'contact_count', 'num_locations']
 
     def get_contact_count(self, obj):
+        if hasattr(obj, 'contact_count'):
+            return obj.contact_count
         return obj.contacts.count()
 
     def get_num_locations(self, obj):
+        if hasattr(obj, 'num_locations'):
+            return obj.num_locations
         return obj.locations.count()
 
-class ActivityListSerializer(serializers.ModelSerializer):
-    students = serializers.SerializerMethodField()
-    waitlist = serializers.SerializerMethodField()
+class ActivitySummarySerializer(serializers.ModelSerializer):
+    """
+    A class with its enrollment counts but not the students themselves,
+    for listings that only show numbers (classes/?view=summary).
+    """
     session_name = serializers.CharField(source='session.name', read_only=True)
     session_id = serializers.IntegerField(source='session.id', read_only=True)
     organization_name = serializers.CharField(source='session.organization.name', read_only=True)
@@ -113,41 +172,51 @@ class ActivityListSerializer(serializers.ModelSerializer):
             'id', 'type', 'day_of_week', 'time', 'location', 'location_name', 'max_capacity', 'closed',
             'session_name', 'session_id', 'organization_name', 'organization_id',
             'students_count', 'waitlist_count',
-            'students', 'waitlist',
         ]
 
+    # The class views annotate the counts and prefetch the enrollments (see
+    # activity.views.activity.with_enrollment_counts and with_enrollments);
+    # the fallbacks keep other callers working, one query each.
+
     def get_students_count(self, obj):
+        if hasattr(obj, 'students_count'):
+            return obj.students_count
         return obj.enrollments.filter(status='active').count()
 
     def get_waitlist_count(self, obj):
+        if hasattr(obj, 'waitlist_count'):
+            return obj.waitlist_count
         return obj.enrollments.filter(status='waiting').count()
 
+    def get_location_name(self, obj):
+        return obj.location.name if obj.location else None
+
+class ActivityListSerializer(ActivitySummarySerializer):
+    students = serializers.SerializerMethodField()
+    waitlist = serializers.SerializerMethodField()
+
+    class Meta(ActivitySummarySerializer.Meta):
+        fields = ActivitySummarySerializer.Meta.fields + ['students', 'waitlist']
+
     def get_students(self, obj):
-        students = obj.enrollments.filter(status='active').select_related('student')
-        return [
-            {
-                'id': e.student.id,
-                'full_name': getattr(e.student, 'full_name', None) or f"{e.student.first_name} {e.student.last_name}",
-                'display_name': getattr(e.student, 'display_name', None) or f"{e.student.last_name}, {e.student.first_name}",
-                'email': e.student.email,
-            }
-            for e in students
-        ]
+        students = getattr(obj, 'active_enrollments', None)
+        if students is None:
+            students = obj.enrollments.filter(status='active').select_related('student')
+        return [self._student_data(e.student) for e in students]
 
     def get_waitlist(self, obj):
-        waitlist = obj.enrollments.filter(status='waiting').select_related('student')
-        return [
-            {
-                'id': e.student.id,
-                'full_name': getattr(e.student, 'full_name', None) or f"{e.student.first_name} {e.student.last_name}",
-                'display_name': getattr(e.student, 'display_name', None) or f"{e.student.last_name}, {e.student.first_name}",
-                'email': e.student.email,
-            }
-            for e in waitlist
-        ]
+        waitlist = getattr(obj, 'waiting_enrollments', None)
+        if waitlist is None:
+            waitlist = obj.enrollments.filter(status='waiting').select_related('student')
+        return [self._student_data(e.student) for e in waitlist]
 
-    def get_location_name(self, obj):
-        return obj.location.name if obj.location else None
+    def _student_data(self, student):
+        return {
+            'id': student.id,
+            'full_name': getattr(student, 'full_name', None) or f"{student.first_name} {student.last_name}",
+            'display_name': getattr(student, 'display_name', None) or f"{student.last_name}, {student.first_name}",
+            'email': student.email,
+        }
 
 class AttendanceRecordSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.display_name', read_only=True)
@@ -158,7 +227,7 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         model = AttendanceRecord
         fields = ['id', 'student', 'student_name', 'student_first_name', 'student_last_name', 'status', 'note']
 
-class MeetingSerializer(serializers.ModelSerializer):
+class MeetingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     activity_type = serializers.CharField(source='activity.type', read_only=True)
     activity_time = serializers.TimeField(source='activity.time', read_only=True)
     activity_location = serializers.CharField(source='activity.location.name', read_only=True)
@@ -175,6 +244,15 @@ class MeetingSerializer(serializers.ModelSerializer):
             'attendance_records'
         ]
 
+class StudentListSerializer(serializers.ModelSerializer):
+    """Students for the student list: everything except the notes"""
+    full_name = serializers.CharField(read_only=True)
+    display_name = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Student
+        exclude = ['notes']
+
 class StudentBasicSerializer(serializers.ModelSerializer):
     """Lightweight serializer for student search and quick create"""
     class Meta:
@@ -0,0 +1,3 @@
+"""
+Helpers for tests and benchmarks. The app itself never imports this package.
+"""
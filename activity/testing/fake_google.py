@@ -0,0 +1,345 @@
+"""
+In-process stand-in for the Google Drive and Sheets APIs
+
+Implements the parts of the Drive v3 service and the gspread client that
+the sign-in sheet code uses, keeps spreadsheets in memory, records every
+call, and can add latency and rate-limit (429) errors. Install it in place
+of the real client manager with fake_google_clients():
+
+    with fake_google_clients(latency=0.05) as fake:
+        create_signin_sheet(...)
+    print(fake.call_counts())
+"""
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import httplib2
+import requests
+from googleapiclient.errors import HttpError
+from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
+
+from activity.utils.google_clients import RateLimiter, set_client_manager
+
+
+class FakeGoogle:
+    """
+    Shared state of the fake APIs: files, call log and fault injection.
+
+    Args:
+        latency: seconds added to every call
+        error_rate: fraction of calls (0-1) that fail with a 429
+        seed: seed for choosing which calls fail
+    """
+
+    def __init__(self, latency=0, error_rate=0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.files = {}
+        self.calls = []
+
+    def call(self, api, method):
+        """Record a call, then apply the configured latency and errors."""
+        with self._lock:
+            self.calls.append((api, method))
+            fail = self.error_rate and self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise rate_limit_error(api)
+
+    def call_counts(self):
+        return Counter(f'{api}.{method}' for api, method in self.calls)
+
+    def reset_calls(self):
+        self.calls = []
+
+    def new_id(self, prefix):
+        return f'{prefix}{next(self._ids)}'
+
+    def add_file(self, name, parents=(), trashed=False):
+        """Create a spreadsheet directly (not counted as an API call)."""
+        spreadsheet = FakeSpreadsheet(self, self.new_id('file'), name, list(parents))
+        spreadsheet.trashed = trashed
+        self.files[spreadsheet.id] = spreadsheet
+        return spreadsheet
+
+
+def rate_limit_error(api):
+    """The error each client library raises for an HTTP 429."""
+    message = 'Quota exceeded (fake)'
+    if api == 'drive':
+        return HttpError(
+            httplib2.Response({'status': 429}),
+            json.dumps({'error': {'code': 429, 'message': message}}).encode(),
+        )
+    response = requests.Response()
+    response.status_code = 429
+    response._content = json.dumps({'error': {'code': 429, 'message': message, 'status': 'RESOURCE_EXHAUSTED'}}).encode()
+    return APIError(response)
+
+
+class _Request:
+    """A prepared Drive request; the call happens on execute()."""
+
+    def __init__(self, fake, method, handler):
+        self._fake = fake
+        self._method = method
+        self._handler = handler
+
+    def execute(self, num_retries=0):
+        self._fake.call('drive', self._method)
+        return self._handler()
+
+
+class FakeDriveFiles:
+    """Drive v3 files() collection: list, create and get."""
+
+    # Only the query clauses the sign-in sheet search uses
+    NAME_RE = re.compile(r"name = '((?:[^'\\]|\\.)*)'")
+    PARENT_RE = re.compile(r"'([^']+)' in parents")
+
+    def __init__(self, fake):
+        self._fake = fake
+
+    def list(self, q='', spaces='drive', fields=None, **kwargs):
+        def handler():
+            name = self.NAME_RE.search(q)
+            parent = self.PARENT_RE.search(q)
+            files = [
+                {'id': f.id, 'name': f.title}
+                for f in self._fake.files.values()
+                if not f.trashed
+                and (name is None or f.title == name.group(1).replace("\\'", "'"))
+                and (parent is None or parent.group(1) in f.parents)
+            ]
+            return {'files': files}
+        return _Request(self._fake, 'files.list', handler)
+
+    def create(self, body=None, fields=None, **kwargs):
+        def handler():
+            spreadsheet = FakeSpreadsheet(self._fake, self._fake.new_id('file'), body['name'], body.get('parents', []))
+            self._fake.files[spreadsheet.id] = spreadsheet
+            return {'id': spreadsheet.id, 'parents': spreadsheet.parents}
+        return _Request(self._fake, 'files.create', handler)
+
+    def get(self, fileId=None, fields=None, **kwargs):
+        def handler():
+            spreadsheet = self._fake.files.get(fileId)
+            if spreadsheet is None:
+                raise HttpError(httplib2.Response({'status': 404}), b'{"error": {"code": 404, "message": "File not found"}}')
+            return {'id': spreadsheet.id, 'name': spreadsheet.title, 'trashed': spreadsheet.trashed}
+        return _Request(self._fake, 'files.get', handler)
+
+
+class FakeDriveService:
+    def __init__(self, fake):
+        self._fake = fake
+
+    def files(self):
+        return FakeDriveFiles(self._fake)
+
+
+def api_values(rows):
+    """
+    Rows of values as the Sheets API returns them, without trailing empty
+    cells and rows; e.g. api_values(layout.rows) is what a correctly written
+    sign-in sheet reads back as.
+    """
+    values = [list(row) for row in rows]
+    for row in values:
+        while row and row[-1] == '':
+            row.pop()
+    while values and not values[-1]:
+        values.pop()
+    return values
+
+
+class FakeWorksheet:
+    """The gspread Worksheet attributes and methods the sign-in code uses."""
+
+    def __init__(self, spreadsheet, sheet_id, title, rows, cols):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.cells = {}
+        self.formats = []
+        self.merges = []
+
+    def update_title(self, title):
+        self.spreadsheet.fake.call('sheets', 'update_title')
+        self.title = title
+
+    def get_all_values(self):
+        self.spreadsheet.fake.call('sheets', 'values_get')
+        return self._values()
+
+    def _values(self):
+        if not self.cells:
+            return []
+        num_rows = max(r for r, _ in self.cells) + 1
+        num_cols = max(c for _, c in self.cells) + 1
+        return api_values([[self.cells.get((r, c), '') for c in range(num_cols)] for r in range(num_rows)])
+
+
+class FakeSpreadsheet:
+    """The gspread Spreadsheet attributes and methods the sign-in code uses."""
+
+    def __init__(self, fake, file_id, title, parents):
+        self.fake = fake
+        self.id = file_id
+        self.title = title
+        self.parents = parents
+        self.trashed = False
+        self.worksheets_list = [FakeWorksheet(self, 0, 'Sheet1', 1000, 26)]
+        self._sheet_ids = itertools.count(1)
+
+    @property
+    def url(self):
+        return f'https://docs.google.com/spreadsheets/d/{self.id}'
+
+    @property
+    def sheet1(self):
+        self.fake.call('sheets', 'fetch_sheet_metadata')
+        return self.worksheets_list[0]
+
+    def fetch_sheet_metadata(self, params=None):
+        self.fake.call('sheets', 'fetch_sheet_metadata')
+        return {
+            'properties': {'title': self.title},
+            'sheets': [
+                {'properties': {
+                    'sheetId': ws.id, 'title': ws.title,
+                    'gridProperties': {'rowCount': ws.row_count, 'columnCount': ws.col_count},
+                }}
+                for ws in self.worksheets_list
+            ],
+        }
+
+    def worksheets(self):
+        self.fake.call('sheets', 'fetch_sheet_metadata')
+        return list(self.worksheets_list)
+
+    def worksheet(self, title):
+        self.fake.call('sheets', 'fetch_sheet_metadata')
+        for worksheet in self.worksheets_list:
+            if worksheet.title == title:
+                return worksheet
+        raise WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows, cols, index=None):
+        self.fake.call('sheets', 'add_worksheet')
+        if any(ws.title == title for ws in self.worksheets_list):
+            response = requests.Response()
+            response.status_code = 400
+            response._content = json.dumps({'error': {
+                'code': 400, 'status': 'INVALID_ARGUMENT',
+                'message': f'A sheet with the name "{title}" already exists.',
+            }}).encode()
+            raise APIError(response)
+        worksheet = FakeWorksheet(self, next(self._sheet_ids), title, rows, cols)
+        self.worksheets_list.append(worksheet)
+        return worksheet
+
+    def values_get(self, range_name, params=None):
+        self.fake.call('sheets', 'values_get')
+        title = range_name.split('!')[0]
+        if title.startswith("'"):
+            title = title[1:-1].replace("''", "'")
+        worksheet = next(ws for ws in self.worksheets_list if ws.title == title)
+        return {'range': range_name, 'values': worksheet._values()}
+
+    def batch_update(self, body):
+        self.fake.call('sheets', 'batch_update')
+        worksheets = {ws.id: ws for ws in self.worksheets_list}
+        for request in body['requests']:
+            (kind, params), = request.items()
+            if kind == 'updateCells' and 'range' in params:
+                # Clearing a whole sheet (fields '*')
+                worksheet = worksheets[params['range']['sheetId']]
+                worksheet.cells.clear()
+                worksheet.formats.clear()
+            elif kind == 'updateCells':
+                start = params['start']
+                worksheet = worksheets[start['sheetId']]
+                for r, row in enumerate(params['rows'], start=start.get('rowIndex', 0)):
+                    for c, cell in enumerate(row.get('values', []), start=start.get('columnIndex', 0)):
+                        value = cell.get('userEnteredValue', {}).get('stringValue', '')
+                        if r >= worksheet.row_count or c >= worksheet.col_count:
+                            raise ValueError(f'Cell ({r}, {c}) is outside the grid of sheet {worksheet.id}')
+                        worksheet.cells[(r, c)] = value
+            elif kind == 'updateSheetProperties':
+                properties = params['properties']
+                worksheet = worksheets[properties['sheetId']]
+                grid = properties.get('gridProperties', {})
+                worksheet.row_count = grid.get('rowCount', worksheet.row_count)
+                worksheet.col_count = grid.get('columnCount', worksheet.col_count)
+            elif kind == 'repeatCell':
+                worksheets[params['range']['sheetId']].formats.append(params)
+            elif kind == 'mergeCells':
+                worksheets[params['range']['sheetId']].merges.append(params['range'])
+            elif kind == 'unmergeCells':
+                worksheets[params['range']['sheetId']].merges.clear()
+        return {'spreadsheetId': self.id, 'replies': [{} for _ in body['requests']]}
+
+
+class FakeGspreadClient:
+    def __init__(self, fake):
+        self._fake = fake
+
+    def open_by_key(self, key):
+        self._fake.call('sheets', 'open_by_key')
+        spreadsheet = self._fake.files.get(key)
+        if spreadsheet is None:
+            raise SpreadsheetNotFound()
+        return spreadsheet
+
+
+class _NoLimit:
+    def acquire(self):
+        pass
+
+
+class FakeGoogleClientManager:
+    """Drop-in replacement for GoogleClientManager backed by a FakeGoogle."""
+
+    def __init__(self, fake, requests_per_minute=None):
+        self.fake = fake
+        self.rate_limiter = RateLimiter(requests_per_minute) if requests_per_minute else _NoLimit()
+        self._drive_service = FakeDriveService(fake)
+        self._gspread_client = FakeGspreadClient(fake)
+
+    def get_credentials(self):
+        return None
+
+    def get_drive_service(self):
+        return self._drive_service
+
+    def get_gspread_client(self):
+        return self._gspread_client
+
+
+@contextmanager
+def fake_google_clients(latency=0, error_rate=0, seed=None, requests_per_minute=None):
+    """
+    Use fake Google APIs for the duration of the block.
+
+    Yields:
+        FakeGoogle holding the fake files and the call log
+    """
+    fake = FakeGoogle(latency=latency, error_rate=error_rate, seed=seed)
+    previous = set_client_manager(FakeGoogleClientManager(fake, requests_per_minute))
+    try:
+        yield fake
+    finally:
+        set_client_manager(previous)
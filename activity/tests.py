@@ -1,3 +1,219 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from activity.models import Activity, Enrollment, Organization, OutboundMessage, Session, SignInSheetFile, SignInSheetJob, Student
+from activity.testing.fake_google import api_values, fake_google_clients
+from activity.utils import google_resilience
+from activity.utils.google_resilience import GoogleUnavailable
+from activity.utils.google_sheets import create_signin_sheet, get_worksheet_values
+from activity.utils.outbox import claim_batch, enqueue_message
+from activity.utils.signin_data import build_signin_layout, build_signin_sheet_data
+from activity.utils.signin_jobs import claim_job, enqueue_signin_sheet_job, run_job
+
+
+@override_settings(GOOGLE_API_BACKOFF_SECONDS=0, SIGNIN_SHEET_FILE_VALIDATE_SECONDS=3600)
+class CreateSignInSheetTests(TestCase):
+    """create_signin_sheet against the in-process fake Google APIs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(name='Rec')
+        session = Session.objects.create(
+            organization=organization, name='Spring',
+            start_date=date(2025, 1, 6), end_date=date(2025, 3, 31),
+        )
+        cls.activity = Activity.objects.create(type='Zumba', session=session, day_of_week='Monday', time=time(18, 0))
+        for i in range(12):
+            student = Student.objects.create(first_name=f'First{i}', last_name=f'Last{i:02d}')
+            Enrollment.objects.create(student=student, activity=cls.activity, status='active' if i < 9 else 'waiting')
+
+    def setUp(self):
+        # A fresh circuit breaker, so failures don't carry over between tests
+        google_resilience._breaker = None
+        self.addCleanup(setattr, google_resilience, '_breaker', None)
+        self.sheet_data = build_signin_sheet_data([self.activity], date(2025, 1, 6), 7)[0]
+        self.layout = build_signin_layout(**self.sheet_data)
+
+    def spreadsheet_for(self, fake, url):
+        return fake.files[url.rsplit('/', 1)[-1]]
+
+    def test_creates_spreadsheet_when_none_exists(self):
+        with fake_google_clients() as fake:
+            url = create_signin_sheet(**self.sheet_data)
+
+        self.assertEqual(fake.call_counts(), {
+            'drive.files.list': 1,
+            'drive.files.create': 1,
+            'sheets.open_by_key': 1,
+            'sheets.fetch_sheet_metadata': 1,
+            'sheets.update_title': 1,
+            'sheets.batch_update': 1,
+        })
+        spreadsheet = self.spreadsheet_for(fake, url)
+        self.assertEqual(spreadsheet.title, self.layout.title)
+        self.assertEqual(spreadsheet.parents, [settings.GOOGLE_DRIVE_FOLDER_ID])
+        self.assertEqual(spreadsheet.worksheets_list[-1]._values(), api_values(self.layout.rows))
+        self.assertEqual(SignInSheetFile.objects.get(activity=self.activity).spreadsheet_id, spreadsheet.id)
+
+    def test_adds_worksheet_to_spreadsheet_found_by_search(self):
+        with fake_google_clients() as fake:
+            existing = fake.add_file(self.layout.title, parents=[settings.GOOGLE_DRIVE_FOLDER_ID])
+            url = create_signin_sheet(**self.sheet_data)
+
+        self.assertEqual(fake.call_counts(), {
+            'drive.files.list': 1,
+            'sheets.open_by_key': 1,
+            'sheets.add_worksheet': 1,
+            'sheets.batch_update': 1,
+        })
+        self.assertEqual(url, existing.url)
+        self.assertEqual(len(existing.worksheets_list), 2)
+        self.assertEqual(existing.worksheets_list[-1]._values(), api_values(self.layout.rows))
+        self.assertEqual(SignInSheetFile.objects.get(activity=self.activity).spreadsheet_id, existing.id)
+
+    def test_cached_spreadsheet_skips_the_search(self):
+        with fake_google_clients() as fake:
+            existing = fake.add_file(self.layout.title, parents=[settings.GOOGLE_DRIVE_FOLDER_ID])
+            SignInSheetFile.objects.create(activity=self.activity, spreadsheet_id=existing.id, url=existing.url)
+            url = create_signin_sheet(**self.sheet_data)
+
+        self.assertEqual(fake.call_counts(), {
+            'sheets.open_by_key': 1,
+            'sheets.add_worksheet': 1,
+            'sheets.batch_update': 1,
+        })
+        self.assertEqual(url, existing.url)
+        self.assertEqual(existing.worksheets_list[-1]._values(), api_values(self.layout.rows))
+
+    def test_stale_cache_entry_is_checked_once_in_drive(self):
+        with fake_google_clients() as fake:
+            existing = fake.add_file(self.layout.title, parents=[settings.GOOGLE_DRIVE_FOLDER_ID])
+            SignInSheetFile.objects.create(
+                activity=self.activity, spreadsheet_id=existing.id, url=existing.url,
+                validated_at=timezone.now() - timedelta(days=1),
+            )
+            create_signin_sheet(**self.sheet_data)
+
+        self.assertEqual(fake.call_counts()['drive.files.get'], 1)
+        self.assertNotIn('drive.files.list', fake.call_counts())
+        cached = SignInSheetFile.objects.get(activity=self.activity)
+        self.assertGreater(cached.validated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_trashed_cached_spreadsheet_falls_back_to_a_new_one(self):
+        with fake_google_clients() as fake:
+            trashed = fake.add_file(self.layout.title, parents=[settings.GOOGLE_DRIVE_FOLDER_ID], trashed=True)
+            SignInSheetFile.objects.create(
+                activity=self.activity, spreadsheet_id=trashed.id, url=trashed.url,
+                validated_at=timezone.now() - timedelta(days=1),
+            )
+            url = create_signin_sheet(**self.sheet_data)
+
+        self.assertNotEqual(url, trashed.url)
+        self.assertEqual(fake.call_counts()['drive.files.create'], 1)
+        self.assertEqual(SignInSheetFile.objects.get(activity=self.activity).spreadsheet_id, self.spreadsheet_for(fake, url).id)
+
+    def test_formatting_is_written_in_the_same_batch(self):
+        with fake_google_clients() as fake:
+            url = create_signin_sheet(**self.sheet_data)
+
+        worksheet = self.spreadsheet_for(fake, url).worksheets_list[-1]
+        self.assertEqual(fake.call_counts()['sheets.batch_update'], 1)
+        self.assertTrue(worksheet.formats)
+        self.assertTrue(worksheet.merges)
+
+    def test_large_roster_grows_the_grid(self):
+        students = [Student(id=10000 + i, first_name=f'Extra{i}', last_name='Student') for i in range(1200)]
+        sheet_data = dict(self.sheet_data, enrolled_students=students)
+        layout = build_signin_layout(**sheet_data)
+
+        with fake_google_clients() as fake:
+            url = create_signin_sheet(**sheet_data)
+
+        worksheet = self.spreadsheet_for(fake, url).worksheets_list[-1]
+        self.assertGreaterEqual(worksheet.row_count, len(layout.rows))
+        self.assertEqual(worksheet._values(), api_values(layout.rows))
+
+    def test_rate_limit_errors_are_retried(self):
+        with fake_google_clients(error_rate=0.3, seed=3) as fake:
+            url = create_signin_sheet(**self.sheet_data)
+
+        # More than the 6 calls of an undisturbed run
+        self.assertGreater(sum(fake.call_counts().values()), 6)
+        self.assertEqual(self.spreadsheet_for(fake, url).worksheets_list[-1]._values(), api_values(self.layout.rows))
+
+    @override_settings(GOOGLE_API_MAX_RETRIES=2)
+    def test_persistent_rate_limiting_raises_google_unavailable(self):
+        with fake_google_clients(error_rate=1) as fake:
+            with self.assertRaises(GoogleUnavailable):
+                create_signin_sheet(**self.sheet_data)
+
+        # The first call and its two retries, then nothing else
+        self.assertEqual(sum(fake.call_counts().values()), 3)
+
+    def test_worksheet_with_the_same_title_is_not_written_over(self):
+        with fake_google_clients() as fake, mock.patch('django.utils.timezone.now', return_value=timezone.now()):
+            url = create_signin_sheet(**self.sheet_data)
+            spreadsheet = self.spreadsheet_for(fake, url)
+            first = spreadsheet.worksheets_list[-1]
+            first.cells[(500, 0)] = 'Notes'
+            create_signin_sheet(**self.sheet_data)
+
+        second = spreadsheet.worksheets_list[-1]
+        self.assertEqual(second.title, f'{first.title} (2)')
+        self.assertEqual(first.cells[(500, 0)], 'Notes')
+        self.assertEqual(second._values(), api_values(self.layout.rows))
+
+    @override_settings(SIGNIN_SHEET_JOB_THREADS=0)
+    def test_requeued_job_rewrites_its_own_worksheet(self):
+        with fake_google_clients() as fake:
+            job = enqueue_signin_sheet_job(self.activity, date(2025, 1, 6), 7)
+            self.assertTrue(run_job(claim_job()))
+            job.refresh_from_db()
+            spreadsheet = self.spreadsheet_for(fake, job.sheet_url)
+            worksheet = spreadsheet.worksheets_list[-1]
+            self.assertEqual((job.spreadsheet_id, job.worksheet_id), (spreadsheet.id, worksheet.id))
+
+            # Left over from a run that failed part way through
+            worksheet.cells[(500, 0)] = 'Stale'
+            worksheet.merges.append({'sheetId': worksheet.id})
+            SignInSheetJob.objects.filter(pk=job.pk).update(status='queued')
+            self.assertTrue(run_job(claim_job()))
+
+        self.assertEqual(len(spreadsheet.worksheets_list), 1)
+        self.assertEqual(worksheet._values(), api_values(self.layout.rows))
+        self.assertNotIn({'sheetId': worksheet.id}, worksheet.merges)
+
+    def test_read_back_written_values(self):
+        with fake_google_clients() as fake:
+            url = create_signin_sheet(**self.sheet_data)
+            spreadsheet = self.spreadsheet_for(fake, url)
+            fake.reset_calls()
+            title, values = get_worksheet_values(spreadsheet.id)
+
+        self.assertEqual(title, spreadsheet.worksheets_list[-1].title)
+        self.assertEqual(values, api_values(self.layout.rows))
+        self.assertEqual(fake.call_counts(), {
+            'sheets.open_by_key': 1,
+            'sheets.fetch_sheet_metadata': 1,
+            'sheets.values_get': 1,
+        })
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_CLAIM_TIMEOUT_SECONDS=60)
+class OutboxClaimTests(TestCase):
+    def test_message_that_keeps_crashing_the_worker_goes_dead(self):
+        message = enqueue_message('session_email', 'Subject', 'Body', bcc=['student@example.com'])
+
+        for attempt in range(1, 4):
+            claimed = claim_batch(10)
+            self.assertEqual([(m.pk, m.attempts) for m in claimed], [(message.pk, attempt)])
+            # The worker dies without recording anything
+            OutboundMessage.objects.filter(pk=message.pk).update(claimed_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(claim_batch(10), [])
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('dead', 3))
@@ -0,0 +1,118 @@
+"""
+A1 notation for Google Sheets ranges
+
+Rows and columns are 0-based here and range end indexes are exclusive, as
+in a GridRange; A1 strings use the usual 1-based rows and lettered columns
+(A-Z, then AA, AB, ...).
+
+    >>> a1_range(1, 3, 0, 53)
+    'A2:BA3'
+    >>> parse_a1_range('A2:BA3')
+    (1, 3, 0, 53)
+"""
+import re
+
+
+A1_CELL_RE = re.compile(r'^([A-Z]*)([0-9]*)$')
+
+
+def column_letter(col):
+    """0-based column index to its letters: 0 -> 'A', 25 -> 'Z', 26 -> 'AA'."""
+    if col < 0:
+        raise ValueError(f'Column index must not be negative, got {col}')
+    letters = ''
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def column_index(letters):
+    """Column letters to a 0-based index: 'A' -> 0, 'Z' -> 25, 'AA' -> 26."""
+    letters = letters.upper()
+    if not letters or not letters.isalpha() or not letters.isascii():
+        raise ValueError(f'Invalid column letters "{letters}"')
+    col = 0
+    for letter in letters:
+        col = col * 26 + ord(letter) - ord('A') + 1
+    return col - 1
+
+
+def a1_cell(row, col):
+    """0-based row and column to an A1 cell: (0, 0) -> 'A1'."""
+    return f'{column_letter(col)}{row + 1}'
+
+
+def a1_range(start_row, end_row, start_col, end_col):
+    """
+    A1 range covering rows [start_row, end_row) and columns [start_col, end_col).
+    A single cell is written without a colon.
+    """
+    if end_row <= start_row or end_col <= start_col:
+        raise ValueError(f'Empty range: rows {start_row}-{end_row}, columns {start_col}-{end_col}')
+    start = a1_cell(start_row, start_col)
+    end = a1_cell(end_row - 1, end_col - 1)
+    return start if start == end else f'{start}:{end}'
+
+
+def quote_sheet_title(title):
+    """Quote a worksheet title for use in a range, e.g. "Bob's" -> "'Bob''s'"."""
+    return "'{}'".format(title.replace("'", "''"))
+
+
+def _parse_cell(cell):
+    match = A1_CELL_RE.match(cell.strip().upper())
+    if match is None or not any(match.groups()):
+        raise ValueError(f'Invalid A1 reference "{cell}"')
+    letters, digits = match.groups()
+    if digits and int(digits) < 1:
+        raise ValueError(f'Invalid A1 reference "{cell}"')
+    return (
+        int(digits) - 1 if digits else None,
+        column_index(letters) if letters else None,
+    )
+
+
+def parse_a1_range(range_name):
+    """
+    Parse an A1 range (without a sheet title) into 0-based grid indexes.
+
+    Whole columns ('A:C') and whole rows ('2:5') are allowed; the open side
+    comes back as None, meaning unbounded.
+
+    Returns:
+        (start_row, end_row, start_col, end_col) with exclusive ends
+    """
+    start, _, end = range_name.partition(':')
+    start_row, start_col = _parse_cell(start)
+    end_row, end_col = _parse_cell(end) if end else (start_row, start_col)
+
+    if (start_row is None) != (end_row is None) or (start_col is None) != (end_col is None):
+        raise ValueError(f'Invalid A1 range "{range_name}"')
+    if start_row is not None and end_row < start_row:
+        start_row, end_row = end_row, start_row
+    if start_col is not None and end_col < start_col:
+        start_col, end_col = end_col, start_col
+
+    return (
+        start_row,
+        end_row + 1 if end_row is not None else None,
+        start_col,
+        end_col + 1 if end_col is not None else None,
+    )
+
+
+def grid_range(sheet_id, range_name):
+    """
+    GridRange dict for an A1 range on the worksheet with the given sheetId.
+    Unbounded sides are left out, as the API expects.
+    """
+    start_row, end_row, start_col, end_col = parse_a1_range(range_name)
+    indexes = {
+        'startRowIndex': start_row,
+        'endRowIndex': end_row,
+        'startColumnIndex': start_col,
+        'endColumnIndex': end_col,
+    }
+    return dict({'sheetId': sheet_id}, **{key: value for key, value in indexes.items() if value is not None})
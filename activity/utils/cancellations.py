@@ -0,0 +1,155 @@
+"""
+Cancellation utility functions for cancelling many classes at once
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from activity.models import DAY_NUMBERS, Activity, ClassCancellation, Meeting
+from activity.utils.notifications import queue_cancellation_notices
+
+
+# Times bulk_cancel_classes() looks again after other requests cancelled some of the same dates
+BULK_CANCEL_ATTEMPTS = 3
+
+
+def get_class_dates_in_range(activity, start_date, end_date):
+    """
+    Dates the activity meets between start_date and end_date (inclusive),
+    limited to its session's dates.
+
+    Args:
+        activity: Activity with its session loaded
+    """
+    day_num = DAY_NUMBERS.get(activity.day_of_week)
+    if day_num is None:
+        return []
+
+    start = max(start_date, activity.session.start_date)
+    end = min(end_date, activity.session.end_date)
+    current = start + timedelta(days=(day_num - start.weekday()) % 7)
+
+    dates = []
+    while current <= end:
+        dates.append(current)
+        current += timedelta(days=7)
+    return dates
+
+
+def bulk_cancel_classes(start_date, end_date=None, organization_id=None, location_id=None, reason='',
+                        delete_empty_meetings=False, notify=True, dry_run=False):
+    """
+    Cancel every open class meeting between start_date and end_date.
+
+    Matching classes are open activities in open sessions, optionally limited
+    to an organization and/or a location. Dates already cancelled are left
+    alone. Upcoming cancellations are announced through the outbox unless
+    notify is False.
+
+    Args:
+        start_date: first date to cancel (datetime.date)
+        end_date: last date to cancel (defaults to start_date)
+        organization_id: only cancel classes for this organization
+        location_id: only cancel classes at this location
+        reason: reason stored on each cancellation
+        delete_empty_meetings: also delete meetings on cancelled dates that have no recorded attendance
+        notify: queue cancellation notices for students
+        dry_run: compute the matching classes without changing anything
+
+    Returns:
+        dict with the created cancellations and counts
+
+    Raises:
+        IntegrityError: other requests kept cancelling the same dates
+        BULK_CANCEL_ATTEMPTS times in a row
+    """
+    end_date = end_date or start_date
+
+    activities = Activity.objects.filter(
+        closed=False,
+        session__closed=False,
+        session__start_date__lte=end_date,
+        session__end_date__gte=start_date,
+    ).select_related('session__organization', 'location')
+    if organization_id:
+        activities = activities.filter(session__organization_id=organization_id)
+    if location_id:
+        activities = activities.filter(location_id=location_id)
+    activities = list(activities)
+
+    pairs = [
+        (activity, date)
+        for activity in activities
+        for date in get_class_dates_in_range(activity, start_date, end_date)
+    ]
+    activity_ids = [activity.id for activity in activities]
+
+    with transaction.atomic():
+        for attempt in range(1, BULK_CANCEL_ATTEMPTS + 1):
+            existing = set(
+                ClassCancellation.objects.filter(
+                    activity_id__in=activity_ids,
+                    date__range=(start_date, end_date),
+                ).values_list('activity_id', 'date')
+            )
+            new_cancellations = [
+                ClassCancellation(activity=activity, date=date, reason=reason or None)
+                for activity, date in pairs
+                if (activity.id, date) not in existing
+            ]
+            if dry_run:
+                break
+            # No ignore_conflicts: new_cancellations must be exactly the rows
+            # created here, since only those get notices. If another request
+            # cancelled some of the dates meanwhile, look again and retry.
+            try:
+                with transaction.atomic():
+                    ClassCancellation.objects.bulk_create(new_cancellations)
+                break
+            except IntegrityError:
+                if attempt == BULK_CANCEL_ATTEMPTS:
+                    raise
+
+        meetings_deleted = 0
+        notices_queued = 0
+        if not dry_run:
+
+            if delete_empty_meetings and pairs:
+                meetings_deleted = _delete_empty_meetings({(a.id, d) for a, d in pairs}, start_date, end_date)
+
+            if notify:
+                today = timezone.localdate()
+                notices_queued = queue_cancellation_notices(
+                    [c for c in new_cancellations if c.date >= today]
+                )
+
+    return {
+        'cancellations': new_cancellations,
+        'created': len(new_cancellations),
+        'already_cancelled': len(pairs) - len(new_cancellations),
+        'meetings_deleted': meetings_deleted,
+        'notices_queued': notices_queued,
+    }
+
+
+def _delete_empty_meetings(pairs, start_date, end_date):
+    """
+    Delete meetings on the given (activity_id, date) pairs that have no
+    attendance recorded beyond the auto-populated 'scheduled' records.
+    """
+    activity_ids = {activity_id for activity_id, _ in pairs}
+    meetings = Meeting.objects.filter(
+        activity_id__in=activity_ids,
+        date__range=(start_date, end_date),
+    ).annotate(
+        recorded=Count('attendance_records', filter=~Q(attendance_records__status='scheduled'))
+    ).filter(recorded=0).values_list('id', 'activity_id', 'date')
+
+    meeting_ids = [meeting_id for meeting_id, activity_id, date in meetings if (activity_id, date) in pairs]
+    if not meeting_ids:
+        return 0
+    # delete() also counts the cascaded attendance records, so report meetings only
+    _, deleted_per_model = Meeting.objects.filter(id__in=meeting_ids).delete()
+    return deleted_per_model.get(Meeting._meta.label, 0)
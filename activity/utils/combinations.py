@@ -0,0 +1,132 @@
+"""
+Enrollment combination utility functions for session emails
+"""
+import hashlib
+import json
+from collections import defaultdict
+
+from activity.models import NotificationSnapshot
+
+
+def get_student_classes(activities):
+    """
+    Map each student to the classes they are enrolled in or waitlisted for.
+
+    Args:
+        activities: Activity objects with 'enrollments__student' prefetched
+
+    Returns:
+        dict: {student_id: {'enrolled': set, 'waitlisted': set, 'student': Student}}
+    """
+    student_classes = defaultdict(lambda: {'enrolled': set(), 'waitlisted': set(), 'student': None})
+    for activity in activities:
+        for enrollment in activity.enrollments.all():
+            if enrollment.status == 'active':
+                student_classes[enrollment.student_id]['enrolled'].add(activity.id)
+            elif enrollment.status == 'waiting':
+                student_classes[enrollment.student_id]['waitlisted'].add(activity.id)
+            student_classes[enrollment.student_id]['student'] = enrollment.student
+    return student_classes
+
+
+def get_combination_id(enrolled_ids, waitlisted_ids):
+    """Stable identifier for a combination of enrolled and waitlisted class ids."""
+    combo_string = json.dumps({
+        'enrolled': sorted(enrolled_ids),
+        'waitlisted': sorted(waitlisted_ids)
+    }, sort_keys=True)
+    return hashlib.md5(combo_string.encode()).hexdigest()
+
+
+def get_activity_schedule(activity):
+    """
+    The parts of a class a student is told about: when and where it meets,
+    its meeting dates and its cancelled dates.
+
+    Args:
+        activity: Activity with 'cancellations' prefetched
+    """
+    cancelled_dates = sorted(c.date for c in activity.cancellations.all())
+    return {
+        'type': activity.type,
+        'day_of_week': activity.day_of_week,
+        'time': activity.time.isoformat(),
+        'location_id': activity.location_id,
+        'dates': [d.isoformat() for d in activity.get_possible_dates() if d not in cancelled_dates],
+        'cancelled_dates': [d.isoformat() for d in cancelled_dates],
+    }
+
+
+class ScheduleBuilder:
+    """
+    Builds and fingerprints the schedule for a combination of classes.
+
+    Each activity's schedule is computed once and each combination's
+    fingerprint once, no matter how many students share them.
+    """
+
+    def __init__(self, activity_map):
+        self.activity_map = activity_map
+        self._activity_schedules = {}
+        self._combinations = {}
+
+    def get_schedule(self, enrolled_ids, waitlisted_ids):
+        return self._get(enrolled_ids, waitlisted_ids)[0]
+
+    def get_fingerprint(self, enrolled_ids, waitlisted_ids):
+        return self._get(enrolled_ids, waitlisted_ids)[1]
+
+    def _get(self, enrolled_ids, waitlisted_ids):
+        key = (tuple(sorted(enrolled_ids)), tuple(sorted(waitlisted_ids)))
+        if key not in self._combinations:
+            schedule = {
+                'enrolled': [self._activity_schedule(act_id) for act_id in key[0]],
+                'waitlisted': [self._activity_schedule(act_id) for act_id in key[1]],
+            }
+            fingerprint = hashlib.sha256(json.dumps(schedule, sort_keys=True).encode()).hexdigest()
+            self._combinations[key] = (schedule, fingerprint)
+        return self._combinations[key]
+
+    def _activity_schedule(self, activity_id):
+        if activity_id not in self._activity_schedules:
+            schedule = get_activity_schedule(self.activity_map[activity_id])
+            schedule['id'] = activity_id
+            self._activity_schedules[activity_id] = schedule
+        return self._activity_schedules[activity_id]
+
+
+def get_changed_student_ids(session, student_classes, schedule_builder):
+    """
+    Students whose current schedule differs from what they were last sent.
+
+    Snapshots for the whole session are loaded in one query and compared by
+    fingerprint; students with no snapshot count as changed.
+
+    Returns:
+        set of student ids
+    """
+    last_sent = dict(
+        NotificationSnapshot.objects.filter(session=session).values_list('student_id', 'fingerprint')
+    )
+    return {
+        student_id
+        for student_id, classes in student_classes.items()
+        if last_sent.get(student_id) != schedule_builder.get_fingerprint(classes['enrolled'], classes['waitlisted'])
+    }
+
+
+def record_snapshots(session, students, enrolled_ids, waitlisted_ids, schedule_builder):
+    """
+    Remember the schedule just sent to students, replacing any previous snapshot.
+    """
+    schedule = schedule_builder.get_schedule(enrolled_ids, waitlisted_ids)
+    fingerprint = schedule_builder.get_fingerprint(enrolled_ids, waitlisted_ids)
+    NotificationSnapshot.objects.bulk_create(
+        [
+            NotificationSnapshot(session=session, student=student, fingerprint=fingerprint, schedule=schedule)
+            for student in students
+        ],
+        update_conflicts=True,
+        unique_fields=['session', 'student'],
+        update_fields=['fingerprint', 'schedule', 'sent_at'],
+    )
@@ -0,0 +1,111 @@
+"""
+Email template utility functions for rendering text/HTML message bodies
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.template.loader import get_template
+from premailer import Premailer
+
+
+# Number of inlined HTML bodies kept per process
+INLINE_CACHE_SIZE = 256
+
+
+class EmailTemplate:
+    """
+    A compiled text/HTML template pair.
+
+    Both templates are loaded and compiled once. The rendered HTML has its
+    CSS inlined with premailer, and the result is cached by template version
+    and rendered content, so rendering the same combination twice inlines
+    only once.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.text_template = get_template(f'activity/email/{name}.txt')
+        self.html_template = get_template(f'activity/email/{name}.html')
+
+        source = self.text_template.template.source + self.html_template.template.source
+        self.version = hashlib.sha1(source.encode()).hexdigest()[:12]
+
+        self._inline_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, context):
+        """
+        Render the text and HTML bodies for a context.
+
+        Returns:
+            tuple: (text_body, html_body) with CSS inlined into the HTML
+        """
+        text_body = self.text_template.render(context).rstrip('\n')
+        html_body = self._inline(self.html_template.render(context))
+        return text_body, html_body
+
+    def _inline(self, html):
+        key = hashlib.sha1(html.encode()).hexdigest()
+        with self._lock:
+            if key in self._inline_cache:
+                self._inline_cache.move_to_end(key)
+                return self._inline_cache[key]
+
+        inlined = Premailer(
+            html,
+            keep_style_tags=False,
+            remove_classes=True,
+            disable_validation=True,
+            cache_css_parsing=True,
+        ).transform()
+
+        with self._lock:
+            self._inline_cache[key] = inlined
+            if len(self._inline_cache) > INLINE_CACHE_SIZE:
+                self._inline_cache.popitem(last=False)
+        return inlined
+
+
+def format_time_for_email(time_obj):
+    """Format a time as h:mm am/pm, dropping :00 (e.g. 7am, 11:30pm)."""
+    return time_obj.strftime('%-I:%M%p').replace(':00', '').lower()
+
+
+def get_time_range(time_obj):
+    """Time range for a class, assuming 1-hour classes (e.g. 6pm - 7pm)."""
+    end_time_obj = time_obj.replace(hour=(time_obj.hour + 1) % 24)
+    return f"{format_time_for_email(time_obj)} - {format_time_for_email(end_time_obj)}"
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_email_template(name):
+    """
+    Return the compiled EmailTemplate for a name, compiling it on first use.
+
+    In DEBUG, templates are reloaded when their source changes, so each
+    template version has its own compiled and inlined cache.
+    """
+    template = _templates.get(name)
+    if template is not None and not (settings.DEBUG and _is_stale(template)):
+        return template
+
+    with _templates_lock:
+        # Another thread may have compiled it while we waited
+        if _templates.get(name) is template:
+            _templates[name] = EmailTemplate(name)
+        return _templates[name]
+
+
+def _is_stale(template):
+    # The cached template loader hands back the same compiled template until
+    # the source changes (in DEBUG the autoreloader resets it), so an identity
+    # check is enough to detect a new version.
+    return (
+        get_template(f'activity/email/{template.name}.txt').template is not template.text_template.template or
+        get_template(f'activity/email/{template.name}.html').template is not template.html_template.template
+    )
@@ -0,0 +1,240 @@
+"""
+Process-wide Google API clients for Drive and Sheets
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import gspread
+import google_auth_httplib2
+import httplib2
+import requests
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from django.conf import settings
+
+
+# Define the scopes - must match the ones used when generating the token
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Refresh the access token when it is this close to expiring
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread making Google API calls, so bulk
+    generation stays under the per-user request quota.
+    """
+
+    def __init__(self, requests_per_minute, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(1, requests_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class TokenStore:
+    """
+    token.json on disk, shared safely between worker processes.
+
+    Writes go to a temporary file that is renamed over token.json, so a
+    reader always sees either the old or the new token, never a partial
+    file. Refreshes are serialized with an exclusive flock on a separate
+    lock file, so only one process refreshes at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f'{path}.lock'
+
+    @contextmanager
+    def lock(self):
+        """Hold the cross-process refresh lock."""
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        """Return (credentials, mtime) from token.json."""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(
+                f"Token file is missing or invalid at {self.path}. "
+                "Please generate a new token.json file."
+            )
+        mtime = self.mtime()
+        # Load the saved token containing the access token and refresh token
+        return Credentials.from_authorized_user_file(self.path, SCOPES), mtime
+
+    def save(self, creds):
+        """Atomically replace token.json; call while holding lock()."""
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.token-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as tmp:
+                tmp.write(creds.to_json())
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return self.mtime()
+
+
+class GoogleClientManager:
+    """
+    Holds Google credentials and API clients for the life of the process.
+
+    Credentials are kept in memory and re-read from token.json only when
+    another process has rewritten it (checked at most every
+    GOOGLE_TOKEN_CACHE_SECONDS). When they are close to expiring, one
+    process refreshes them under a file lock while the others wait and then
+    use the refreshed token. The Drive discovery document is parsed once,
+    and API clients reuse their HTTP connections between calls.
+
+    Drive service objects are not thread-safe, so each thread gets its own,
+    built from the shared discovery document. The gspread client is shared.
+    """
+
+    def __init__(self, token_file_path=None):
+        self.token_file_path = token_file_path or settings.TOKEN_FILE_PATH
+        self.token_store = TokenStore(self.token_file_path)
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._creds = None
+        self._creds_mtime = None
+        self._creds_checked_at = 0
+        self._gspread_client = None
+        self._drive_document = None
+        # Reused for token refreshes so they don't open a new connection each time
+        self._http_session = requests.Session()
+        self.rate_limiter = RateLimiter(settings.GOOGLE_API_REQUESTS_PER_MINUTE)
+
+    def get_credentials(self):
+        """
+        Return valid credentials, refreshing them if they expire within REFRESH_MARGIN.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._creds is None:
+                self._set_creds(*self.token_store.load())
+            elif now - self._creds_checked_at > settings.GOOGLE_TOKEN_CACHE_SECONDS:
+                # Pick up a token another process refreshed
+                self._creds_checked_at = now
+                if self.token_store.mtime() != self._creds_mtime:
+                    self._set_creds(*self.token_store.load())
+
+            if self._needs_refresh(self._creds):
+                with self.token_store.lock():
+                    # Another process may have refreshed while we waited for the lock
+                    creds, mtime = self.token_store.load()
+                    if self._needs_refresh(creds):
+                        if not creds.refresh_token:
+                            raise FileNotFoundError(
+                                f"Token file is missing or invalid at {self.token_file_path}. "
+                                "Please generate a new token.json file."
+                            )
+                        creds.refresh(Request(session=self._http_session))
+                        mtime = self.token_store.save(creds)
+                        print("INFO: OAuth token successfully refreshed and saved.")
+                    self._set_creds(creds, mtime)
+
+            return self._creds
+
+    def get_drive_service(self):
+        """Return this thread's Drive v3 service."""
+        creds = self.get_credentials()
+        service = getattr(self._local, 'drive_service', None)
+        if service is None:
+            with self._lock:
+                if self._drive_document is None:
+                    self._drive_document = json.loads(get_static_doc('drive', 'v3'))
+            http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+            service = build_from_document(self._drive_document, http=http)
+            self._local.drive_service = service
+        return service
+
+    def get_gspread_client(self):
+        """Return the shared gspread client."""
+        creds = self.get_credentials()
+        with self._lock:
+            if self._gspread_client is None:
+                self._gspread_client = gspread.authorize(creds)
+            return self._gspread_client
+
+    def _needs_refresh(self, creds):
+        if not creds.token or creds.expiry is None:
+            return not creds.valid
+        # google-auth stores expiry as a naive UTC datetime
+        return creds.expiry - REFRESH_MARGIN <= datetime.utcnow()
+
+    def _set_creds(self, creds, mtime):
+        if self._creds is not None and creds is not self._creds:
+            # Clients hold the old credentials object; rebuild them with the new one
+            self._gspread_client = None
+            self._local = threading.local()
+        self._creds = creds
+        self._creds_mtime = mtime
+        self._creds_checked_at = time.monotonic()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_client_manager():
+    """Return the process-wide GoogleClientManager."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = GoogleClientManager()
+    return _manager
+
+
+def set_client_manager(manager):
+    """
+    Replace the process-wide client manager, e.g. with a fake for benchmarks.
+
+    Returns:
+        the previous manager (None if one was never created)
+    """
+    global _manager
+    with _manager_lock:
+        previous, _manager = _manager, manager
+    return previous
@@ -0,0 +1,232 @@
+"""
+Retries, a circuit breaker and call metrics for Google API requests
+"""
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.conf import settings
+from googleapiclient.errors import HttpError
+from gspread.exceptions import APIError
+
+from activity.utils.google_clients import get_client_manager
+
+
+# Quota and server errors worth retrying
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Shown to users when Google stays unavailable
+GOOGLE_UNAVAILABLE_MESSAGE = (
+    'Google Sheets is busy or unavailable right now. Please try again in a few minutes, '
+    'or download the sheet as an Excel file instead.'
+)
+
+
+class GoogleUnavailable(Exception):
+    """
+    Google is rate limiting us or failing, either after all retries were
+    used up or because the circuit breaker is open.
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def get_error_status(error):
+    """HTTP status of a Google API error, or None for other exceptions."""
+    if isinstance(error, HttpError):
+        return error.resp.status
+    if isinstance(error, APIError):
+        return error.response.status_code
+    return None
+
+
+def is_retryable(error):
+    """True for quota errors, server errors and dropped connections."""
+    if get_error_status(error) in RETRYABLE_STATUSES:
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError, requests.ConnectionError, requests.Timeout))
+
+
+class CircuitBreaker:
+    """
+    Stops calling Google for a while after repeated failures.
+
+    Counts calls, not attempts: call_google records one failure when a call
+    has used up its retries. After failure_threshold such calls in a row the
+    circuit opens and calls fail immediately with GoogleUnavailable. Once
+    reset_timeout seconds have passed, one trial call (with its retries) is
+    let through: success closes the circuit, failure opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise GoogleUnavailable('Google API circuit is open', retry_after=int(remaining) + 1)
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    raise GoogleUnavailable('Google API circuit is open', retry_after=1)
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_other(self):
+        """The call finished with an error that says nothing about Google's health."""
+        with self._lock:
+            self._trial_running = False
+
+
+class ApiMetrics:
+    """Per-operation call counts, retries, errors and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._operations = defaultdict(lambda: {
+                'calls': 0, 'retries': 0, 'errors': 0, 'rejected': 0,
+                'total_seconds': 0.0, 'max_seconds': 0.0,
+            })
+
+    def record(self, operation, seconds=None, retry=False, error=False, rejected=False):
+        with self._lock:
+            stats = self._operations[operation]
+            if seconds is not None:
+                stats['calls'] += 1
+                stats['total_seconds'] += seconds
+                stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['retries'] += retry
+            stats['errors'] += error
+            stats['rejected'] += rejected
+
+    def snapshot(self):
+        with self._lock:
+            operations = {}
+            for operation, stats in sorted(self._operations.items()):
+                operations[operation] = dict(
+                    stats,
+                    avg_seconds=round(stats['total_seconds'] / stats['calls'], 4) if stats['calls'] else None,
+                    total_seconds=round(stats['total_seconds'], 4),
+                    max_seconds=round(stats['max_seconds'], 4),
+                )
+            return operations
+
+
+metrics = ApiMetrics()
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker for Google calls."""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    settings.GOOGLE_CIRCUIT_FAILURE_THRESHOLD,
+                    settings.GOOGLE_CIRCUIT_RESET_SECONDS,
+                )
+    return _breaker
+
+
+def get_backoff_delay(attempt):
+    """Full jitter: a random delay up to the exponential backoff for this attempt."""
+    ceiling = min(settings.GOOGLE_API_MAX_BACKOFF_SECONDS, settings.GOOGLE_API_BACKOFF_SECONDS * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def call_google(operation, func, *args, **kwargs):
+    """
+    Call func(*args, **kwargs) against a Google API with rate limiting,
+    retries and the circuit breaker.
+
+    Quota (429) and server (5xx) errors and dropped connections are retried
+    up to GOOGLE_API_MAX_RETRIES times with exponential backoff and full
+    jitter. Other errors are raised straight away. A call that fails after
+    all its retries counts as one failure towards opening the circuit.
+
+    Args:
+        operation: name the call is recorded under in the metrics (e.g. 'drive.files.list')
+
+    Raises:
+        GoogleUnavailable: retries ran out or the circuit is open
+    """
+    breaker = get_circuit_breaker()
+    rate_limiter = get_client_manager().rate_limiter
+    max_retries = settings.GOOGLE_API_MAX_RETRIES
+
+    # The breaker is asked once per call, so a call's own retries can't open
+    # the circuit under it
+    try:
+        breaker.before_call()
+    except GoogleUnavailable:
+        metrics.record(operation, rejected=True)
+        raise
+
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            metrics.record(operation, seconds=time.monotonic() - started, error=True)
+            if not is_retryable(error):
+                breaker.record_other()
+                raise
+            if attempt == max_retries:
+                breaker.record_failure()
+                raise GoogleUnavailable(f'{operation} failed after {attempt + 1} attempts: {error}') from error
+            delay = get_backoff_delay(attempt)
+            print(f"WARNING: {operation} failed ({get_error_status(error) or error.__class__.__name__}), retrying in {delay:.1f}s")
+            metrics.record(operation, retry=True)
+            time.sleep(delay)
+        else:
+            metrics.record(operation, seconds=time.monotonic() - started)
+            breaker.record_success()
+            return result
+
+
+def get_metrics():
+    """Call metrics and circuit breaker state, for the metrics endpoint."""
+    breaker = get_circuit_breaker()
+    return {
+        'circuit': {
+            'state': breaker.state,
+            'consecutive_failures': breaker.failures,
+        },
+        'operations': metrics.snapshot(),
+    }
@@ -1,58 +1,32 @@
 """
 Google Sheets utility functions for creating sign-in sheets
 """
-import os
-import gspread
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+import itertools
+from datetime import timedelta
 from googleapiclient.errors import HttpError
+from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
 from django.conf import settings
 from django.utils import timezone
-from datetime import datetime, timedelta
+from activity.models import SignInSheetFile
+from activity.utils.a1 import a1_cell, column_letter, grid_range, parse_a1_range, quote_sheet_title
+from activity.utils.google_clients import SCOPES, get_client_manager
+from activity.utils.google_resilience import call_google
+from activity.utils.signin_data import build_signin_layout
+from activity.utils.signin_xlsx import render_signin_xlsx
 
 
-# Define the scopes - must match the ones used when generating the token
-SCOPES = [
-    'https://www.googleapis.com/auth/spreadsheets',
-    'https://www.googleapis.com/auth/drive'
-]
+SIGNIN_SHEET_BACKENDS = ('google', 'xlsx')
 
 
 def get_refreshed_creds():
     """
-    Loads credentials from token.json. If expired, uses the refresh token
-    to get new ones and saves them back to token.json.
+    Returns valid credentials from the process-wide client manager.
+    token.json is refreshed by one process at a time and replaced atomically.
     """
-    creds = None
-    if os.path.exists(settings.TOKEN_FILE_PATH):
-        # Load the saved token containing the access token and refresh token
-        creds = Credentials.from_authorized_user_file(settings.TOKEN_FILE_PATH, SCOPES)
-
-    # If credentials are valid, return them immediately
-    if creds and creds.valid:
-        return creds
-
-    # If credentials exist but are expired (and have a refresh token)
-    if creds and creds.expired and creds.refresh_token:
-        # Request a new access token
-        creds.refresh(Request())
-
-        # Save the new access token back to the file
-        with open(settings.TOKEN_FILE_PATH, 'w') as token:
-            token.write(creds.to_json())
-
-        print("INFO: OAuth token successfully refreshed and saved.")
-        return creds
-
-    # If creds don't exist or are otherwise invalid, raise an error
-    raise FileNotFoundError(
-        f"Token file is missing or invalid at {settings.TOKEN_FILE_PATH}. "
-        "Please generate a new token.json file."
-    )
+    return get_client_manager().get_credentials()
 
 
-def find_or_create_sheet_in_folder(file_name, folder_id, new_sheet_title):
+def find_or_create_sheet_in_folder(file_name, folder_id, new_sheet_title, file_id=None, exclude_file_ids=(), reuse_worksheet=None):
     """
     Handles the core logic: search, create if missing, or add sheet if existing.
 
@@ -60,21 +34,33 @@ def find_or_create_sheet_in_folder(file_name, folder_id, new_sheet_title):
         file_name: The target Google Sheet name (e.g., "Fri Zumba Gold")
         folder_id: The ID of the Google Drive folder where the file should be
         new_sheet_title: The name of the new worksheet to be added (e.g., "nov 9, 2025 4:25pm")
+        file_id: ID of a known spreadsheet to add the worksheet to, skipping the search
+        exclude_file_ids: IDs of search results to ignore (files belonging to other activities)
+        reuse_worksheet: (spreadsheet ID, worksheet ID) of the worksheet an earlier
+            run of the same job added, to write to instead of adding another
 
     Returns:
         The gspread Worksheet object for the sheet that was added/created
     """
     try:
         # --- 1. Authentication ---
-        creds = get_refreshed_creds()
+        # Credentials and clients are cached for the life of the process
+        client_manager = get_client_manager()
 
         # Drive API service for searching and creating files
-        drive_service = build('drive', 'v3', credentials=creds)
+        drive_service = client_manager.get_drive_service()
 
         # gspread client for working with Google Sheets data
-        gc = gspread.authorize(creds)
+        gc = client_manager.get_gspread_client()
+
+        # Every API call goes through call_google() for rate limiting and retries
 
-        file_id = None
+        if file_id:
+            # --- 2a. Known file: skip the Drive search ---
+            spreadsheet = call_google('sheets.open_by_key', gc.open_by_key, file_id)
+            worksheet = _add_worksheet(spreadsheet, new_sheet_title, reuse_worksheet)
+            print(f"SUCCESS: Added new worksheet to cached file {file_id}: '{worksheet.title}'")
+            return worksheet, spreadsheet.url
 
         # --- 2. Search for the File in the Folder ---
         # Query: Find a file with the name, is a spreadsheet, is in the folder, and is not trashed.
@@ -85,13 +71,15 @@ def find_or_create_sheet_in_folder(file_name, folder_id, new_sheet_title):
             f"trashed = false"
         )
 
-        response = drive_service.files().list(
-            q=query,
-            spaces='drive',
-            fields='files(id, name)'
-        ).execute()
+        def search():
+            response = drive_service.files().list(
+                q=query,
+                spaces='drive',
+                fields='files(id, name)'
+            ).execute()
+            return [f for f in response.get('files', []) if f.get('id') not in exclude_file_ids]
 
-        files = response.get('files', [])
+        files = call_google('drive.files.list', search)
 
         if files:
             # --- 3. File EXISTS: Add a new worksheet ---
@@ -99,15 +87,11 @@ def find_or_create_sheet_in_folder(file_name, folder_id, new_sheet_title):
             print(f"File found: '{file_name}' (ID: {file_id})")
 
             # Open the spreadsheet using gspread
-            spreadsheet = gc.open_by_key(file_id)
+            spreadsheet = call_google('sheets.open_by_key', gc.open_by_key, file_id)
 
             # Add a new worksheet with specified title
-            worksheet = spreadsheet.add_worksheet(
-                title=new_sheet_title,
-                rows=100,
-                cols=20
-            )
-            print(f"SUCCESS: Added new worksheet: '{new_sheet_title}'")
+            worksheet = _add_worksheet(spreadsheet, new_sheet_title, reuse_worksheet)
+            print(f"SUCCESS: Added new worksheet: '{worksheet.title}'")
             return worksheet, spreadsheet.url
 
         else:
@@ -120,19 +104,30 @@ def find_or_create_sheet_in_folder(file_name, folder_id, new_sheet_title):
                 'parents': [folder_id]  # Critical for placing it in the correct folder
             }
 
-            new_file = drive_service.files().create(
-                body=file_metadata,
-                fields='id, parents'
-            ).execute()
+            attempts = []
+
+            def create():
+                if attempts:
+                    # An earlier attempt may have created the file before failing
+                    existing = search()
+                    if existing:
+                        return existing[0]
+                attempts.append(True)
+                return drive_service.files().create(
+                    body=file_metadata,
+                    fields='id, parents'
+                ).execute()
+
+            new_file = call_google('drive.files.create', create)
 
             file_id = new_file.get('id')
 
             # Open the newly created spreadsheet
-            spreadsheet = gc.open_by_key(file_id)
+            spreadsheet = call_google('sheets.open_by_key', gc.open_by_key, file_id)
 
             # The new file has a default "Sheet1". Rename it to the desired new_sheet_title.
-            worksheet = spreadsheet.sheet1
-            worksheet.update_title(new_sheet_title)
+            worksheet = call_google('sheets.fetch_sheet_metadata', lambda: spreadsheet.sheet1)
+            call_google('sheets.update_title', worksheet.update_title, new_sheet_title)
 
             print(f"SUCCESS: New file created and sheet renamed to: '{new_sheet_title}'")
             return worksheet, spreadsheet.url
@@ -147,12 +142,56 @@ def find_or_create_sheet_in_folder(file_name, folder_id, new_sheet_title):
         raise
 
 
-def create_signin_sheet(activity, start_date, num_weeks, enrolled_students, waitlist_students, dropin_students=None, attendance_data=None):
+def _add_worksheet(spreadsheet, title, reuse_worksheet=None):
+    """
+    Add a worksheet titled `title`, or "title (2)", "title (3)", ... when a
+    worksheet with that title already exists. Worksheets added by someone
+    else are never written over.
+
+    reuse_worksheet is the (spreadsheet ID, worksheet ID) an earlier run of
+    the same job added; that worksheet is returned if it still exists.
     """
-    Create a Google Sheets sign-in sheet for an activity
+    if reuse_worksheet and reuse_worksheet[0] == spreadsheet.id:
+        for worksheet in call_google('sheets.fetch_sheet_metadata', spreadsheet.worksheets):
+            if worksheet.id == reuse_worksheet[1]:
+                print(f"Reusing worksheet '{worksheet.title}' from an earlier attempt")
+                return worksheet
+
+    for number in itertools.count(1):
+        candidate = title if number == 1 else f'{title} ({number})'
+        try:
+            return call_google('sheets.add_worksheet', _worksheet_adder(spreadsheet, candidate))
+        except APIError as error:
+            if error.response.status_code != 400 or 'already exists' not in str(error):
+                raise
+        print(f"Worksheet '{candidate}' already exists, trying another title")
+
+
+def _worksheet_adder(spreadsheet, title):
+    """A call_google() function adding the worksheet once across retries."""
+    attempts = []
+
+    def add():
+        if attempts:
+            # An earlier attempt may have added the worksheet before failing
+            try:
+                return spreadsheet.worksheet(title)
+            except WorksheetNotFound:
+                pass
+        attempts.append(True)
+        return spreadsheet.add_worksheet(title=title, rows=100, cols=20)
+
+    return add
+
+
+def create_signin_sheet(activity, start_date, num_weeks, enrolled_students, waitlist_students, dropin_students=None, attendance_data=None, backend='google', reuse_worksheet=None, on_worksheet=None):
+    """
+    Create a sign-in sheet for an activity
 
-    If a spreadsheet already exists for this activity, adds a new worksheet to it.
-    Otherwise, creates a new spreadsheet.
+    With the 'google' backend, adds a new worksheet to the activity's Google
+    spreadsheet if one already exists, otherwise creates a new spreadsheet.
+    The 'xlsx' backend renders the same layout to an Excel workbook locally
+    and needs no network access.
 
     Args:
         activity: Activity model instance
@@ -162,16 +201,25 @@ def create_signin_sheet(activity, start_date, num_weeks, enrolled_students, wait
         waitlist_students: list of Student objects (on waitlist)
         dropin_students: list of Student objects (drop-ins with attendance but not enrolled/waitlisted)
         attendance_data: dict mapping {student_id: {date_str: status}} for pre-filling attendance
+        backend: 'google' or 'xlsx'
+        reuse_worksheet: (spreadsheet ID, worksheet ID) an earlier run of the
+            same job added, written to again instead of adding a worksheet
+        on_worksheet: called with the worksheet before anything is written to it
 
     Returns:
-        str: URL of the created Google Sheet
+        str: URL of the created Google Sheet ('google'), or
+        bytes: contents of the .xlsx file ('xlsx')
     """
-    if attendance_data is None:
-        attendance_data = {}
-    if dropin_students is None:
-        dropin_students = []
-    # Spreadsheet title based on activity - include session name
-    spreadsheet_title = f"{activity.session.name} - {activity.day_of_week} {activity.type}"
+    if backend not in SIGNIN_SHEET_BACKENDS:
+        raise ValueError(f"Unknown sign-in sheet backend: {backend}")
+
+    layout = build_signin_layout(
+        activity, start_date, num_weeks, enrolled_students, waitlist_students,
+        dropin_students=dropin_students, attendance_data=attendance_data,
+    )
+
+    if backend == 'xlsx':
+        return render_signin_xlsx(layout)
 
     # Worksheet title with timestamp: "Nov 9, 2025 4:25pm" (capitalize first letter)
     # Use timezone-aware datetime in Eastern Time
@@ -179,146 +227,289 @@ def create_signin_sheet(activity, start_date, num_weeks, enrolled_students, wait
     timestamp = now.strftime('%b %-d, %Y %-I:%M%p').lower()
     worksheet_title = timestamp[0].upper() + timestamp[1:]
 
-    # Find or create the spreadsheet and get the worksheet
-    worksheet, sheet_url = find_or_create_sheet_in_folder(
-        file_name=spreadsheet_title,
-        folder_id=settings.GOOGLE_DRIVE_FOLDER_ID,
-        new_sheet_title=worksheet_title
-    )
+    # Add the worksheet to the activity's known spreadsheet when there is one
+    file_id = get_cached_spreadsheet_id(activity)
+    worksheet = None
+    if file_id:
+        try:
+            worksheet, sheet_url = find_or_create_sheet_in_folder(
+                file_name=layout.title,
+                folder_id=settings.GOOGLE_DRIVE_FOLDER_ID,
+                new_sheet_title=worksheet_title,
+                file_id=file_id,
+                reuse_worksheet=reuse_worksheet,
+            )
+        except SpreadsheetNotFound:
+            # Deleted since it was last validated
+            SignInSheetFile.objects.filter(activity=activity).delete()
+
+    if worksheet is None:
+        # Find or create the spreadsheet by name, ignoring other activities' files
+        worksheet, sheet_url = find_or_create_sheet_in_folder(
+            file_name=layout.title,
+            folder_id=settings.GOOGLE_DRIVE_FOLDER_ID,
+            new_sheet_title=worksheet_title,
+            exclude_file_ids=set(
+                SignInSheetFile.objects.exclude(activity=activity).values_list('spreadsheet_id', flat=True)
+            ),
+            reuse_worksheet=reuse_worksheet,
+        )
+        SignInSheetFile.objects.update_or_create(
+            activity=activity,
+            defaults={
+                'spreadsheet_id': worksheet.spreadsheet.id,
+                'url': sheet_url,
+                'validated_at': timezone.now(),
+            }
+        )
+
+    if on_worksheet is not None:
+        on_worksheet(worksheet)
 
-    # Generate date headers and track dates for attendance lookup
-    date_headers = []
-    dates = []
-    current_date = start_date
-    for _ in range(num_weeks):
-        date_headers.append(current_date.strftime('%-m/%-d'))
-        dates.append(current_date.strftime('%Y-%m-%d'))
-        current_date += timedelta(days=7)
-
-    # Build the header rows
-    # Row 1: Title (merged across all columns)
-    title_row = [spreadsheet_title] + [''] * len(date_headers)
-
-    # Row 2: Date headers
-    header_row = [''] + date_headers
-
-    # Build student rows with attendance marks
-    student_rows = []
-    for student in enrolled_students:
-        row = [student.display_name]
-        # Check attendance for each date
-        for date_str in dates:
-            cell_value = ''
-            if student.id in attendance_data:
-                if date_str in attendance_data[student.id]:
-                    status = attendance_data[student.id][date_str]
-                    if status == 'expected_absence':
-                        cell_value = 'X'
-                    elif status == 'present':
-                        cell_value = '✓'
-                    # Note: 'unexpected_absence' and 'scheduled' are left blank intentionally
-            row.append(cell_value)
-        student_rows.append(row)
-
-    # Add waitlist section - always show header even if no waitlist students
-    waitlist_rows = []
-    waitlist_rows.append([''] * (len(date_headers) + 1))  # Blank row
-    waitlist_rows.append(['Wait List/Drop Ins:'] + [''] * len(date_headers))
-
-    # Combine waitlist and drop-in students, sort alphabetically by last name, first name
-    waitlist_and_dropins = waitlist_students + dropin_students
-    # Already sorted from database queries, but ensure consistent order
-    waitlist_and_dropins.sort(key=lambda s: (s.last_name or '', s.first_name or ''))
-
-    # Add waitlist and drop-in students with attendance marks
-    for student in waitlist_and_dropins:
-        row = [student.display_name]
-        # Check attendance for each date
-        for date_str in dates:
-            cell_value = ''
-            if student.id in attendance_data and date_str in attendance_data[student.id]:
-                status = attendance_data[student.id][date_str]
-                if status == 'expected_absence':
-                    cell_value = 'X'
-                elif status == 'present':
-                    cell_value = '✓'
-                # Note: 'unexpected_absence' and 'scheduled' are left blank intentionally
-            row.append(cell_value)
-        waitlist_rows.append(row)
-
-    # Add a few blank rows at the end for walk-ins
-    blank_rows = [[''] * (len(date_headers) + 1) for _ in range(3)]
-
-    # Combine all rows
-    all_rows = [title_row, header_row] + student_rows + waitlist_rows + blank_rows
-
-    # Write all data to sheet
-    worksheet.update('A1', all_rows)
-
-    # Apply formatting
-    _format_signin_sheet(worksheet, len(date_headers), len(enrolled_students), len(waitlist_and_dropins))
+    # Write all data and formatting to the sheet in a single batchUpdate,
+    # clearing what an earlier run of the job may have left in a reused worksheet
+    builder = SheetRequestBuilder(worksheet)
+    builder.clear()
+    builder.ensure_size(len(layout.rows), layout.num_columns)
+    builder.set_values(layout.rows)
+    _format_signin_sheet(builder, layout.num_date_columns, layout.num_enrolled, layout.num_waitlist_and_dropins)
+    builder.execute()
 
     return sheet_url
 
 
-def _format_signin_sheet(worksheet, num_date_columns, num_enrolled, num_waitlist_and_dropins):
+def get_worksheet_values(spreadsheet_id, worksheet_title=None):
+    """
+    Fetch every cell value of a worksheet with a single values request.
+
+    Args:
+        spreadsheet_id: Google spreadsheet ID
+        worksheet_title: worksheet to read; defaults to the newest (last) worksheet
+
+    Returns:
+        (worksheet_title, values) where values is a 2D list of strings.
+        Trailing empty cells and rows are omitted, as the API returns them.
+    """
+    gc = get_client_manager().get_gspread_client()
+    spreadsheet = call_google('sheets.open_by_key', gc.open_by_key, spreadsheet_id)
+
+    if worksheet_title is None:
+        sheets = call_google('sheets.fetch_sheet_metadata', spreadsheet.fetch_sheet_metadata)['sheets']
+        worksheet_title = sheets[-1]['properties']['title']
+
+    response = call_google('sheets.values_get', spreadsheet.values_get, quote_sheet_title(worksheet_title))
+    return worksheet_title, response.get('values', [])
+
+
+def get_cached_spreadsheet_id(activity):
+    """
+    Return the ID of the activity's spreadsheet, or None if it isn't known.
+
+    The cached ID is trusted for SIGNIN_SHEET_FILE_VALIDATE_SECONDS after it
+    was last checked. After that, one Drive files().get confirms the file
+    still exists and isn't in the trash; if it is gone the cache entry is
+    dropped so the caller falls back to searching the folder.
+    """
+    cached = SignInSheetFile.objects.filter(activity=activity).first()
+    if cached is None:
+        return None
+
+    now = timezone.now()
+    if now - cached.validated_at < timedelta(seconds=settings.SIGNIN_SHEET_FILE_VALIDATE_SECONDS):
+        return cached.spreadsheet_id
+
+    try:
+        drive_file = call_google('drive.files.get', get_client_manager().get_drive_service().files().get(
+            fileId=cached.spreadsheet_id,
+            fields='id, trashed'
+        ).execute)
+    except HttpError as error:
+        if error.resp.status != 404:
+            raise
+        drive_file = None
+
+    if drive_file is None or drive_file.get('trashed'):
+        print(f"Cached file {cached.spreadsheet_id} for {activity} is gone, searching the folder instead")
+        cached.delete()
+        return None
+
+    cached.validated_at = now
+    cached.save(update_fields=['validated_at'])
+    return cached.spreadsheet_id
+
+
+class SheetRequestBuilder:
     """
-    Apply formatting to the sign-in sheet
+    Collects values, formatting, merge and dimension requests for a worksheet
+    and sends them with as few spreadsheets.batchUpdate calls as possible.
+
+    Ranges are given in A1 notation (e.g. 'B2:BA9', or 'A:C' for whole
+    columns). Large value writes are split into updateCells requests of at
+    most MAX_CELLS_PER_REQUEST cells, and requests are grouped into batches
+    of at most MAX_CELLS_PER_BATCH cells, to stay well under the Sheets API
+    request size limit.
+    """
+    MAX_CELLS_PER_REQUEST = 5000
+    MAX_CELLS_PER_BATCH = 20000
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.sheet_id = worksheet.id
+        self.requests = []
+        # Cells written by each request, for splitting into batches
+        self._request_cells = []
+
+    def grid_range(self, range_name):
+        return grid_range(self.sheet_id, range_name)
+
+    def _add(self, request, cells=0):
+        self.requests.append(request)
+        self._request_cells.append(cells)
+
+    def clear(self):
+        """Remove all values, formatting and merges from the worksheet."""
+        self._add({'unmergeCells': {'range': {'sheetId': self.sheet_id}}})
+        self._add({'updateCells': {'range': {'sheetId': self.sheet_id}, 'fields': '*'}})
+
+    def ensure_size(self, num_rows, num_cols):
+        """Grow the worksheet grid if it is smaller than num_rows x num_cols."""
+        row_count = max(self.worksheet.row_count, num_rows)
+        col_count = max(self.worksheet.col_count, num_cols)
+        if row_count == self.worksheet.row_count and col_count == self.worksheet.col_count:
+            return
+        self._add({
+            'updateSheetProperties': {
+                'properties': {
+                    'sheetId': self.sheet_id,
+                    'gridProperties': {'rowCount': row_count, 'columnCount': col_count},
+                },
+                'fields': 'gridProperties(rowCount,columnCount)',
+            }
+        })
+
+    def set_values(self, rows, start='A1'):
+        """
+        Write a 2D list of values as plain strings, like a RAW values update,
+        with the top left value at the start cell.
+        """
+        start_row, _, start_col, _ = parse_a1_range(start)
+        width = max((len(row) for row in rows), default=0)
+        rows_per_request = max(1, self.MAX_CELLS_PER_REQUEST // max(width, 1))
+
+        for offset in range(0, len(rows), rows_per_request):
+            chunk = rows[offset:offset + rows_per_request]
+            self._add({
+                'updateCells': {
+                    'start': {'sheetId': self.sheet_id, 'rowIndex': start_row + offset, 'columnIndex': start_col},
+                    'rows': [
+                        {'values': [{'userEnteredValue': {'stringValue': str(value)}} for value in row]}
+                        for row in chunk
+                    ],
+                    'fields': 'userEnteredValue',
+                }
+            }, cells=sum(len(row) for row in chunk))
+
+    def format(self, range_name, cell_format):
+        """Apply a cell format to an A1 range, like Worksheet.format()."""
+        self._add({
+            'repeatCell': {
+                'range': self.grid_range(range_name),
+                'cell': {'userEnteredFormat': cell_format},
+                'fields': 'userEnteredFormat({})'.format(','.join(cell_format)),
+            }
+        })
+
+    def merge(self, range_name):
+        self._add({
+            'mergeCells': {
+                'range': self.grid_range(range_name),
+                'mergeType': 'MERGE_ALL',
+            }
+        })
+
+    def auto_resize_columns(self, range_name):
+        """Fit the widths of the columns in an A1 range (e.g. 'A:BA') to their contents."""
+        _, _, start_col, end_col = parse_a1_range(range_name)
+        self._add({
+            'autoResizeDimensions': {
+                'dimensions': {
+                    'sheetId': self.sheet_id,
+                    'dimension': 'COLUMNS',
+                    'startIndex': start_col,
+                    'endIndex': end_col,
+                }
+            }
+        })
+
+    def batches(self):
+        """Split the collected requests, in order, into batches under MAX_CELLS_PER_BATCH cells."""
+        batches = []
+        batch = []
+        batch_cells = 0
+        for request, cells in zip(self.requests, self._request_cells):
+            if batch and batch_cells + cells > self.MAX_CELLS_PER_BATCH:
+                batches.append(batch)
+                batch = []
+                batch_cells = 0
+            batch.append(request)
+            batch_cells += cells
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def execute(self):
+        """
+        Send the collected requests, in as few batchUpdates as the size limits allow.
+
+        Returns:
+            list of batchUpdate responses (empty if there was nothing to send)
+        """
+        responses = [
+            call_google('sheets.batch_update', self.worksheet.spreadsheet.batch_update, {'requests': batch})
+            for batch in self.batches()
+        ]
+        self.requests = []
+        self._request_cells = []
+        return responses
+
+
+def _format_signin_sheet(builder, num_date_columns, num_enrolled, num_waitlist_and_dropins):
+    """
+    Add the sign-in sheet formatting to a request builder
 
     Args:
-        worksheet: gspread worksheet object
+        builder: SheetRequestBuilder for the worksheet
         num_date_columns: number of date columns
         num_enrolled: number of enrolled students
         num_waitlist_and_dropins: number of waitlist and drop-in students combined
     """
+    last_col = column_letter(num_date_columns)
+    # Calculate end row: header row + enrolled students + blank row + waitlist header + waitlist/dropin students + blank rows
+    end_row = 2 + num_enrolled + 2 + num_waitlist_and_dropins + 3
+
     # Format title row (row 1)
-    worksheet.format('A1', {
+    builder.format('A1', {
         'textFormat': {'bold': True, 'fontSize': 18},
         'horizontalAlignment': 'CENTER'
     })
 
     # Merge title cells
-    worksheet.merge_cells(1, 1, 1, num_date_columns + 1)
+    builder.merge(f'A1:{last_col}1')
 
     # Format header row (row 2) - date columns
-    header_range = f'B2:{chr(66 + num_date_columns)}2'
-    worksheet.format(header_range, {
+    builder.format(f'B2:{last_col}2', {
         'textFormat': {'bold': True},
         'horizontalAlignment': 'CENTER'
     })
 
     # Center all date column cells (from row 3 to end of data)
-    # Calculate end row: header row + enrolled students + blank row + waitlist header + waitlist/dropin students + blank rows
-    end_row = 2 + num_enrolled + 2 + num_waitlist_and_dropins + 3
-    data_range = f'B3:{chr(65 + num_date_columns)}{end_row}'
-    worksheet.format(data_range, {
+    builder.format(f'B3:{last_col}{end_row}', {
         'horizontalAlignment': 'CENTER',
         'verticalAlignment': 'MIDDLE'
     })
 
-    # Set column widths to "Fit to Data" using auto-resize
-    try:
-        requests = []
-        # Auto-resize all columns (from column A to the last date column)
-        requests.append({
-            'autoResizeDimensions': {
-                'dimensions': {
-                    'sheetId': worksheet.id,
-                    'dimension': 'COLUMNS',
-                    'startIndex': 0,
-                    'endIndex': num_date_columns + 1
-                }
-            }
-        })
-        worksheet.spreadsheet.batch_update({'requests': requests})
-    except Exception as e:
-        print(f"Warning: Could not auto-resize columns: {e}")
-
-    # Add borders to the entire grid
-    # Calculate end row: header row + enrolled students + blank row + waitlist header + waitlist/dropin students + blank rows
-    end_row = 2 + num_enrolled + 2 + num_waitlist_and_dropins + 3
-    grid_range = f'A2:{chr(65 + num_date_columns)}{end_row}'
-    worksheet.format(grid_range, {
+    # Add borders to the entire grid (from row 2 to end of data)
+    builder.format(f'A2:{last_col}{end_row}', {
         'borders': {
             'top': {'style': 'SOLID'},
             'bottom': {'style': 'SOLID'},
@@ -327,8 +518,11 @@ def _format_signin_sheet(worksheet, num_date_columns, num_enrolled, num_waitlist
         }
     })
 
-    # Format waitlist header (always present now)
-    waitlist_row = 3 + num_enrolled + 1  # After blank row
-    worksheet.format(f'A{waitlist_row}', {
+    # Format waitlist header (always present now), after the blank row
+    waitlist_row = 2 + num_enrolled + 1
+    builder.format(a1_cell(waitlist_row, 0), {
         'textFormat': {'bold': True}
     })
+
+    # Set column widths to "Fit to Data" (from column A to the last date column)
+    builder.auto_resize_columns(f'A:{last_col}')
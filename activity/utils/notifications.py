@@ -0,0 +1,108 @@
+"""
+Notification utility functions for queueing student notices
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from activity.models import Activity, Enrollment
+from activity.utils.email_templates import get_email_template, get_time_range
+from activity.utils.outbox import enqueue_message
+
+
+def queue_cancellation_notices(cancellations):
+    """
+    Queue notices telling enrolled and waitlisted students about cancellations.
+
+    Cancellations are grouped by activity, so each class gets one message
+    covering all of its cancelled dates. Each message is rendered once and
+    queued in BCC batches of NOTIFICATION_BCC_BATCH_SIZE for the outbox worker.
+
+    Call this inside the transaction that created the cancellations.
+
+    Args:
+        cancellations: iterable of ClassCancellation objects
+
+    Returns:
+        int: number of messages queued
+    """
+    cancellations_by_activity = defaultdict(list)
+    for cancellation in cancellations:
+        cancellations_by_activity[cancellation.activity_id].append(cancellation)
+    if not cancellations_by_activity:
+        return 0
+
+    activities = Activity.objects.select_related('location', 'session').prefetch_related(
+        'cancellations'
+    ).in_bulk(list(cancellations_by_activity))
+
+    # Resolve every affected student in one query
+    recipients = defaultdict(list)
+    enrollments = Enrollment.objects.filter(
+        activity_id__in=list(cancellations_by_activity),
+        status__in=['active', 'waiting'],
+        student__email__isnull=False,
+    ).exclude(student__email='').order_by(
+        'student__last_name', 'student__first_name'
+    ).values_list('activity_id', 'student__email')
+    for activity_id, email in enrollments:
+        if email not in recipients[activity_id]:
+            recipients[activity_id].append(email)
+
+    template = get_email_template('cancellation_notice')
+    batch_size = settings.NOTIFICATION_BCC_BATCH_SIZE
+    queued = 0
+
+    for activity_id, activity_cancellations in cancellations_by_activity.items():
+        emails = recipients.get(activity_id)
+        if not emails:
+            continue
+
+        activity = activities[activity_id]
+        context = _build_cancellation_context(activity, activity_cancellations)
+        subject = (
+            f"{activity.get_type_display()} {activity.day_of_week} cancelled "
+            f"{', '.join(context['cancelled_dates'])}"
+        )
+        body, html_body = template.render(context)
+
+        for start in range(0, len(emails), batch_size):
+            enqueue_message(
+                kind='cancellation',
+                subject=subject,
+                body=body,
+                bcc=emails[start:start + batch_size],
+                html_body=html_body,
+            )
+            queued += 1
+
+    return queued
+
+
+def _build_cancellation_context(activity, cancellations):
+    """Builds the template context for a cancellation notice."""
+    cancelled = sorted(c.date for c in cancellations)
+    all_cancelled = {c.date for c in activity.cancellations.all()}
+    today = timezone.localdate()
+    remaining_dates = [
+        d for d in activity.get_possible_dates()
+        if d >= today and d not in all_cancelled
+    ]
+    reasons = []
+    for cancellation in cancellations:
+        if cancellation.reason and cancellation.reason not in reasons:
+            reasons.append(cancellation.reason)
+
+    return {
+        'class': {
+            'type': activity.get_type_display(),
+            'day_of_week': activity.day_of_week,
+            'day_abbr': activity.day_of_week[:4] if activity.day_of_week == "Thursday" else activity.day_of_week[:3],
+            'time_range': get_time_range(activity.time),
+        },
+        'location_name': activity.location.name if activity.location else None,
+        'cancelled_dates': [d.strftime('%-m/%-d') for d in cancelled],
+        'remaining_dates': [d.strftime('%-m/%-d') for d in remaining_dates],
+        'reason': '; '.join(reasons),
+    }
@@ -0,0 +1,164 @@
+"""
+Outbox utility functions for queueing and delivering outgoing email
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from activity.models import OutboundMessage
+
+
+def enqueue_message(kind, subject, body, bcc=None, to_email=None, html_body=''):
+    """
+    Queue an email for delivery by the outbox worker.
+
+    Call this inside the same transaction.atomic() block as the change that
+    triggered the message, so the message exists if and only if the change
+    was committed.
+
+    Args:
+        kind: one of OutboundMessage.KIND_CHOICES (e.g. 'cancellation')
+        subject: email subject line
+        body: plain text body
+        bcc: list of recipient email addresses to BCC
+        to_email: "To" address (defaults to DEFAULT_EMAIL_TO_ADDRESS)
+        html_body: optional HTML alternative body
+
+    Returns:
+        OutboundMessage: the queued message
+    """
+    return OutboundMessage.objects.create(
+        kind=kind,
+        to_email=to_email or settings.DEFAULT_EMAIL_TO_ADDRESS,
+        bcc=list(bcc or []),
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to batch_size messages that are due for delivery.
+
+    Rows are selected with SELECT ... FOR UPDATE SKIP LOCKED and marked as
+    'sending' before the transaction commits, so concurrent workers never
+    claim the same message. Messages left in 'sending' longer than
+    OUTBOX_CLAIM_TIMEOUT_SECONDS (e.g. the worker crashed) become claimable again.
+
+    Claiming counts as an attempt, so a message that keeps crashing the
+    worker is moved aside as 'dead' after OUTBOX_MAX_ATTEMPTS claims.
+
+    Returns:
+        list of OutboundMessage objects now owned by the caller
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT_SECONDS)
+
+    with transaction.atomic():
+        OutboundMessage.objects.filter(
+            status='sending', claimed_at__lt=stale_before, attempts__gte=settings.OUTBOX_MAX_ATTEMPTS,
+        ).update(status='dead', claimed_at=None, last_error='The worker stopped while sending this message')
+
+        messages = list(
+            OutboundMessage.objects.select_for_update(skip_locked=True).filter(
+                Q(status='pending', next_attempt_at__lte=now) |
+                Q(status='sending', claimed_at__lt=stale_before)
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if messages:
+            OutboundMessage.objects.filter(
+                pk__in=[m.pk for m in messages]
+            ).update(status='sending', claimed_at=now, attempts=F('attempts') + 1)
+            for message in messages:
+                message.status = 'sending'
+                message.claimed_at = now
+                message.attempts += 1
+
+    return messages
+
+
+def get_backoff_delay(attempts):
+    """Exponential backoff delay (in seconds) after the given number of failed attempts."""
+    delay = settings.OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return min(delay, settings.OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+def deliver_message(message, connection=None):
+    """
+    Send a claimed message and record the outcome.
+
+    On failure the message is rescheduled with exponential backoff, or moved
+    aside as 'dead' once OUTBOX_MAX_ATTEMPTS is reached. claim_batch() has
+    already counted this attempt.
+
+    Returns:
+        bool: True if the message was sent
+    """
+    email = EmailMultiAlternatives(
+        subject=message.subject,
+        body=message.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[message.to_email] if message.to_email else [],
+        bcc=message.bcc,
+        connection=connection,
+    )
+    if message.html_body:
+        email.attach_alternative(message.html_body, 'text/html')
+
+    try:
+        email.send(fail_silently=False)
+    except Exception as e:
+        message.last_error = str(e)
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.status = 'dead'
+        else:
+            message.status = 'pending'
+            message.next_attempt_at = timezone.now() + timedelta(seconds=get_backoff_delay(message.attempts))
+        message.claimed_at = None
+        message.save(update_fields=['status', 'next_attempt_at', 'claimed_at', 'last_error'])
+        return False
+
+    message.status = 'sent'
+    message.sent_at = timezone.now()
+    message.claimed_at = None
+    message.last_error = ''
+    message.save(update_fields=['status', 'sent_at', 'claimed_at', 'last_error'])
+    return True
+
+
+def process_batch(batch_size=50):
+    """
+    Claim and deliver one batch of messages over a single SMTP connection.
+
+    Returns:
+        tuple: (sent_count, failed_count)
+    """
+    messages = claim_batch(batch_size)
+    if not messages:
+        return 0, 0
+
+    sent = 0
+    failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception:
+        # Let each message record the failure and back off individually
+        connection = None
+
+    try:
+        for message in messages:
+            if deliver_message(message, connection=connection):
+                sent += 1
+            else:
+                failed += 1
+    finally:
+        if connection is not None:
+            connection.close()
+
+    return sent, failed
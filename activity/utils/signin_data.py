@@ -0,0 +1,216 @@
+"""
+Sign-in sheet data assembly shared by the sheet generators
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from activity.models import DAY_NUMBERS, Enrollment, Meeting, Student
+
+
+def align_start_date(activity, start_date):
+    """Move start_date forward to the activity's day of week."""
+    activity_day_num = DAY_NUMBERS.get(activity.day_of_week)
+    if activity_day_num is None:
+        return start_date
+    days_diff = (activity_day_num - start_date.weekday()) % 7
+    return start_date + timedelta(days=days_diff)
+
+
+def build_signin_sheet_data(activities, start_date, num_weeks):
+    """
+    Gather everything needed to draw sign-in sheets for several activities.
+
+    All activities are handled with a fixed number of queries: one for
+    enrollments, two for meetings and their attendance records, and one
+    for drop-in students.
+
+    Args:
+        activities: Activity objects (with session loaded)
+        start_date: datetime.date, aligned to each activity's day of week
+        num_weeks: number of weekly date columns
+
+    Returns:
+        list of dicts, one per activity in the same order, holding the
+        keyword arguments for create_signin_sheet()
+    """
+    activities = list(activities)
+    if not activities:
+        return []
+    activity_ids = [activity.id for activity in activities]
+
+    # Dates for each activity
+    activity_dates = {}
+    for activity in activities:
+        first_date = align_start_date(activity, start_date)
+        activity_dates[activity.id] = [first_date + timedelta(days=7 * week) for week in range(num_weeks)]
+
+    # Enrolled and waitlist students for every activity in one query
+    enrolled = defaultdict(list)
+    waitlist = defaultdict(list)
+    enrollments = Enrollment.objects.filter(
+        activity_id__in=activity_ids,
+        status__in=['active', 'waiting'],
+    ).select_related('student').order_by('student__last_name', 'student__first_name')
+    for enrollment in enrollments:
+        if enrollment.status == 'active':
+            enrolled[enrollment.activity_id].append(enrollment.student)
+        else:
+            waitlist[enrollment.activity_id].append(enrollment.student)
+
+    # Attendance for every activity's dates
+    all_dates = [d for dates in activity_dates.values() for d in dates]
+    meetings = Meeting.objects.filter(
+        activity_id__in=activity_ids,
+        date__gte=min(all_dates),
+        date__lte=max(all_dates),
+    ).prefetch_related('attendance_records')
+
+    meetings_by_activity = defaultdict(list)
+    for meeting in meetings:
+        if meeting.date in activity_dates[meeting.activity_id]:
+            meetings_by_activity[meeting.activity_id].append(meeting)
+
+    results = []
+    dropin_ids_by_activity = {}
+    for activity in activities:
+        # Build attendance data for each date
+        # Create a dict: {student_id: {date_str: status}}
+        attendance_data = {}
+        student_ids = set()
+        for student in enrolled[activity.id] + waitlist[activity.id]:
+            attendance_data[student.id] = {}
+            student_ids.add(student.id)
+
+        # Collect all drop-in students (students with attendance but not enrolled/waitlisted)
+        dropin_student_ids = set()
+        for meeting in meetings_by_activity[activity.id]:
+            date_str = meeting.date.strftime('%Y-%m-%d')
+            for record in meeting.attendance_records.all():
+                attendance_data.setdefault(record.student_id, {})[date_str] = record.status
+                if record.student_id not in student_ids:
+                    dropin_student_ids.add(record.student_id)
+        dropin_ids_by_activity[activity.id] = dropin_student_ids
+
+        results.append({
+            'activity': activity,
+            'start_date': activity_dates[activity.id][0],
+            'num_weeks': num_weeks,
+            'enrolled_students': enrolled[activity.id],
+            'waitlist_students': waitlist[activity.id],
+            'dropin_students': [],
+            'attendance_data': attendance_data,
+        })
+
+    # Drop-in student objects for every activity in one query, sorted by last name, first name
+    all_dropin_ids = set().union(*dropin_ids_by_activity.values())
+    if all_dropin_ids:
+        dropins = list(Student.objects.filter(id__in=all_dropin_ids).order_by('last_name', 'first_name'))
+        for data in results:
+            activity_dropin_ids = dropin_ids_by_activity[data['activity'].id]
+            data['dropin_students'] = [s for s in dropins if s.id in activity_dropin_ids]
+
+    return results
+
+
+class SignInSheetLayout:
+    """
+    The cell grid of a sign-in sheet, independent of where it is rendered.
+
+    rows holds every row as a list of strings: the title row, the date
+    header row, enrolled students, a blank row, the wait list header,
+    wait list and drop-in students, then blank rows for walk-ins.
+    Row indexes below are 0-based.
+    """
+
+    def __init__(self, title, date_headers, rows, num_enrolled, num_waitlist_and_dropins):
+        self.title = title
+        self.date_headers = date_headers
+        self.rows = rows
+        self.num_enrolled = num_enrolled
+        self.num_waitlist_and_dropins = num_waitlist_and_dropins
+
+    @property
+    def num_date_columns(self):
+        return len(self.date_headers)
+
+    @property
+    def num_columns(self):
+        return len(self.date_headers) + 1
+
+    @property
+    def waitlist_header_row(self):
+        return 2 + self.num_enrolled + 1
+
+
+ATTENDANCE_MARKS = {
+    'expected_absence': 'X',
+    'present': '✓',
+    # Note: 'unexpected_absence' and 'scheduled' are left blank intentionally
+}
+
+
+def get_signin_sheet_title(activity):
+    """Spreadsheet title based on activity - include session name"""
+    return f"{activity.session.name} - {activity.day_of_week} {activity.type}"
+
+
+def build_signin_layout(activity, start_date, num_weeks, enrolled_students, waitlist_students, dropin_students=None, attendance_data=None):
+    """
+    Lay out the rows of a sign-in sheet.
+
+    Takes the same arguments as create_signin_sheet().
+
+    Returns:
+        SignInSheetLayout
+    """
+    if attendance_data is None:
+        attendance_data = {}
+    if dropin_students is None:
+        dropin_students = []
+    title = get_signin_sheet_title(activity)
+
+    # Generate date headers and track dates for attendance lookup
+    date_headers = []
+    dates = []
+    current_date = start_date
+    for _ in range(num_weeks):
+        date_headers.append(current_date.strftime('%-m/%-d'))
+        dates.append(current_date.strftime('%Y-%m-%d'))
+        current_date += timedelta(days=7)
+
+    def student_row(student):
+        student_attendance = attendance_data.get(student.id, {})
+        return [student.display_name] + [
+            ATTENDANCE_MARKS.get(student_attendance.get(date_str), '') for date_str in dates
+        ]
+
+    # Row 1: Title (merged across all columns)
+    title_row = [title] + [''] * len(date_headers)
+
+    # Row 2: Date headers
+    header_row = [''] + date_headers
+
+    # Student rows with attendance marks
+    student_rows = [student_row(student) for student in enrolled_students]
+
+    # Waitlist section - always show header even if no waitlist students
+    waitlist_rows = [
+        [''] * (len(date_headers) + 1),  # Blank row
+        ['Wait List/Drop Ins:'] + [''] * len(date_headers),
+    ]
+
+    # Combine waitlist and drop-in students, sort alphabetically by last name, first name
+    waitlist_and_dropins = list(waitlist_students) + list(dropin_students)
+    waitlist_and_dropins.sort(key=lambda s: (s.last_name or '', s.first_name or ''))
+    waitlist_rows.extend(student_row(student) for student in waitlist_and_dropins)
+
+    # Add a few blank rows at the end for walk-ins
+    blank_rows = [[''] * (len(date_headers) + 1) for _ in range(3)]
+
+    return SignInSheetLayout(
+        title=title,
+        date_headers=date_headers,
+        rows=[title_row, header_row] + student_rows + waitlist_rows + blank_rows,
+        num_enrolled=len(student_rows),
+        num_waitlist_and_dropins=len(waitlist_and_dropins),
+    )
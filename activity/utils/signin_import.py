@@ -0,0 +1,230 @@
+"""
+Import attendance marks from a filled-in sign-in sheet
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+
+from activity.models import AttendanceRecord, ChangeVersion, Enrollment, Meeting, Student
+from activity.utils.signin_data import ATTENDANCE_MARKS
+
+
+# Cell values understood as attendance, including the marks people type by hand
+IMPORT_MARKS = {mark.casefold(): status for status, mark in ATTENDANCE_MARKS.items()}
+IMPORT_MARKS.update({
+    '✔': 'present',
+    '√': 'present',
+    'x': 'expected_absence',
+})
+
+# Rows in the sheet that aren't students
+SECTION_LABELS = {'wait list/drop ins:'}
+
+
+def normalize_name(name):
+    return re.sub(r'\s+', ' ', name or '').strip().casefold()
+
+
+class StudentNameIndex:
+    """
+    Maps names as written on a sheet ("Last, First" or "First Last") to students.
+
+    Built once per import. The activity's roster and past attendees are
+    matched first, so a name shared with someone outside the class doesn't
+    make it ambiguous; other students only match when the name is unique.
+    """
+
+    def __init__(self, activity):
+        roster_ids = set(
+            Enrollment.objects.filter(activity=activity).values_list('student_id', flat=True)
+        ) | set(
+            AttendanceRecord.objects.filter(meeting__activity=activity).values_list('student_id', flat=True)
+        )
+
+        self.roster = defaultdict(set)
+        self.everyone = defaultdict(set)
+        self.names = {}
+        for student_id, first_name, last_name in Student.objects.values_list('id', 'first_name', 'last_name'):
+            self.names[student_id] = f"{last_name}, {first_name}".strip()
+            for key in (f"{last_name}, {first_name}", f"{first_name} {last_name}"):
+                key = normalize_name(key)
+                self.everyone[key].add(student_id)
+                if student_id in roster_ids:
+                    self.roster[key].add(student_id)
+
+    def lookup(self, name):
+        """Return the matching student ID, or None if there is no single match."""
+        key = normalize_name(name)
+        for candidates in (self.roster.get(key), self.everyone.get(key)):
+            if candidates:
+                return next(iter(candidates)) if len(candidates) == 1 else None
+        return None
+
+
+def parse_signin_values(activity, values):
+    """
+    Read attendance marks from the cell values of a sign-in sheet.
+
+    Expects the layout written by create_signin_sheet(): a title row, a row
+    of m/d date headers, then one row per student. Date headers are matched
+    against the activity's dates in its session.
+
+    Args:
+        activity: Activity the sheet belongs to (with session loaded)
+        values: 2D list of cell strings, as from Worksheet.get_all_values()
+
+    Returns:
+        dict with:
+            marks: {(date, student_id): status}
+            unmatched_names: names that didn't match exactly one student
+            unmatched_columns: date headers that aren't dates of the activity
+            cancelled_dates: dates with marks that are cancelled (ignored)
+            names: {student_id: display name} for students with marks
+    """
+    result = {
+        'marks': {},
+        'unmatched_names': [],
+        'unmatched_columns': [],
+        'cancelled_dates': [],
+        'names': {},
+    }
+    if len(values) < 2:
+        return result
+
+    dates_by_header = {d.strftime('%-m/%-d'): d for d in activity.get_possible_dates()}
+    cancelled = set(activity.get_cancelled_dates())
+    column_dates = {}
+    for col, header in enumerate(values[1][1:], start=1):
+        header = header.strip()
+        if not header:
+            continue
+        if header in dates_by_header:
+            column_dates[col] = dates_by_header[header]
+        else:
+            result['unmatched_columns'].append(header)
+
+    index = StudentNameIndex(activity)
+    for row in values[2:]:
+        if not row or not row[0].strip() or normalize_name(row[0]) in SECTION_LABELS:
+            continue
+        row_marks = {}
+        for col, date in column_dates.items():
+            cell = row[col].strip().casefold() if col < len(row) else ''
+            if cell in IMPORT_MARKS:
+                row_marks[date] = IMPORT_MARKS[cell]
+        if not row_marks:
+            continue
+
+        student_id = index.lookup(row[0])
+        if student_id is None:
+            result['unmatched_names'].append(row[0].strip())
+            continue
+        result['names'][student_id] = index.names[student_id]
+        for date, status in row_marks.items():
+            if date in cancelled:
+                if date not in result['cancelled_dates']:
+                    result['cancelled_dates'].append(date)
+                continue
+            result['marks'][(date, student_id)] = status
+
+    result['cancelled_dates'].sort()
+    return result
+
+
+def import_signin_values(activity, values, apply=False):
+    """
+    Diff the marks on a sign-in sheet against saved attendance and optionally apply them.
+
+    Only cells with a mark are imported; blank cells never clear saved
+    attendance. Missing meetings are created in bulk (with 'scheduled'
+    records for enrolled students, as when a meeting is opened in the app),
+    then changed and new records are written with one bulk upsert.
+
+    Args:
+        activity: Activity the sheet belongs to (with session loaded)
+        values: 2D list of cell strings
+        apply: save the changes; otherwise only report them
+
+    Returns:
+        dict with the list of changes and counts
+    """
+    parsed = parse_signin_values(activity, values)
+    marks = parsed['marks']
+    dates = sorted({date for date, _ in marks})
+
+    meetings = {
+        m.date: m for m in Meeting.objects.filter(activity=activity, date__in=dates)
+    }
+    existing = {
+        (record.meeting.date, record.student_id): record.status
+        for record in AttendanceRecord.objects.filter(
+            meeting__in=meetings.values()
+        ).select_related('meeting')
+    }
+
+    changes = []
+    for (date, student_id), status in sorted(marks.items(), key=lambda item: (item[0][0], parsed['names'][item[0][1]])):
+        old_status = existing.get((date, student_id))
+        if old_status == status:
+            continue
+        changes.append({
+            'date': date,
+            'student_id': student_id,
+            'student_name': parsed['names'][student_id],
+            'old_status': old_status,
+            'new_status': status,
+        })
+
+    new_meeting_dates = [date for date in dates if date not in meetings]
+    result = {
+        'applied': False,
+        'changes': changes,
+        'meetings_to_create': new_meeting_dates,
+        'unmatched_names': parsed['unmatched_names'],
+        'unmatched_columns': parsed['unmatched_columns'],
+        'cancelled_dates': parsed['cancelled_dates'],
+    }
+    if not apply or not changes:
+        return result
+
+    with transaction.atomic():
+        if new_meeting_dates:
+            Meeting.objects.bulk_create(
+                [Meeting(activity=activity, date=date) for date in new_meeting_dates],
+                ignore_conflicts=True,
+            )
+            created = list(Meeting.objects.filter(activity=activity, date__in=new_meeting_dates))
+            meetings.update({m.date: m for m in created})
+
+            # Same auto-population as opening a new meeting in the app
+            enrolled_ids = Enrollment.objects.filter(
+                activity=activity, status='active'
+            ).values_list('student_id', flat=True)
+            AttendanceRecord.objects.bulk_create(
+                [
+                    AttendanceRecord(meeting=meeting, student_id=student_id, status='scheduled')
+                    for meeting in created
+                    for student_id in enrolled_ids
+                ],
+                ignore_conflicts=True,
+            )
+
+        AttendanceRecord.objects.bulk_create(
+            [
+                AttendanceRecord(
+                    meeting=meetings[change['date']],
+                    student_id=change['student_id'],
+                    status=change['new_status'],
+                )
+                for change in changes
+            ],
+            update_conflicts=True,
+            unique_fields=['meeting', 'student'],
+            update_fields=['status'],
+        )
+        # bulk_create doesn't send the signals that track changes
+        ChangeVersion.bump('student')
+
+    result['applied'] = True
+    return result
@@ -0,0 +1,196 @@
+"""
+Background jobs for generating Google sign-in sheets
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from activity.models import SignInSheetJob
+from activity.utils.google_resilience import GOOGLE_UNAVAILABLE_MESSAGE, GoogleUnavailable
+from activity.utils.google_sheets import create_signin_sheet
+from activity.utils.signin_data import build_signin_sheet_data
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """The process-wide thread pool that runs jobs submitted by this process."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.SIGNIN_SHEET_JOB_THREADS,
+                    thread_name_prefix='signin-sheet-job',
+                )
+    return _executor
+
+
+def enqueue_signin_sheet_job(activity, start_date, num_weeks, user=None, sheet_data=None):
+    """
+    Queue a sign-in sheet to be generated in the background.
+
+    When SIGNIN_SHEET_JOB_THREADS is above zero the job is handed to this
+    process's thread pool once the transaction commits. Otherwise (or if
+    the process stops first) the run_signin_sheet_jobs worker picks it up.
+
+    Args:
+        activity: Activity model instance
+        start_date: datetime.date of the first date column
+        num_weeks: number of weekly date columns
+        user: User who asked for the sheet
+        sheet_data: the activity's create_signin_sheet() keyword arguments,
+            when already built for several activities at once; the thread
+            pool uses them instead of querying the roster again
+
+    Returns:
+        SignInSheetJob: the queued job
+    """
+    job = SignInSheetJob.objects.create(
+        activity=activity,
+        start_date=start_date,
+        num_weeks=num_weeks,
+        requested_by=user if user is not None and user.is_authenticated else None,
+    )
+    if settings.SIGNIN_SHEET_JOB_THREADS > 0:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk, sheet_data))
+    return job
+
+
+def claim_job(job_id=None):
+    """
+    Claim one queued job, or the given job if it is still queued.
+
+    The row is selected with SELECT ... FOR UPDATE SKIP LOCKED and marked
+    'running' before the transaction commits, so a thread pool and worker
+    processes never run the same job twice.
+
+    Returns:
+        SignInSheetJob now owned by the caller, or None
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        jobs = SignInSheetJob.objects.select_for_update(skip_locked=True).filter(status='queued')
+        if job_id is not None:
+            jobs = jobs.filter(pk=job_id)
+        job = jobs.order_by('created_at', 'id').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.claimed_at = now
+        job.attempts += 1
+        job.save(update_fields=['status', 'claimed_at', 'attempts'])
+
+    return job
+
+
+def run_job(job, sheet_data=None):
+    """
+    Generate the sheet for a claimed job and record the outcome.
+
+    sheet_data is the data passed to enqueue_signin_sheet_job(), if any;
+    otherwise it is built for the job's activity here.
+
+    Returns:
+        bool: True if the sheet was created
+    """
+    try:
+        if sheet_data is None:
+            sheet_data = build_signin_sheet_data([job.activity], job.start_date, job.num_weeks)[0]
+        job.sheet_url = create_signin_sheet(
+            **sheet_data,
+            reuse_worksheet=(job.spreadsheet_id, job.worksheet_id) if job.worksheet_id is not None else None,
+            on_worksheet=lambda worksheet: _record_worksheet(job, worksheet),
+        )
+    except GoogleUnavailable as e:
+        print(f"Sign-in sheet job {job.pk} failed: {e}")
+        job.status = 'failed'
+        job.error = GOOGLE_UNAVAILABLE_MESSAGE
+    except Exception as e:
+        job.status = 'failed'
+        job.error = f'Failed to create sheet: {str(e)}'
+    else:
+        job.status = 'succeeded'
+        job.error = ''
+
+    # Unless fail_stale_jobs() gave up on the job in the meantime
+    finished = SignInSheetJob.objects.filter(pk=job.pk, status='running', claimed_at=job.claimed_at).update(
+        status=job.status,
+        sheet_url=job.sheet_url,
+        error=job.error,
+        finished_at=timezone.now(),
+        claimed_at=None,
+    )
+    return bool(finished) and job.status == 'succeeded'
+
+
+def _record_worksheet(job, worksheet):
+    """Remember the job's worksheet, so a retry writes to it instead of adding another."""
+    job.spreadsheet_id = worksheet.spreadsheet.id
+    job.worksheet_id = worksheet.id
+    SignInSheetJob.objects.filter(pk=job.pk).update(spreadsheet_id=job.spreadsheet_id, worksheet_id=job.worksheet_id)
+
+
+def fail_stale_jobs(job_id=None):
+    """
+    Mark jobs still 'running' SIGNIN_SHEET_JOB_CLAIM_TIMEOUT_SECONDS after they
+    were claimed as failed, e.g. because the process running them was
+    restarted, so clients polling them stop waiting.
+
+    Args:
+        job_id: only check this job
+
+    Returns:
+        int: number of jobs marked failed
+    """
+    now = timezone.now()
+    jobs = SignInSheetJob.objects.filter(
+        status='running',
+        claimed_at__lt=now - timedelta(seconds=settings.SIGNIN_SHEET_JOB_CLAIM_TIMEOUT_SECONDS),
+    )
+    if job_id is not None:
+        jobs = jobs.filter(pk=job_id)
+    return jobs.update(
+        status='failed',
+        error='Generating the sign-in sheet took too long and was stopped. Please try again.',
+        finished_at=now,
+        claimed_at=None,
+    )
+
+
+def _run_in_thread(job_id, sheet_data=None):
+    try:
+        job = claim_job(job_id)
+        if job is not None:
+            run_job(job, sheet_data)
+    finally:
+        # Pool threads get their own DB connection; don't leave it open between jobs
+        connection.close()
+
+
+def process_jobs(limit=None):
+    """
+    Claim and run queued jobs one at a time until none are left (or limit is reached).
+
+    Returns:
+        tuple: (succeeded_count, failed_count)
+    """
+    fail_stale_jobs()
+    succeeded = 0
+    failed = 0
+    while limit is None or succeeded + failed < limit:
+        job = claim_job()
+        if job is None:
+            break
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -0,0 +1,126 @@
+"""
+PDF rendering of sign-in sheets, bundled into a streamed zip for printing
+
+This module doesn't import Django or the models: PDFs are drawn in worker
+processes that only receive plain row data.
+"""
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+
+def render_signin_pdf(title, rows, waitlist_header_row):
+    """
+    Draw a sign-in sheet as a landscape letter PDF
+
+    Uses the same layout as the Google and Excel sheets: a bold title across
+    the top, bold centered date headers, a bordered grid with centered
+    attendance marks and a bold wait list header. Long rosters continue on
+    following pages with the date header repeated.
+
+    Args:
+        title: sheet title
+        rows: SignInSheetLayout.rows
+        waitlist_header_row: 0-based row index of the wait list header
+
+    Returns:
+        bytes: contents of the PDF
+    """
+    output = BytesIO()
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=landscape(letter),
+        title=title,
+        leftMargin=0.5 * inch, rightMargin=0.5 * inch,
+        topMargin=0.5 * inch, bottomMargin=0.5 * inch,
+    )
+
+    num_columns = len(rows[0])
+    name_width = 2.5 * inch
+    date_width = (doc.width - name_width) / max(num_columns - 1, 1)
+    # The title and date header rows repeat at the top of every page
+    table = Table(
+        rows,
+        colWidths=[name_width] + [date_width] * (num_columns - 1),
+        rowHeights=[0.5 * inch] + [0.3 * inch] * (len(rows) - 1),
+        repeatRows=2,
+    )
+    table.setStyle(TableStyle([
+        # Title row
+        ('SPAN', (0, 0), (-1, 0)),
+        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 18),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        # Date header row
+        ('FONT', (1, 1), (-1, 1), 'Helvetica-Bold'),
+        # Date columns
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
+        # Grid below the title
+        ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
+        # Wait list header
+        ('FONT', (0, waitlist_header_row), (0, waitlist_header_row), 'Helvetica-Bold'),
+    ]))
+    doc.build([table])
+    return output.getvalue()
+
+
+class _ZipStream:
+    """
+    Write-only file object that hands back what zipfile has written so far.
+
+    It has no tell() or seek(), so zipfile writes each entry's sizes in a
+    data descriptor after the data instead of seeking back to the header.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_signin_pdf_zip(sheets, max_workers=2):
+    """
+    Render sign-in sheets to PDF in a process pool and yield a zip archive
+    in chunks, adding each PDF as soon as it finishes.
+
+    Only the PDFs that have finished but not yet been streamed are held in
+    memory, never the whole archive.
+
+    Args:
+        sheets: list of (filename, SignInSheetLayout) pairs
+        max_workers: number of worker processes
+
+    Yields:
+        bytes: consecutive chunks of the zip file
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        if sheets:
+            # Spawned workers don't inherit the parent's database connections
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(sheets)), mp_context=context) as executor:
+                futures = {
+                    executor.submit(render_signin_pdf, layout.title, layout.rows, layout.waitlist_header_row): filename
+                    for filename, layout in sheets
+                }
+                for future in as_completed(futures):
+                    archive.writestr(futures[future], future.result())
+                    yield stream.pop()
+    # Central directory
+    yield stream.pop()
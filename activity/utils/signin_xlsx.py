@@ -0,0 +1,76 @@
+"""
+Excel (.xlsx) rendering of sign-in sheets, for printing without Google
+"""
+from io import BytesIO
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+THIN = Side(style='thin')
+GRID_BORDER = Border(top=THIN, bottom=THIN, left=THIN, right=THIN)
+
+
+def render_signin_xlsx(layout):
+    """
+    Render a sign-in sheet layout to an Excel workbook
+
+    Mirrors the Google Sheets formatting: a merged bold title, bold centered
+    date headers, centered attendance marks, a bordered grid and a bold
+    wait list header.
+
+    Args:
+        layout: SignInSheetLayout from build_signin_layout()
+
+    Returns:
+        bytes: contents of the .xlsx file
+    """
+    workbook = Workbook()
+    worksheet = workbook.active
+    # Excel limits sheet names to 31 characters
+    worksheet.title = layout.title[:31].replace('/', '-')
+
+    for row in layout.rows:
+        worksheet.append(row)
+
+    # openpyxl rows and columns are 1-based
+    last_col = layout.num_columns
+    last_row = len(layout.rows)
+
+    # Title row
+    title_cell = worksheet.cell(row=1, column=1)
+    title_cell.font = Font(bold=True, size=18)
+    title_cell.alignment = Alignment(horizontal='center')
+    worksheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=last_col)
+
+    # Date header row
+    for col in range(2, last_col + 1):
+        cell = worksheet.cell(row=2, column=col)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+
+    # Borders on the grid, centered attendance marks
+    for row in worksheet.iter_rows(min_row=2, max_row=last_row, max_col=last_col):
+        for cell in row:
+            cell.border = GRID_BORDER
+            if cell.column > 1 and cell.row > 2:
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+
+    worksheet.cell(row=layout.waitlist_header_row + 1, column=1).font = Font(bold=True)
+
+    # Fit columns to their contents; the merged title doesn't count
+    for col in range(1, last_col + 1):
+        width = max((len(row[col - 1]) for row in layout.rows[1:]), default=0)
+        worksheet.column_dimensions[get_column_letter(col)].width = max(width + 2, 6)
+
+    # Print on one page wide
+    worksheet.page_setup.fitToWidth = 1
+    worksheet.page_setup.fitToHeight = 0
+    worksheet.sheet_properties.pageSetUpPr.fitToPage = True
+
+    output = BytesIO()
+    workbook.save(output)
+    return output.getvalue()
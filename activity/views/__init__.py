@@ -25,6 +25,7 @@ from .cancellations import (
 	CancellationCreateView,
 	CancellationDeleteView,
 	CancellationForDateView,
+	CancellationBulkCreateView,
 )
 from .reports import (
 	WeeklyReportView,
@@ -35,4 +36,5 @@ from .reports import (
 from .communication import (
 	SessionEnrollmentCombinationsView,
 	EmailDetailsView,
+	EmailSendView,
 )
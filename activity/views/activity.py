@@ -38,18 +38,76 @@ class ActivityEnrollmentUpdateView(APIView):
 
         return Response({"success": True})
 
+from django.db.models import Count, Prefetch, Q
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
 from activity.models import Activity
-from activity.serializers import ActivityListSerializer, ActivitySerializer
+from activity.conditional import ConditionalGetMixin
+from activity.serializers import ActivityListSerializer, ActivitySerializer, ActivitySummarySerializer
+
+
+def with_enrollment_counts(queryset):
+    """
+    Load the activities with their session, organization, location and
+    active and waiting enrollment counts in one query, for
+    ActivitySummarySerializer.
+    """
+    return queryset.select_related(
+        'session__organization', 'location'
+    ).annotate(
+        students_count=Count('enrollments', filter=Q(enrollments__status='active')),
+        waitlist_count=Count('enrollments', filter=Q(enrollments__status='waiting')),
+    )
+
+
+def with_enrollments(queryset):
+    """
+    Load everything ActivityListSerializer needs in three queries: the
+    activities as in with_enrollment_counts(), then the active and the
+    waiting enrollments with their students.
+    """
+    return with_enrollment_counts(queryset).prefetch_related(
+        Prefetch(
+            'enrollments',
+            queryset=Enrollment.objects.filter(status='active').select_related('student').order_by('id'),
+            to_attr='active_enrollments',
+        ),
+        Prefetch(
+            'enrollments',
+            queryset=Enrollment.objects.filter(status='waiting').select_related('student').order_by('id'),
+            to_attr='waiting_enrollments',
+        ),
+    )
 
-class ActivityListView(generics.ListAPIView):
-    serializer_class = ActivityListSerializer
+
+class ActivityListView(ConditionalGetMixin, generics.ListAPIView):
+    """
+    GET /api/classes/?view=summary|full&include_inactive=true
+
+    view=full (the default) includes each class's students and waitlist;
+    view=summary only has the counts and never loads students.
+    """
+    change_families = ('activity',)
+    VIEWS = {
+        'summary': (ActivitySummarySerializer, with_enrollment_counts),
+        'full': (ActivityListSerializer, with_enrollments),
+    }
+
+    def get_view_mode(self):
+        view = self.request.query_params.get('view', 'full')
+        if view not in self.VIEWS:
+            raise ValidationError({'view': f"Must be one of: {', '.join(self.VIEWS)}"})
+        return view
+
+    def get_serializer_class(self):
+        return self.VIEWS[self.get_view_mode()][0]
 
     def get_queryset(self):
+        load = self.VIEWS[self.get_view_mode()][1]
         include_inactive = self.request.query_params.get('include_inactive') == 'true'
         if include_inactive:
-            return Activity.objects.all()
-        return Activity.objects.filter(session__closed=False, closed=False)
+            return load(Activity.objects.all())
+        return load(Activity.objects.filter(session__closed=False, closed=False))
 
 # Create view for Activity
 from rest_framework import permissions
@@ -66,8 +124,9 @@ class ActivityUpdateView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 # Detail view for Activity
-class ActivityDetailView(generics.RetrieveAPIView):
-    queryset = Activity.objects.all()
+class ActivityDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
+    change_families = ('activity',)
+    queryset = with_enrollments(Activity.objects.all())
     serializer_class = ActivityListSerializer
 
 class ActivityTypeChoicesView(APIView):
@@ -2,8 +2,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from activity.models import Activity, Meeting, AttendanceRecord, Student, ClassCancellation
+from django.db import transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from activity.models import Activity, Meeting, AttendanceRecord, ChangeVersion, Enrollment, Student, ClassCancellation
 from activity.serializers import MeetingSerializer, StudentBasicSerializer
 
 
@@ -24,55 +25,77 @@ class MeetingGetOrCreateView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        activity = get_object_or_404(Activity, pk=activity_id)
-
-        # Get or create the meeting
-        meeting, created = Meeting.objects.get_or_create(
-            activity=activity,
-            date=date
+        # The class with everything the meeting fields and the roster read,
+        # and its enrolled and waitlisted students in one query
+        roster = Enrollment.objects.filter(status__in=('active', 'waiting')).select_related('student')
+        activity = get_object_or_404(
+            Activity.objects.select_related('location', 'session__organization').prefetch_related(
+                Prefetch('enrollments', queryset=roster, to_attr='roster_enrollments'),
+            ),
+            pk=activity_id,
         )
 
-        if created:
-            # Auto-populate with enrolled students (status='active')
-            active_enrollments = activity.enrollments.filter(status='active').select_related('student')
-            for enrollment in active_enrollments:
-                AttendanceRecord.objects.create(
-                    student=enrollment.student,
-                    meeting=meeting,
-                    status='scheduled'
-                )
+        # Most requests open a meeting that already exists
+        meeting = Meeting.objects.filter(activity=activity, date=date).first()
+        if meeting is None:
+            meeting = self._create_meeting(activity, date)
+        meeting.activity = activity
 
         # Return meeting with full details and attendance records
-        serializer = MeetingSerializer(meeting)
+        # (?fields= / ?omit= pick the meeting fields, see SparseFieldsetMixin)
+        serializer = MeetingSerializer(meeting, context={'request': request})
+        if 'attendance_records' in serializer.fields:
+            prefetch_related_objects(
+                [meeting],
+                Prefetch('attendance_records', queryset=AttendanceRecord.objects.select_related('student')),
+            )
 
         # Also include enrolled and waitlist students for the UI
-        enrolled_students = activity.enrollments.filter(status='active').select_related('student')
-        waitlist_students = activity.enrollments.filter(status='waiting').select_related('student')
-
         response_data = serializer.data
-        response_data['enrolled_students'] = [
-            {
+        response_data['enrolled_students'] = []
+        response_data['waitlist_students'] = []
+        students_by_status = {
+            'active': response_data['enrolled_students'],
+            'waiting': response_data['waitlist_students'],
+        }
+        for e in sorted(activity.roster_enrollments, key=lambda e: (e.student.last_name or '', e.student.first_name or '')):
+            students_by_status[e.status].append({
                 'id': e.student.id,
                 'display_name': e.student.display_name,
                 'first_name': e.student.first_name,
                 'last_name': e.student.last_name,
                 'email': e.student.email,
-            }
-            for e in sorted(enrolled_students, key=lambda e: (e.student.last_name or '', e.student.first_name or ''))
-        ]
-        response_data['waitlist_students'] = [
-            {
-                'id': e.student.id,
-                'display_name': e.student.display_name,
-                'first_name': e.student.first_name,
-                'last_name': e.student.last_name,
-                'email': e.student.email,
-            }
-            for e in sorted(waitlist_students, key=lambda e: (e.student.last_name or '', e.student.first_name or ''))
-        ]
+            })
 
         return Response(response_data)
 
+    def _create_meeting(self, activity, date):
+        """
+        Create the meeting and its attendance records in one transaction, so
+        nobody sees a new meeting before it is populated. If another request
+        creates it at the same time, get_or_create waits for that one to
+        commit and returns its meeting instead of raising IntegrityError.
+        """
+        with transaction.atomic():
+            meeting, created = Meeting.objects.get_or_create(
+                activity=activity,
+                date=date
+            )
+
+            if created:
+                # Auto-populate with enrolled students (status='active')
+                AttendanceRecord.objects.bulk_create(
+                    [
+                        AttendanceRecord(student=enrollment.student, meeting=meeting, status='scheduled')
+                        for enrollment in activity.roster_enrollments
+                        if enrollment.status == 'active'
+                    ],
+                    ignore_conflicts=True,
+                )
+                # bulk_create sends no post_save
+                ChangeVersion.bump('student')
+        return meeting
+
 
 class AttendanceUpdateView(APIView):
     """
@@ -92,33 +115,35 @@ class AttendanceUpdateView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Collect student IDs from the submitted attendance data
-        submitted_student_ids = set()
+        # One transaction, so the records change together
+        with transaction.atomic():
+            # Collect student IDs from the submitted attendance data
+            submitted_student_ids = set()
 
-        # Update or create attendance records
-        for record in attendance_data:
-            student_id = record.get('student_id')
-            record_status = record.get('status')
-            note = record.get('note', '')
+            # Update or create attendance records
+            for record in attendance_data:
+                student_id = record.get('student_id')
+                record_status = record.get('status')
+                note = record.get('note', '')
 
-            if not student_id or not record_status:
-                continue  # Skip invalid records
+                if not student_id or not record_status:
+                    continue  # Skip invalid records
 
-            submitted_student_ids.add(student_id)
+                submitted_student_ids.add(student_id)
 
-            AttendanceRecord.objects.update_or_create(
-                meeting=meeting,
-                student_id=student_id,
-                defaults={
-                    'status': record_status,
-                    'note': note
-                }
-            )
+                AttendanceRecord.objects.update_or_create(
+                    meeting=meeting,
+                    student_id=student_id,
+                    defaults={
+                        'status': record_status,
+                        'note': note
+                    }
+                )
 
-        # Delete attendance records for students not in the submitted list
-        AttendanceRecord.objects.filter(meeting=meeting).exclude(
-            student_id__in=submitted_student_ids
-        ).delete()
+            # Delete attendance records for students not in the submitted list
+            AttendanceRecord.objects.filter(meeting=meeting).exclude(
+                student_id__in=submitted_student_ids
+            ).delete()
 
         return Response({"success": True, "message": "Attendance updated successfully"})
 
@@ -3,9 +3,13 @@ from rest_framework.generics import ListAPIView, CreateAPIView, DestroyAPIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from datetime import datetime
 from activity.models import ClassCancellation, Activity
 from activity.serializers import ClassCancellationSerializer
+from activity.utils.cancellations import bulk_cancel_classes
+from activity.utils.notifications import queue_cancellation_notices
 
 
 class CancellationListView(ListAPIView):
@@ -39,10 +43,20 @@ class CancellationListView(ListAPIView):
 class CancellationCreateView(CreateAPIView):
     """
     Create a new class cancellation.
+    Enrolled and waitlisted students are notified by email unless "notify" is false.
+    The notice is queued in the outbox, so the request returns immediately.
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ClassCancellationSerializer
 
+    def perform_create(self, serializer):
+        notify = self.request.data.get('notify', True) not in (False, 'false', '0', 0)
+        with transaction.atomic():
+            cancellation = serializer.save()
+            # Only upcoming classes are worth telling anyone about
+            if notify and cancellation.date >= timezone.localdate():
+                queue_cancellation_notices([cancellation])
+
 
 class CancellationDeleteView(DestroyAPIView):
     """
@@ -75,3 +89,106 @@ class CancellationForDateView(APIView):
 
         serializer = ClassCancellationSerializer(cancellations, many=True)
         return Response(serializer.data)
+
+
+class CancellationBulkCreateView(APIView):
+    """
+    Cancel every open class over a date or date range (e.g. a holiday or winter break).
+
+    POST /api/cancellations/bulk/
+    Body:
+    {
+        "start_date": "2025-12-22",
+        "end_date": "2026-01-02",        (optional, defaults to start_date)
+        "organization_id": 1,            (optional)
+        "location_id": 2,                (optional)
+        "all_organizations": false,      (required true if no organization or location is given)
+        "reason": "Winter break",
+        "delete_empty_meetings": false,
+        "notify": true
+    }
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        start_date_str = request.data.get('start_date')
+        end_date_str = request.data.get('end_date') or start_date_str
+        organization_id = request.data.get('organization_id')
+        location_id = request.data.get('location_id')
+
+        if not start_date_str:
+            return Response(
+                {"error": "start_date is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {"error": "start_date and end_date must be in YYYY-MM-DD format"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if end_date < start_date:
+            return Response(
+                {"error": "end_date must not be before start_date"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if (end_date - start_date).days > 366:
+            return Response(
+                {"error": "Date range cannot be longer than a year"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            organization_id = int(organization_id) if organization_id else None
+            location_id = int(location_id) if location_id else None
+        except (ValueError, TypeError):
+            return Response(
+                {"error": "organization_id and location_id must be whole numbers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not organization_id and not location_id and request.data.get('all_organizations') is not True:
+            return Response(
+                {"error": "organization_id, location_id or all_organizations is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        reason = request.data.get('reason') or ''
+        max_reason_length = ClassCancellation._meta.get_field('reason').max_length
+        if not isinstance(reason, str) or len(reason) > max_reason_length:
+            return Response(
+                {"error": f"reason must be text of at most {max_reason_length} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = bulk_cancel_classes(
+                start_date,
+                end_date,
+                organization_id=organization_id,
+                location_id=location_id,
+                reason=reason,
+                delete_empty_meetings=request.data.get('delete_empty_meetings') is True,
+                notify=request.data.get('notify', True) is not False,
+            )
+        except IntegrityError:
+            return Response(
+                {"error": "Some of these classes are being cancelled by another request. Please try again."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({
+            'created': result['created'],
+            'already_cancelled': result['already_cancelled'],
+            'meetings_deleted': result['meetings_deleted'],
+            'notices_queued': result['notices_queued'],
+            'cancellations': [
+                {'activity': c.activity_id, 'date': c.date}
+                for c in result['cancellations']
+            ],
+        }, status=status.HTTP_201_CREATED)
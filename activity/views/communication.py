@@ -1,15 +1,21 @@
-import hashlib
-import json
-from datetime import timedelta
-
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from django.db import transaction
 from collections import defaultdict
 from activity.models import Organization, Session, Activity, Enrollment, Student
 from activity.models import Meeting
+from activity.utils.combinations import (
+    ScheduleBuilder,
+    get_changed_student_ids,
+    get_combination_id,
+    get_student_classes,
+    record_snapshots,
+)
+from activity.utils.email_templates import format_time_for_email, get_email_template, get_time_range
+from activity.utils.outbox import enqueue_message
 
 
 class SessionEnrollmentCombinationsView(APIView):
@@ -36,32 +42,26 @@ class SessionEnrollmentCombinationsView(APIView):
                 status=404
             )
 
-        # Get all activities for this session
+        changes_only = request.query_params.get('mode') == 'changes'
+
+        # Get all activities for this session, with enrollments and cancellations in bulk
         activities = Activity.objects.select_related('location').filter(
             session=session
-        ).order_by('day_of_week', 'time')
+        ).prefetch_related('enrollments__student', 'cancellations').order_by('day_of_week', 'time')
+        activity_map = {act.id: act for act in activities}
 
         # Build a mapping of students to their enrolled and waitlisted classes
-        student_classes = defaultdict(lambda: {'enrolled': set(), 'waitlisted': set()})
-
-        for activity in activities:
-            # Get enrolled students
-            enrolled = Enrollment.objects.filter(
-                activity=activity,
-                status='active'
-            ).select_related('student')
-
-            for enrollment in enrolled:
-                student_classes[enrollment.student.id]['enrolled'].add(activity.id)
-
-            # Get waitlisted students
-            waitlisted = Enrollment.objects.filter(
-                activity=activity,
-                status='waiting'
-            ).select_related('student')
-
-            for enrollment in waitlisted:
-                student_classes[enrollment.student.id]['waitlisted'].add(activity.id)
+        student_classes = {
+            student_id: classes
+            for student_id, classes in get_student_classes(activities).items()
+            if classes['enrolled'] or classes['waitlisted']
+        }
+
+        # In "changes only" mode, keep just the students whose schedule differs from what they were last sent
+        if changes_only:
+            changed_ids = get_changed_student_ids(session, student_classes, ScheduleBuilder(activity_map))
+            unchanged_count = len(student_classes) - len(changed_ids)
+            student_classes = {sid: classes for sid, classes in student_classes.items() if sid in changed_ids}
 
         # Group students by their unique combination of classes
         combinations = defaultdict(lambda: {'students': [], 'enrolled': set(), 'waitlisted': set()})
@@ -78,15 +78,10 @@ class SessionEnrollmentCombinationsView(APIView):
 
         # Convert combinations to a list with details
         result = []
-        activity_map = {act.id: act for act in activities}
 
         for (enrolled_ids, waitlisted_ids), data in combinations.items():
             # Create a unique combination ID
-            combo_string = json.dumps({
-                'enrolled': sorted(enrolled_ids),
-                'waitlisted': sorted(waitlisted_ids)
-            }, sort_keys=True)
-            combo_id = hashlib.md5(combo_string.encode()).hexdigest()
+            combo_id = get_combination_id(enrolled_ids, waitlisted_ids)
 
             # Get activity details
             enrolled_activities = []
@@ -122,35 +117,23 @@ class SessionEnrollmentCombinationsView(APIView):
         # Sort by number of students (descending) for easier viewing
         result.sort(key=lambda x: x['student_count'], reverse=True)
 
-        return Response({
+        response_data = {
             'session_id': session.id,
             'session_name': session.name,
             'organization_name': session.organization.name,
+            'mode': 'changes' if changes_only else 'all',
             'combinations': result
-        })
+        }
+        if changes_only:
+            response_data['unchanged_student_count'] = unchanged_count
+        return Response(response_data)
 
 
-class EmailDetailsView(APIView):
+class ClassNoticeEmailMixin:
     """
-    Get email composition details for a specific enrollment combination.
-    Returns the BCC list, subject, and body text for the email.
+    Composes the class notice email for an enrollment combination.
+    Shared by EmailDetailsView and EmailSendView.
     """
-    permission_classes = [permissions.IsAuthenticated]
-
-    def _format_time_for_email(self, time_obj):
-        # Format as h:mm AM/PM (e.g., 7:00AM, 11:30PM)
-        formatted = time_obj.strftime('%-I:%M%p')
-        # Remove :00 if present
-        formatted = formatted.replace(':00', '')
-        # Convert AM/PM to lowercase
-        formatted = formatted.lower()
-        return formatted
-
-    def _get_time_range(self, time_obj):
-        start_time_formatted = self._format_time_for_email(time_obj)
-        end_time_obj = time_obj.replace(hour=(time_obj.hour + 1) % 24) # Assuming 1-hour classes
-        end_time_formatted = self._format_time_for_email(end_time_obj)
-        return f"{start_time_formatted} - {end_time_formatted}"
 
     def _build_subject(self, activities, organization):
         """Builds the email subject line."""
@@ -163,62 +146,25 @@ class EmailDetailsView(APIView):
         subject += f" {organization.name} Classes With Alyssa"
         return subject
 
-    def _build_body(self, enrolled_activities, waitlisted_activities, session):
-        """Builds the email body."""
-        body_lines = ["Hello-", "You are currently signed up for:", ""]
-
-        # --- Enrolled Classes ---
-        for i, act in enumerate(enrolled_activities):
-            # Class name, day, and time
-            time_range = self._get_time_range(act.time)
-            body_lines.append(f"{act.get_type_display()} {act.day_of_week} {time_range}")
-
-            # Class dates
-            possible_dates = act.get_possible_dates()
-            cancelled_dates_objs = act.get_cancelled_dates()
-            
-            display_meeting_dates = [d for d in possible_dates if d not in cancelled_dates_objs]
-
-            date_str = ", ".join([d.strftime('%-m/%-d') for d in display_meeting_dates])
-            day_abbr = act.day_of_week[:4] if act.day_of_week == "Thursday" else act.day_of_week[:3]
-            body_lines.append(f"  {act.get_type_display()} {day_abbr} dates: {date_str}")
-
-            if cancelled_dates_objs:
-                cancelled_dates_str = ", ".join([d.strftime('%-m/%-d') for d in sorted(cancelled_dates_objs)])
-                body_lines.append(f"  Cancelled dates: {cancelled_dates_str}")
-            
-            if i < len(enrolled_activities) - 1 or waitlisted_activities:
-                body_lines.append("")
-                body_lines.append("and")
-                body_lines.append("")
-
-        # --- Waitlisted Classes ---
-        for i, act in enumerate(waitlisted_activities):
-            # Class name, day, and time (consistent format)
-            time_range = self._get_time_range(act.time)
-            body_lines.append(f"Waitlist: {act.get_type_display()} {act.day_of_week} {time_range}")
-
-            # Class dates (including cancellations)
-            possible_dates = act.get_possible_dates()
-            cancelled_dates_objs = act.get_cancelled_dates()
-            
-            display_meeting_dates = [d for d in possible_dates if d not in cancelled_dates_objs]
-
-            date_str = ", ".join([d.strftime('%-m/%-d') for d in display_meeting_dates])
-            day_abbr = act.day_of_week[:4] if act.day_of_week == "Thursday" else act.day_of_week[:3]
-            body_lines.append(f"  {act.get_type_display()} {day_abbr} dates: {date_str}")
-
-            if cancelled_dates_objs:
-                cancelled_dates_str = ", ".join([d.strftime('%-m/%-d') for d in sorted(cancelled_dates_objs)])
-                body_lines.append(f"  Cancelled dates: {cancelled_dates_str}")
-            
-            if i < len(waitlisted_activities) - 1: # Add separator between waitlisted classes
-                body_lines.append("")
-                body_lines.append("and")
-                body_lines.append("")
-        
-        if waitlisted_activities and enrolled_activities: # Add separator if both enrolled and waitlisted exist
-            body_lines.append("")
+    def _build_class_context(self, act, waitlisted=False):
+        """Builds the template context for one class block."""
+        # Use the prefetched cancellations rather than querying per class
+        cancelled_dates = sorted(c.date for c in act.cancellations.all())
+        meeting_dates = [d for d in act.get_possible_dates() if d not in cancelled_dates]
+        return {
+            'type': act.get_type_display(),
+            'day_of_week': act.day_of_week,
+            'day_abbr': act.day_of_week[:4] if act.day_of_week == "Thursday" else act.day_of_week[:3],
+            'time_range': get_time_range(act.time),
+            'dates': [d.strftime('%-m/%-d') for d in meeting_dates],
+            'cancelled_dates': [d.strftime('%-m/%-d') for d in cancelled_dates],
+            'waitlisted': waitlisted,
+        }
+
+    def _build_context(self, enrolled_activities, waitlisted_activities, session):
+        """Builds the template context for the email body."""
+        classes = [self._build_class_context(act) for act in enrolled_activities]
+        classes += [self._build_class_context(act, waitlisted=True) for act in waitlisted_activities]
 
         # --- Location Information ---
         unique_locations = set()
@@ -231,104 +177,111 @@ class EmailDetailsView(APIView):
             except AttributeError:
                 # This handles the case where act.location is a string
                 pass
-
-        if len(unique_locations) == 1:
-            location = unique_locations.pop()
-            location_line = f"Class takes place at the {location.name}"
-            if location.address:
-                location_line += f", located at {location.address}."
-            else:
-                location_line += "." # Add a period if no address
-            body_lines.append(location_line)
-
-            if location.description:
-                body_lines.append(location.description)
-            body_lines.append("")
+        location = unique_locations.pop() if len(unique_locations) == 1 else None
 
         # --- Closing Paragraph ---
+        # Counts come from the prefetched enrollments
         is_full = any(
-            act.max_capacity and act.enrollments.filter(status='active').count() >= act.max_capacity
+            act.max_capacity and sum(1 for e in act.enrollments.all() if e.status == 'active') >= act.max_capacity
             for act in enrolled_activities
         )
         # Check if any class (enrolled or waitlisted) has students on its waitlist
         has_waitlisted_students_in_any_class = any(
-            act.enrollments.filter(status='waiting').exists()
+            any(e.status == 'waiting' for e in act.enrollments.all())
             for act in (enrolled_activities + waitlisted_activities)
         )
-        has_enrolled_activities = bool(enrolled_activities)
 
         if is_full:
-            body_lines.append("This class is currently full, and there is a wait list. Please let me know any dates that you will not be able to attend class.")
-            body_lines.append("If you have any questions, please don't hesitate to ask.")
-        elif has_enrolled_activities and has_waitlisted_students_in_any_class:
-            body_lines.append("As a reminder, if you are aware that you will be away for certain days, please let me know which classes you will miss so I can open those spots to people on the waiting list. Please be sure to include your name and the dates you will be absent.")
+            closing = 'full'
+        elif enrolled_activities and has_waitlisted_students_in_any_class:
+            closing = 'waitlist_reminder'
         else: # This covers solely waitlisted, or enrolled with no waitlist
-            body_lines.append("Thank you so much for being such a loving supporter of my classes!")
-            body_lines.append("If you have any questions, please don't hesitate to ask.")
-        
-        # Only include "I look forward to seeing you in class soon!" if there are enrolled activities
-        # or if it's not solely waitlisted (i.e., there are no waitlisted activities either)
-        if bool(enrolled_activities) or not bool(waitlisted_activities):
-            body_lines.append("I look forward to seeing you in class soon!")
-        
-        body_lines.append("~ Alyssa")
-
-        return "\n".join(body_lines)
-
-    def get(self, request, combination_id):
-        session_id = request.query_params.get('session_id')
+            closing = 'thanks'
+
+        return {
+            'classes': classes,
+            'enrolled_and_waitlisted': bool(enrolled_activities) and bool(waitlisted_activities),
+            'location': location,
+            'closing': closing,
+            # Only look forward to class if there are enrolled activities
+            # or if it's not solely waitlisted (i.e., there are no waitlisted activities either)
+            'look_forward': bool(enrolled_activities) or not bool(waitlisted_activities),
+        }
+
+    def _resolve_combination(self, session_id, combination_id, changes_only=False):
+        """
+        Find the students and classes for a combination.
+
+        With changes_only, students whose schedule matches what they were
+        last sent are left out.
+
+        Returns:
+            tuple: (target dict, None) on success, or (None, error Response)
+        """
         if not session_id:
-            return Response({"error": "session_id is required"}, status=400)
+            return None, Response({"error": "session_id is required"}, status=400)
 
         try:
             session = Session.objects.select_related('organization').get(pk=session_id)
         except Session.DoesNotExist:
-            return Response({"error": "Session not found"}, status=404)
+            return None, Response({"error": "Session not found"}, status=404)
 
-        activities = Activity.objects.filter(session=session).prefetch_related(
-            'meetings',
+        activities = Activity.objects.filter(session=session).select_related('location').prefetch_related(
             'enrollments__student',
             'cancellations' # Corrected related_name
         ).order_by('day_of_week', 'time')
 
-        student_classes = defaultdict(lambda: {'enrolled': set(), 'waitlisted': set(), 'student': None})
-        for activity in activities:
-            for enrollment in activity.enrollments.all():
-                if enrollment.status == 'active':
-                    student_classes[enrollment.student.id]['enrolled'].add(activity.id)
-                elif enrollment.status == 'waiting':
-                    student_classes[enrollment.student.id]['waitlisted'].add(activity.id)
-                student_classes[enrollment.student.id]['student'] = enrollment.student
-
+        student_classes = get_student_classes(activities)
         activity_map = {act.id: act for act in activities}
+        schedule_builder = ScheduleBuilder(activity_map)
+
         target_students = []
         target_enrolled_ids = set()
         target_waitlisted_ids = set()
 
         for student_id, classes in student_classes.items():
-            combo_string = json.dumps({
-                'enrolled': sorted(list(classes['enrolled'])),
-                'waitlisted': sorted(list(classes['waitlisted']))
-            }, sort_keys=True)
-            combo_id = hashlib.md5(combo_string.encode()).hexdigest()
+            combo_id = get_combination_id(classes['enrolled'], classes['waitlisted'])
 
             if combo_id == combination_id:
                 target_students.append(classes['student'])
                 if not target_enrolled_ids:
                     target_enrolled_ids = classes['enrolled']
                     target_waitlisted_ids = classes['waitlisted']
-        
+
+        if changes_only and target_students:
+            changed_ids = get_changed_student_ids(
+                session,
+                {s.id: student_classes[s.id] for s in target_students},
+                schedule_builder,
+            )
+            target_students = [s for s in target_students if s.id in changed_ids]
+
         if not target_students:
-            return Response({"error": "Combination not found"}, status=404)
+            return None, Response({"error": "Combination not found"}, status=404)
 
         target_students.sort(key=lambda s: (s.last_name, s.first_name))
-        bcc_list = [s.email for s in target_students if s.email]
 
-        enrolled_activities = sorted([activity_map[id] for id in target_enrolled_ids], key=lambda x: (x.day_of_week, x.time))
-        waitlisted_activities = sorted([activity_map[id] for id in target_waitlisted_ids], key=lambda x: (x.day_of_week, x.time))
+        return {
+            'session': session,
+            'students': target_students,
+            'enrolled_ids': target_enrolled_ids,
+            'waitlisted_ids': target_waitlisted_ids,
+            'activity_map': activity_map,
+            'schedule_builder': schedule_builder,
+        }, None
+
+    def _get_email_details(self, target):
+        """Compose the email for a resolved combination."""
+        session = target['session']
+        activity_map = target['activity_map']
+        bcc_list = [s.email for s in target['students'] if s.email]
+
+        enrolled_activities = sorted([activity_map[id] for id in target['enrolled_ids']], key=lambda x: (x.day_of_week, x.time))
+        waitlisted_activities = sorted([activity_map[id] for id in target['waitlisted_ids']], key=lambda x: (x.day_of_week, x.time))
 
         subject = self._build_subject(enrolled_activities, session.organization)
-        body = self._build_body(enrolled_activities, waitlisted_activities, session)
+        context = self._build_context(enrolled_activities, waitlisted_activities, session)
+        body, html_body = get_email_template('class_notice').render(context)
 
         # For the frontend summary
         enrolled_activities_summary = []
@@ -342,7 +295,7 @@ class EmailDetailsView(APIView):
             enrolled_activities_summary.append({
                 'day_of_week': act.day_of_week,
                 'type': act.get_type_display(),
-                'time': self._format_time_for_email(act.time),
+                'time': format_time_for_email(act.time),
                 'location': location_name
             })
 
@@ -357,18 +310,81 @@ class EmailDetailsView(APIView):
             waitlisted_activities_summary.append({
                 'day_of_week': act.day_of_week,
                 'type': act.get_type_display(),
-                'time': self._format_time_for_email(act.time),
+                'time': format_time_for_email(act.time),
                 'location': location_name
             })
 
-        return Response({
+        return {
             'to_email': settings.DEFAULT_EMAIL_TO_ADDRESS,
             'bcc_emails': ", ".join(bcc_list),
             'subject': subject,
             'body': body,
-            'student_count': len(target_students),
+            'html_body': html_body,
+            'student_count': len(target['students']),
             'enrolled_classes': enrolled_activities_summary,
             'waitlisted_classes': waitlisted_activities_summary,
             'organization_name': session.organization.name,
             'session_name': session.name,
-        })
+        }
+
+class EmailDetailsView(ClassNoticeEmailMixin, APIView):
+    """
+    Get email composition details for a specific enrollment combination.
+    Returns the BCC list, subject, and text/HTML bodies for the email.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, combination_id):
+        target, error = self._resolve_combination(
+            request.query_params.get('session_id'),
+            combination_id,
+            changes_only=request.query_params.get('mode') == 'changes',
+        )
+        if error:
+            return error
+        return Response(self._get_email_details(target))
+
+class EmailSendView(ClassNoticeEmailMixin, APIView):
+    """
+    Queue the email for a specific enrollment combination for delivery.
+    The message is written to the outbox and sent by the run_outbox worker.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, combination_id):
+        target, error = self._resolve_combination(
+            request.data.get('session_id'),
+            combination_id,
+            changes_only=request.data.get('mode') == 'changes',
+        )
+        if error:
+            return error
+        details = self._get_email_details(target)
+
+        bcc_list = [email.strip() for email in details['bcc_emails'].split(',') if email.strip()]
+        if not bcc_list:
+            return Response({"error": "No students in this combination have an email address"}, status=400)
+
+        with transaction.atomic():
+            message = enqueue_message(
+                kind='session_email',
+                subject=details['subject'],
+                body=details['body'],
+                bcc=bcc_list,
+                to_email=details['to_email'],
+                html_body=details['html_body'],
+            )
+            # Remember what these students were told for "changes only" mode
+            record_snapshots(
+                target['session'],
+                [s for s in target['students'] if s.email],
+                target['enrolled_ids'],
+                target['waitlisted_ids'],
+                target['schedule_builder'],
+            )
+
+        return Response({
+            'success': True,
+            'message_id': message.id,
+            'recipient_count': len(bcc_list),
+        }, status=202)
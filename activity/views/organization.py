@@ -1,10 +1,29 @@
+import datetime
+
+from django.db.models import Count
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateAPIView
 from rest_framework import generics, permissions, status
 from activity.models import Organization, Session, Activity, Contact
+from activity.conditional import ConditionalGetMixin
 from activity.serializers import OrganizationSerializer, ContactSerializer
 
+
+def with_requested_relations(queryset, fields):
+    """
+    Add the counts and contacts OrganizationSerializer needs, but only for
+    the fields being returned.
+    """
+    if 'contacts' in fields:
+        queryset = queryset.prefetch_related('contacts')
+    if 'contact_count' in fields:
+        queryset = queryset.annotate(contact_count=Count('contacts', distinct=True))
+    if 'num_locations' in fields:
+        queryset = queryset.annotate(num_locations=Count('locations', distinct=True))
+    return queryset
+
 class OrganizationSoftDeleteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def delete(self, request, pk):
@@ -16,7 +35,8 @@ class OrganizationSoftDeleteView(APIView):
         org.save()
         return Response({'detail': 'Organization soft deleted.'}, status=204)
 
-class OrganizationListCreateView(ListCreateAPIView):
+class OrganizationListCreateView(ConditionalGetMixin, ListCreateAPIView):
+    change_families = ('organization',)
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
@@ -24,14 +44,18 @@ class OrganizationListCreateView(ListCreateAPIView):
         qs = Organization.objects.all()
         if not include_deleted:
             qs = qs.filter(is_deleted=False)
-        return qs
+        return with_requested_relations(qs, self.get_serializer().fields)
 
-class OrganizationListView(generics.ListAPIView):
-    queryset = Organization.objects.all()
+class OrganizationListView(ConditionalGetMixin, generics.ListAPIView):
+    change_families = ('organization',)
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class OrganizationUpdateView(RetrieveUpdateAPIView):
+    def get_queryset(self):
+        return with_requested_relations(Organization.objects.all(), self.get_serializer().fields)
+
+class OrganizationUpdateView(ConditionalGetMixin, RetrieveUpdateAPIView):
+    change_families = ('organization',)
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
@@ -39,10 +63,22 @@ class OrganizationUpdateView(RetrieveUpdateAPIView):
         qs = Organization.objects.all()
         if not include_deleted:
             qs = qs.filter(is_deleted=False)
-        return qs
+        return with_requested_relations(qs, self.get_serializer().fields)
 
-class OrganizationDetailsView(APIView):
+class OrganizationDetailsView(ConditionalGetMixin, APIView):
+    change_families = ('organization', 'session', 'activity')
     permission_classes = [permissions.IsAuthenticated]
+
+    def get_validators(self, request):
+        # Which session is current depends on today's date too, so the
+        # response changes at midnight even when no data has
+        etag, last_modified = super().get_validators(request)
+        # The same date get() splits the sessions by
+        today = timezone.now().date()
+        midnight = int(datetime.datetime.combine(today, datetime.time(), tzinfo=datetime.timezone.utc).timestamp())
+        etag = '"{}-{}"'.format(etag.strip('"'), today.isoformat())
+        return etag, max(last_modified or 0, midnight)
+
     def get(self, request, pk):
         include_deleted = request.query_params.get('include_deleted') == '1'
         qs = Organization.objects.prefetch_related('contacts', 'sessions')
@@ -3,6 +3,7 @@ from rest_framework import permissions, serializers
 from rest_framework.generics import ListAPIView, RetrieveAPIView, UpdateAPIView, CreateAPIView, GenericAPIView
 from rest_framework import status
 from rest_framework.views import APIView
+from activity.conditional import ConditionalGetMixin
 # Create session
 class SessionCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -79,7 +80,8 @@ class SessionUpdateView(UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 from rest_framework.response import Response
 
-class SessionListView(ListAPIView):
+class SessionListView(ConditionalGetMixin, ListAPIView):
+    change_families = ('session',)
     queryset = Session.objects.select_related('organization').all()
     permission_classes = [permissions.IsAuthenticated]
 
@@ -104,7 +106,8 @@ class SessionListView(ListAPIView):
                 return obj.activities.count()
         return SessionSerializer
 
-class SessionDetailView(RetrieveAPIView):
+class SessionDetailView(ConditionalGetMixin, RetrieveAPIView):
+    change_families = ('session',)
     queryset = Session.objects.select_related('organization').all()
     permission_classes = [permissions.IsAuthenticated]
 
@@ -1,38 +1,234 @@
 """
-Views for generating sign-in sheets
+Views for generating and importing sign-in sheets
 """
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from datetime import datetime, timedelta
-from activity.models import Activity, Meeting, AttendanceRecord
-from activity.utils.google_sheets import create_signin_sheet
+from io import BytesIO
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from activity.models import DAY_NUMBERS, Activity, Meeting, AttendanceRecord, Session, SignInSheetFile, SignInSheetJob
+from activity.utils.google_resilience import GOOGLE_UNAVAILABLE_MESSAGE, GoogleUnavailable, get_metrics
+from activity.utils.google_sheets import SIGNIN_SHEET_BACKENDS, create_signin_sheet, get_worksheet_values
+from activity.utils.cancellations import get_class_dates_in_range
+from activity.utils.signin_data import align_start_date, build_signin_layout, build_signin_sheet_data, get_signin_sheet_title
+from activity.utils.signin_import import import_signin_values
+from activity.utils.signin_jobs import enqueue_signin_sheet_job, fail_stale_jobs
+from activity.utils.signin_pdf import stream_signin_pdf_zip
+from activity.utils.signin_xlsx import XLSX_CONTENT_TYPE
+
+
+def _parse_signin_sheet_request(data):
+    """
+    Validate activity_id, start_date and num_weeks from request data.
+
+    Returns:
+        (sheet_data, None) with the create_signin_sheet() keyword arguments, or
+        (None, Response) with the error response
+    """
+    activity_id = data.get('activity_id')
+    start_date_str = data.get('start_date')
+    num_weeks = data.get('num_weeks', 7)
+
+    # Validation
+    if not activity_id:
+        return None, Response(
+            {'error': 'activity_id is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if not start_date_str:
+        return None, Response(
+            {'error': 'start_date is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None, Response(
+            {'error': 'start_date must be in YYYY-MM-DD format'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Get activity to check day of week
+    try:
+        activity = Activity.objects.select_related('session').get(pk=activity_id)
+    except (Activity.DoesNotExist, ValueError):
+        return None, Response(
+            {'error': 'Activity not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    # Adjust start_date to match the activity's day of week
+    start_date = align_start_date(activity, start_date)
+
+    try:
+        num_weeks = int(num_weeks)
+        if num_weeks < 1 or num_weeks > 52:
+            raise ValueError()
+    except (ValueError, TypeError):
+        return None, Response(
+            {'error': 'num_weeks must be between 1 and 52'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Get enrolled, waitlist and drop-in students with their attendance
+    return build_signin_sheet_data([activity], start_date, num_weeks)[0], None
+
+
+def _google_unavailable_response(error):
+    """503 telling the user to try again later."""
+    response = Response(
+        {'error': GOOGLE_UNAVAILABLE_MESSAGE},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    if error.retry_after:
+        response['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def _xlsx_response(sheet_data):
+    """Stream a sign-in sheet as an .xlsx attachment."""
+    activity = sheet_data['activity']
+    content = create_signin_sheet(**sheet_data, backend='xlsx')
+    filename = (
+        f"{get_signin_sheet_title(activity)} {sheet_data['start_date'].isoformat()}.xlsx"
+    ).replace('/', '-')
+    return FileResponse(
+        BytesIO(content),
+        as_attachment=True,
+        filename=filename,
+        content_type=XLSX_CONTENT_TYPE,
+    )
 
 
 class GenerateSignInSheetView(APIView):
     """
-    Generate a Google Sheets sign-in sheet for an activity
+    Generate a sign-in sheet for an activity
 
     POST /api/signin-sheet/generate/
     Body:
     {
         "activity_id": 123,
         "start_date": "2025-01-10",
+        "num_weeks": 7,
+        "backend": "google"
+    }
+
+    backend is "google" (default) or "xlsx". Google sheets are generated in
+    the background: the response is 202 with a job_id to poll at
+    /api/signin-sheet/jobs/<job_id>/ for the sheet URL. "xlsx" returns the
+    workbook as a file download right away.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        backend = request.data.get('backend', 'google')
+        if backend not in SIGNIN_SHEET_BACKENDS:
+            return Response(
+                {'error': f"backend must be one of: {', '.join(SIGNIN_SHEET_BACKENDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        sheet_data, error_response = _parse_signin_sheet_request(request.data)
+        if error_response:
+            return error_response
+
+        if backend == 'xlsx':
+            return _xlsx_response(sheet_data)
+
+        # Queue the sheet; the Google calls happen outside this request
+        with transaction.atomic():
+            job = enqueue_signin_sheet_job(
+                sheet_data['activity'],
+                sheet_data['start_date'],
+                sheet_data['num_weeks'],
+                user=request.user,
+            )
+
+        return Response(_job_payload(job), status=status.HTTP_202_ACCEPTED)
+
+
+class SignInSheetJobView(APIView):
+    """
+    Status of a queued sign-in sheet
+
+    GET /api/signin-sheet/jobs/<job_id>/
+
+    status is queued, running, succeeded (with sheet_url) or failed (with error).
+    A job still running SIGNIN_SHEET_JOB_CLAIM_TIMEOUT_SECONDS after it started
+    is reported as failed.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        fail_stale_jobs(job_id)
+        job = get_object_or_404(SignInSheetJob, pk=job_id)
+        return Response(_job_payload(job))
+
+
+def _job_payload(job):
+    return {
+        'job_id': job.id,
+        'activity_id': job.activity_id,
+        'status': job.status,
+        'success': job.status == 'succeeded',
+        'sheet_url': job.sheet_url or None,
+        'error': job.error or None,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
+
+
+class DownloadSignInSheetView(APIView):
+    """
+    Download a sign-in sheet as an Excel file, without using Google
+
+    GET /api/signin-sheet/download/?activity_id=123&start_date=2025-01-10&num_weeks=7
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        sheet_data, error_response = _parse_signin_sheet_request(request.query_params)
+        if error_response:
+            return error_response
+        return _xlsx_response(sheet_data)
+
+
+class GenerateSessionSignInSheetsView(APIView):
+    """
+    Generate Google Sheets sign-in sheets for every open activity in a session
+
+    Queues one background job per activity, like GenerateSignInSheetView, and
+    responds 202 with the jobs to poll at /api/signin-sheet/jobs/<job_id>/.
+    The rosters of all activities are read in one batch and handed to the
+    jobs, which run in parallel on the job threads or run_signin_sheet_jobs
+    workers, sharing their Google clients and request rate limit.
+
+    POST /api/signin-sheet/generate-session/
+    Body:
+    {
+        "session_id": 12,
+        "start_date": "2025-01-10",
         "num_weeks": 7
     }
     """
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        activity_id = request.data.get('activity_id')
+        session_id = request.data.get('session_id')
         start_date_str = request.data.get('start_date')
         num_weeks = request.data.get('num_weeks', 7)
 
         # Validation
-        if not activity_id:
+        if not session_id:
             return Response(
-                {'error': 'activity_id is required'},
+                {'error': 'session_id is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
@@ -50,29 +246,108 @@ class GenerateSignInSheetView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get activity to check day of week
         try:
-            activity = Activity.objects.get(pk=activity_id)
-        except Activity.DoesNotExist:
+            num_weeks = int(num_weeks)
+            if num_weeks < 1 or num_weeks > 52:
+                raise ValueError()
+        except (ValueError, TypeError):
             return Response(
-                {'error': 'Activity not found'},
+                {'error': 'num_weeks must be between 1 and 52'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            session_id = int(session_id)
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'session_id must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            session = Session.objects.get(pk=session_id)
+        except Session.DoesNotExist:
+            return Response(
+                {'error': 'Session not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Adjust start_date to match the activity's day of week
-        day_map = {
-            'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3,
-            'Friday': 4, 'Saturday': 5, 'Sunday': 6
-        }
-        activity_day_num = day_map.get(activity.day_of_week)
-        if activity_day_num is not None:
-            start_day_num = start_date.weekday()
-            days_diff = (activity_day_num - start_day_num) % 7
-            if days_diff != 0:
-                start_date = start_date + timedelta(days=days_diff)
+        activities = sorted(
+            Activity.objects.filter(session=session, closed=False).select_related('session'),
+            key=lambda activity: (DAY_NUMBERS.get(activity.day_of_week, 7), activity.time),
+        )
+        sheet_data = build_signin_sheet_data(activities, start_date, num_weeks)
+
+        # Queue the sheets; the Google calls happen outside this request
+        with transaction.atomic():
+            jobs = [
+                enqueue_signin_sheet_job(
+                    data['activity'], data['start_date'], num_weeks, user=request.user, sheet_data=data,
+                )
+                for data in sheet_data
+            ]
+
+        return Response({
+            'session_id': session.id,
+            'session_name': session.name,
+            'jobs': [_job_payload(job) for job in jobs],
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class SignInSheetBundleView(APIView):
+    """
+    Download printable PDF sign-in sheets for many classes as one zip file
+
+    GET /api/signin-sheet/bundle/?week_start=2025-01-06
+        One week's sheet for every open class meeting that week, across all
+        organizations (add organization_id to limit it to one)
+    GET /api/signin-sheet/bundle/?session_id=12&start_date=2025-01-06&num_weeks=7
+    GET /api/signin-sheet/bundle/?organization_id=3&start_date=2025-01-06&num_weeks=7
+        Every open class in the session, or in the organization's open sessions
+
+    PDFs are rendered in parallel worker processes and the zip is streamed
+    as each one finishes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        week_start_str = params.get('week_start')
+        session_id = params.get('session_id')
+        organization_id = params.get('organization_id')
+
+        if not (week_start_str or session_id or organization_id):
+            return Response(
+                {'error': 'week_start, session_id or organization_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         try:
-            num_weeks = int(num_weeks)
+            session_id = int(session_id) if session_id else None
+            organization_id = int(organization_id) if organization_id else None
+        except ValueError:
+            return Response(
+                {'error': 'session_id and organization_id must be whole numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        start_date_str = week_start_str or params.get('start_date')
+        if not start_date_str:
+            return Response(
+                {'error': 'start_date is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            num_weeks = 1 if week_start_str else int(params.get('num_weeks', 7))
             if num_weeks < 1 or num_weeks > 52:
                 raise ValueError()
         except (ValueError, TypeError):
@@ -81,77 +356,117 @@ class GenerateSignInSheetView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get enrolled and waitlist students
-        enrolled_enrollments = activity.enrollments.filter(status='active').select_related('student').order_by('student__last_name', 'student__first_name')
-        waitlist_enrollments = activity.enrollments.filter(status='waiting').select_related('student').order_by('student__last_name', 'student__first_name')
-
-        enrolled_students = [e.student for e in enrolled_enrollments]
-        waitlist_students = [e.student for e in waitlist_enrollments]
+        activities = Activity.objects.filter(closed=False).select_related('session')
+        if session_id:
+            activities = activities.filter(session_id=session_id)
+        else:
+            activities = activities.filter(session__closed=False)
+        if organization_id:
+            activities = activities.filter(session__organization_id=organization_id)
+        activities = activities.order_by('session__name', 'day_of_week', 'time')
 
-        # Build attendance data for each date
-        # Create a dict: {student_id: {date_str: status}}
-        attendance_data = {}
+        if week_start_str:
+            # Only classes that actually meet during the week
+            week_end = start_date + timedelta(days=6)
+            activities = [a for a in activities if get_class_dates_in_range(a, start_date, week_end)]
 
-        # Generate list of dates
-        dates = []
-        current_date = start_date
-        for _ in range(num_weeks):
-            dates.append(current_date)
-            current_date += timedelta(days=7)
+        sheets = []
+        filenames = set()
+        for sheet_data in build_signin_sheet_data(activities, start_date, num_weeks):
+            layout = build_signin_layout(**sheet_data)
+            filename = f"{layout.title} {sheet_data['start_date'].isoformat()}".replace('/', '-')
+            if filename in filenames:
+                filename = f"{filename} ({sheet_data['activity'].id})"
+            filenames.add(filename)
+            sheets.append((f'{filename}.pdf', layout))
 
-        # Query all attendance records for this activity and date range
-        all_students = enrolled_students + waitlist_students
-        student_ids = [s.id for s in all_students]
+        if not sheets:
+            return Response(
+                {'error': 'No open classes match the selection'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-        # Get all meetings for these dates
-        meetings = Meeting.objects.filter(
-            activity=activity,
-            date__in=dates
-        ).prefetch_related('attendance_records__student')
+        response = StreamingHttpResponse(
+            stream_signin_pdf_zip(sheets, max_workers=settings.SIGNIN_PDF_MAX_WORKERS),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="signin-sheets-{start_date.isoformat()}.zip"'
+        return response
 
-        # Build attendance lookup and track drop-ins
-        for student in all_students:
-            attendance_data[student.id] = {}
 
-        # Collect all drop-in students (students with attendance but not enrolled/waitlisted)
-        dropin_student_ids = set()
+class ImportSignInSheetView(APIView):
+    """
+    Import the attendance marks from a filled-in Google sign-in sheet
 
-        for meeting in meetings:
-            date_str = meeting.date.strftime('%Y-%m-%d')
-            for record in meeting.attendance_records.all():
-                # Initialize attendance_data for this student if not already present
-                if record.student_id not in attendance_data:
-                    attendance_data[record.student_id] = {}
+    POST /api/signin-sheet/import/
+    Body:
+    {
+        "activity_id": 123,
+        "spreadsheet_id": "1AbC...",   (optional, defaults to the activity's spreadsheet)
+        "worksheet_title": "Jan 10, 2025 4:25pm",   (optional, defaults to the newest worksheet)
+        "apply": false
+    }
 
-                attendance_data[record.student_id][date_str] = record.status
+    Without "apply": true this only previews the changes. Check marks become
+    present and X marks expected absence; blank cells are left alone.
+    """
+    permission_classes = [IsAuthenticated]
 
-                # Track drop-ins: students with attendance but not in enrolled or waitlist
-                if record.student_id not in student_ids:
-                    dropin_student_ids.add(record.student_id)
+    def post(self, request):
+        activity_id = request.data.get('activity_id')
+        spreadsheet_id = request.data.get('spreadsheet_id')
+        worksheet_title = request.data.get('worksheet_title') or None
+        apply = request.data.get('apply', False) is True
 
-        # Get drop-in student objects and sort by last name, first name
-        from activity.models import Student
-        dropin_students = list(Student.objects.filter(id__in=dropin_student_ids).order_by('last_name', 'first_name'))
+        if not activity_id:
+            return Response(
+                {'error': 'activity_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Generate the sheet
         try:
-            sheet_url = create_signin_sheet(
-                activity=activity,
-                start_date=start_date,
-                num_weeks=num_weeks,
-                enrolled_students=enrolled_students,
-                waitlist_students=waitlist_students,
-                dropin_students=dropin_students,
-                attendance_data=attendance_data
+            activity = Activity.objects.select_related('session').get(pk=activity_id)
+        except (Activity.DoesNotExist, ValueError):
+            return Response(
+                {'error': 'Activity not found'},
+                status=status.HTTP_404_NOT_FOUND
             )
 
-            return Response({
-                'success': True,
-                'sheet_url': sheet_url
-            })
+        if not spreadsheet_id:
+            try:
+                spreadsheet_id = activity.signin_sheet_file.spreadsheet_id
+            except SignInSheetFile.DoesNotExist:
+                return Response(
+                    {'error': 'No sign-in spreadsheet is known for this activity, spreadsheet_id is required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
+        try:
+            worksheet_title, values = get_worksheet_values(spreadsheet_id, worksheet_title)
+        except GoogleUnavailable as e:
+            return _google_unavailable_response(e)
         except Exception as e:
             return Response(
-                {'error': f'Failed to create sheet: {str(e)}'},
+                {'error': f'Failed to read sheet: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+        result = import_signin_values(activity, values, apply=apply)
+        result['worksheet_title'] = worksheet_title
+        return Response(result)
+
+
+class GoogleApiMetricsView(APIView):
+    """
+    Google API call metrics for this server process
+
+    GET /api/signin-sheet/google-metrics/
+
+    Returns the circuit breaker state and, per operation, the number of
+    calls, retries, errors and calls rejected by the open circuit, with
+    average and maximum latency in seconds.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_metrics())
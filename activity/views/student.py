@@ -1,32 +1,110 @@
+from django.db.models import Prefetch, Q
+from django.db.models.functions import Lower
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView, RetrieveUpdateAPIView, CreateAPIView
-from rest_framework import permissions, serializers
-from activity.models import Student
-from activity.serializers import StudentDetailSerializer
+from rest_framework import permissions
+from activity.models import Enrollment, Student
+from activity.conditional import ConditionalGetMixin
+from activity.pagination import KeysetPagination
+from activity.serializers import StudentDetailSerializer, StudentListSerializer
 
-class StudentListView(ListAPIView):
+class StudentListView(ConditionalGetMixin, ListAPIView):
+    """
+    GET /api/students/
+
+    Query parameters (all optional):
+        status: active (default), inactive or all
+        rochester: true or false
+        organization_id, session_id: students enrolled or waitlisted in a class of it
+        search: words that each appear in the first name, last name or email
+            (e.g. "jane doe")
+        ordering: last_name (default), -last_name, first_name or -first_name
+        page_size, cursor: page through the list (see KeysetPagination);
+            without them every matching student is returned
+    """
     permission_classes = [permissions.IsAuthenticated]
+    serializer_class = StudentListSerializer
+    pagination_class = KeysetPagination
+    change_families = ('student',)
+
+    # Case-insensitive, with id last so the order is unique for keyset pagination
+    ORDERINGS = {
+        'last_name': ['last_name_lower', 'first_name_lower', 'id'],
+        'first_name': ['first_name_lower', 'last_name_lower', 'id'],
+    }
+
     def get_queryset(self):
-        status = self.request.query_params.get('status', 'active')
+        params = self.request.query_params
+
+        status = params.get('status', 'active')
         if status == 'all':
-            return Student.objects.all()
+            queryset = Student.objects.all()
         elif status == 'inactive':
-            return Student.objects.filter(active=False)
+            queryset = Student.objects.filter(active=False)
         else:
-            return Student.objects.filter(active=True)
-    def get_serializer_class(self):
-        class StudentSerializer(serializers.ModelSerializer):
-            full_name = serializers.CharField(read_only=True)
-            display_name = serializers.CharField(read_only=True)
-            class Meta:
-                model = Student
-                exclude = ['notes']
-        return StudentSerializer
-
-
-class StudentDetailView(RetrieveUpdateAPIView):
-    queryset = Student.objects.all()
+            queryset = Student.objects.filter(active=True)
+
+        rochester = params.get('rochester')
+        if rochester in ('true', 'false'):
+            queryset = queryset.filter(rochester=rochester == 'true')
+
+        enrollments = Enrollment.objects.filter(status__in=['active', 'waiting'])
+        if params.get('organization_id'):
+            enrollments = enrollments.filter(activity__session__organization_id=self._int_param('organization_id'))
+        if params.get('session_id'):
+            enrollments = enrollments.filter(activity__session_id=self._int_param('session_id'))
+        if params.get('organization_id') or params.get('session_id'):
+            queryset = queryset.filter(id__in=enrollments.values('student_id'))
+
+        # Every word has to match, so a full name finds the student
+        for word in params.get('search', '').split():
+            queryset = queryset.filter(
+                Q(first_name__icontains=word) |
+                Q(last_name__icontains=word) |
+                Q(email__icontains=word)
+            )
+
+        return queryset.annotate(
+            last_name_lower=Lower('last_name'),
+            first_name_lower=Lower('first_name'),
+        ).order_by(*self._ordering())
+
+    def _ordering(self):
+        ordering = self.request.query_params.get('ordering', 'last_name')
+        descending = ordering.startswith('-')
+        fields = self.ORDERINGS.get(ordering.lstrip('-'))
+        if fields is None:
+            choices = ', '.join(f'{name}, -{name}' for name in self.ORDERINGS)
+            raise ValidationError({'ordering': f'Must be one of: {choices}'})
+        return [f'-{field}' for field in fields] if descending else fields
+
+    def _int_param(self, name):
+        try:
+            return int(self.request.query_params[name])
+        except ValueError:
+            raise ValidationError({name: 'Must be a whole number'})
+
+
+class StudentDetailView(ConditionalGetMixin, RetrieveUpdateAPIView):
+    """
+    GET /api/students/<id>/?include_closed=true&fields=...&omit=...
+
+    fields/omit pick the fields returned (see SparseFieldsetMixin); the
+    classes are only loaded when current_classes or waitlist_classes is.
+    """
     serializer_class = StudentDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    change_families = ('student',)
+
+    def get_queryset(self):
+        queryset = Student.objects.all()
+        fields = self.get_serializer().fields
+        if 'current_classes' in fields or 'waitlist_classes' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'enrollments',
+                queryset=Enrollment.objects.select_related('activity__session', 'activity__location'),
+            ))
+        return queryset
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
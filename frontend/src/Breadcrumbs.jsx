@@ -64,7 +64,7 @@ function Breadcrumbs() {
     if (pathnames[0] === 'students' && pathnames[1] && !isNaN(Number(pathnames[1]))) {
       (async () => {
         try {
-          const resp = await authFetch(`/api/students/${pathnames[1]}/details/`);
+          const resp = await authFetch(`/api/students/${pathnames[1]}/details/?fields=id,first_name,last_name,display_name`);
           if (resp.ok) {
             const data = await resp.json();
             setStudentName(data.display_name || (data.first_name && data.last_name ? `${data.last_name}, ${data.first_name}` : null));
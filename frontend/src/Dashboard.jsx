@@ -17,7 +17,7 @@ function Dashboard() {
   useEffect(() => {
     Promise.all([
       authFetch('/api/students/').then(r => r.json()),
-      authFetch('/api/classes/').then(r => r.json())
+      authFetch('/api/classes/?view=summary').then(r => r.json())
     ])
       .then(([students, classes]) => {
         // Calculate stats
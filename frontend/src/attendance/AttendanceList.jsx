@@ -66,7 +66,7 @@ export default function AttendanceList() {
     setError("");
 
     Promise.all([
-      authFetch("/api/organizations/").then(res => res.json()),
+      authFetch("/api/organizations/?fields=id,name").then(res => res.json()),
       authFetch("/api/sessions/").then(res => res.json())
     ])
       .then(([orgsData, sessionsData]) => {
@@ -5,6 +5,31 @@ import { formatTime } from '../utils/formatTime';
 import { compareDayTime } from '../utils/DayOfWeek';
 import './GenerateSignInSheet.css';
 
+const JOB_POLL_INTERVAL_MS = 2000;
+// Stop waiting if no worker picks the job up or it never finishes
+const JOB_TIMEOUT_MS = 5 * 60 * 1000;
+
+// Google sheets are generated in the background; poll until the job finishes
+async function waitForSheetJob(jobId) {
+  const deadline = Date.now() + JOB_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    const response = await authFetch(`/api/signin-sheet/jobs/${jobId}/`);
+    const job = await response.json();
+
+    if (!response.ok) {
+      throw new Error(job.error || job.detail || 'Failed to check sign-in sheet status');
+    }
+    if (job.status === 'succeeded') {
+      return job.sheet_url;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Failed to generate sign-in sheet');
+    }
+  }
+  throw new Error('The sign-in sheet is taking too long to generate. Please try again later, or download it as an Excel file instead.');
+}
+
 export default function GenerateSignInSheet() {
   const navigate = useNavigate();
   const [sessions, setSessions] = useState([]);
@@ -23,7 +48,7 @@ export default function GenerateSignInSheet() {
     setLoading(true);
     Promise.all([
       authFetch('/api/sessions/').then(res => res.json()),
-      authFetch('/api/classes/').then(res => res.json())
+      authFetch('/api/classes/?view=summary').then(res => res.json())
     ])
       .then(([sessionsData, activitiesData]) => {
         setSessions(Array.isArray(sessionsData) ? sessionsData : []);
@@ -108,7 +133,7 @@ export default function GenerateSignInSheet() {
         throw new Error(data.error || 'Failed to generate sign-in sheet');
       }
 
-      setGeneratedSheetUrl(data.sheet_url);
+      setGeneratedSheetUrl(await waitForSheetJob(data.job_id));
     } catch (err) {
       setError(err.message);
     } finally {
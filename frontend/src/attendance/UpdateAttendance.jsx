@@ -72,9 +72,9 @@ export default function UpdateAttendance() {
     setError("");
 
     Promise.all([
-      authFetch("/api/organizations/").then(res => res.json()),
+      authFetch("/api/organizations/?fields=id,name").then(res => res.json()),
       authFetch("/api/sessions/").then(res => res.json()),
-      authFetch("/api/classes/").then(res => res.json())
+      authFetch("/api/classes/?view=summary").then(res => res.json())
     ])
       .then(([orgsData, sessionsData, classesData]) => {
         setOrganizations(Array.isArray(orgsData) ? orgsData : orgsData.organizations || []);
@@ -50,9 +50,9 @@ export default function CancellationList() {
     setError("");
 
     Promise.all([
-      authFetch("/api/organizations/").then(res => res.json()),
+      authFetch("/api/organizations/?fields=id,name").then(res => res.json()),
       authFetch("/api/sessions/").then(res => res.json()),
-      authFetch("/api/classes/").then(res => res.json())
+      authFetch("/api/classes/?view=summary").then(res => res.json())
     ])
       .then(([orgsData, sessionsData, activitiesData]) => {
         setOrganizations(Array.isArray(orgsData) ? orgsData : orgsData.organizations || []);
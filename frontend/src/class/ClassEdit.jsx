@@ -114,7 +114,7 @@ function ClassEdit() {
       setOrgError(null);
       setSessionError(null);
       Promise.all([
-        authFetch('/api/organizations/'),
+        authFetch('/api/organizations/?fields=id,name'),
         authFetch('/api/sessions/')
       ]).then(async ([orgResp, sessResp]) => {
         let orgs = [];
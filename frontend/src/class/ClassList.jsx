@@ -17,7 +17,7 @@ const ClassList = () => {
 
   useEffect(() => {
     setLoading(true);
-    const url = showInactive ? '/api/classes/?include_inactive=true' : '/api/classes/';
+    const url = showInactive ? '/api/classes/?view=summary&include_inactive=true' : '/api/classes/?view=summary';
     authFetch(url)
       .then(resp => resp.json())
       .then(data => {
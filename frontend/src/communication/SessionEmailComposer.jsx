@@ -7,11 +7,14 @@ function SessionEmailComposer() {
   const navigate = useNavigate();
   const [searchParams] = useSearchParams();
   const sessionId = searchParams.get('session_id');
+  const mode = searchParams.get('mode') === 'changes' ? 'changes' : 'all';
 
   const [emailData, setEmailData] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [copiedField, setCopiedField] = useState(null);
+  const [sending, setSending] = useState(false);
+  const [sendResult, setSendResult] = useState(null);
 
   useEffect(() => {
     if (!combinationId || !sessionId) {
@@ -24,8 +27,9 @@ function SessionEmailComposer() {
       setError(null);
 
       try {
+        const modeParam = mode === 'changes' ? '&mode=changes' : '';
         const response = await authFetch(
-          `/api/communication/email-details/${combinationId}/?session_id=${sessionId}`
+          `/api/communication/email-details/${combinationId}/?session_id=${sessionId}${modeParam}`
         );
 
         if (!response.ok) {
@@ -43,7 +47,7 @@ function SessionEmailComposer() {
     }
 
     loadEmailDetails();
-  }, [combinationId, sessionId]);
+  }, [combinationId, sessionId, mode]);
 
   const copyToClipboard = async (text, fieldName) => {
     try {
@@ -55,6 +59,32 @@ function SessionEmailComposer() {
     }
   };
 
+  const sendEmail = async () => {
+    setSending(true);
+    setError(null);
+
+    try {
+      const response = await authFetch(`/api/communication/email-send/${combinationId}/`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          session_id: parseInt(sessionId),
+          mode: mode,
+        }),
+      });
+
+      const data = await response.json().catch(() => ({}));
+      if (!response.ok) {
+        throw new Error(data.error || 'Failed to send email');
+      }
+      setSendResult(data);
+    } catch (err) {
+      setError(err.message || 'Failed to send email');
+    } finally {
+      setSending(false);
+    }
+  };
+
   const getMailtoLink = () => {
     if (!emailData) return '#';
     return `mailto:${encodeURIComponent(emailData.to_email)}?subject=${encodeURIComponent(emailData.subject)}`;
@@ -123,6 +153,45 @@ function SessionEmailComposer() {
             </div>
           </div>
 
+          {/* Send Email Card */}
+          <div className="card shadow-sm border-primary mb-4">
+            <div className="card-header bg-dark text-white">
+              <h5 className="mb-0">Send Email</h5>
+            </div>
+            <div className="card-body text-center">
+              {sendResult ? (
+                <div className="alert alert-success mb-0" role="alert">
+                  <i className="bi bi-check-circle me-2"></i>
+                  Email queued for {sendResult.recipient_count} {sendResult.recipient_count === 1 ? 'student' : 'students'}
+                </div>
+              ) : (
+                <>
+                  <button
+                    className="btn btn-success btn-lg"
+                    onClick={sendEmail}
+                    disabled={sending}
+                  >
+                    {sending ? (
+                      <>
+                        <span className="spinner-border spinner-border-sm me-2" role="status" aria-hidden="true"></span>
+                        Sending...
+                      </>
+                    ) : (
+                      <>
+                        <i className="bi bi-send me-2"></i>
+                        Send Email
+                      </>
+                    )}
+                  </button>
+                  <div className="text-muted small mt-2">
+                    Sends this email to the BCC list and remembers what each student was told,
+                    so "only changed" lists can leave them out until their classes change
+                  </div>
+                </>
+              )}
+            </div>
+          </div>
+
           {/* Compose Email Button Card */}
           <div className="card shadow-sm border-primary mb-4">
             <div className="card-header bg-dark text-white">
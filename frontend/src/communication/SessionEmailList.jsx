@@ -9,6 +9,7 @@ function SessionEmailList() {
   const [selectedOrgId, setSelectedOrgId] = useState('');
   const [selectedSessionId, setSelectedSessionId] = useState('');
   const [showClosed, setShowClosed] = useState(false);
+  const [changesOnly, setChangesOnly] = useState(false);
   const [combinations, setCombinations] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
@@ -17,7 +18,7 @@ function SessionEmailList() {
   useEffect(() => {
     async function fetchOrganizations() {
       try {
-        const response = await authFetch('/api/organizations/');
+        const response = await authFetch('/api/organizations/?fields=id,name');
         if (!response.ok) throw new Error('Failed to fetch organizations');
         const data = await response.json();
         setOrganizations(data);
@@ -79,8 +80,9 @@ function SessionEmailList() {
       setError(null);
 
       try {
+        const modeParam = changesOnly ? '&mode=changes' : '';
         const response = await authFetch(
-          `/api/communication/session-enrollments/?session_id=${selectedSessionId}`
+          `/api/communication/session-enrollments/?session_id=${selectedSessionId}${modeParam}`
         );
 
         if (isCancelled) return;
@@ -109,7 +111,7 @@ function SessionEmailList() {
     return () => {
       isCancelled = true;
     };
-  }, [selectedOrgId, selectedSessionId]);
+  }, [selectedOrgId, selectedSessionId, changesOnly]);
 
   // Filter sessions based on showClosed checkbox
   const filteredSessions = sessions.filter(session =>
@@ -122,7 +124,8 @@ function SessionEmailList() {
   };
 
   const handleCombinationClick = (combinationId) => {
-    navigate(`/communication/session-email-composer/${combinationId}?session_id=${selectedSessionId}`);
+    const modeParam = changesOnly ? '&mode=changes' : '';
+    navigate(`/communication/session-email-composer/${combinationId}?session_id=${selectedSessionId}${modeParam}`);
   };
 
   return (
@@ -195,6 +198,19 @@ function SessionEmailList() {
                   Show closed sessions
                 </label>
               </div>
+              <div className="form-check">
+                <input
+                  className="form-check-input"
+                  type="checkbox"
+                  id="changesOnly"
+                  checked={changesOnly}
+                  onChange={(e) => setChangesOnly(e.target.checked)}
+                  disabled={!selectedSessionId}
+                />
+                <label className="form-check-label" htmlFor="changesOnly">
+                  Only students whose classes changed since they were last emailed
+                </label>
+              </div>
             </div>
           </div>
 
@@ -227,9 +243,17 @@ function SessionEmailList() {
             </h5>
           </div>
           <div className="card-body">
+            {combinations.mode === 'changes' && combinations.unchanged_student_count > 0 && (
+              <div className="text-muted small mb-3">
+                {combinations.unchanged_student_count} {combinations.unchanged_student_count === 1 ? 'student is' : 'students are'} left
+                out because their classes have not changed since their last email.
+              </div>
+            )}
             {combinations.combinations.length === 0 ? (
               <div className="alert alert-info mb-0">
-                No students are enrolled or waitlisted in this session.
+                {combinations.mode === 'changes'
+                  ? 'No student\'s classes have changed since their last email.'
+                  : 'No students are enrolled or waitlisted in this session.'}
               </div>
             ) : (
               <div className="list-group">
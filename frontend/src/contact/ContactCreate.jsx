@@ -17,7 +17,7 @@ function ContactCreate() {
       const orgParam = params.get("organization");
       let orgs = [];
       try {
-        const resp = await authFetch("/api/organizations/");
+        const resp = await authFetch("/api/organizations/?fields=id,name");
         if (resp.ok) {
           orgs = await resp.json();
           setOrganizations(orgs);
@@ -19,7 +19,7 @@ function ContactEdit() {
     async function fetchContactAndOrgs() {
       try {
         // Fetch organizations
-        const orgResp = await authFetch('/api/organizations/');
+        const orgResp = await authFetch('/api/organizations/?fields=id,name');
         let orgs = [];
         if (orgResp.ok) {
           orgs = await orgResp.json();
@@ -30,7 +30,7 @@ function ContactsList() {
 
         const [contactsRes, orgsRes] = await Promise.all([
           authFetch(contactsUrl),
-          authFetch('/api/organizations/')
+          authFetch('/api/organizations/?fields=id,name')
         ]);
 
         if (!contactsRes.ok) throw new Error('Failed to fetch contacts');
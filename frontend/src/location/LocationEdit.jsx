@@ -53,7 +53,7 @@ function LocationEdit() {
       // Create mode: fetch organizations
       setOrgLoading(true);
       setOrgError(null);
-      authFetch('/api/organizations/')
+      authFetch('/api/organizations/?fields=id,name')
         .then(resp => resp.json())
         .then(data => {
           setOrganizations(data.filter(o => !o.is_deleted)); // Only active organizations
@@ -32,7 +32,7 @@ function LocationList() {
 
         const [locationsRes, orgsRes] = await Promise.all([
           authFetch(locationsUrl),
-          authFetch('/api/organizations/')
+          authFetch('/api/organizations/?fields=id,name')
         ]);
         if (!locationsRes.ok) throw new Error('Failed to fetch locations');
         if (!orgsRes.ok) throw new Error('Failed to fetch organizations');
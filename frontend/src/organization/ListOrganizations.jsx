@@ -13,7 +13,7 @@ function ListOrganizations() {
       setLoading(true);
       setError(null);
       try {
-        const response = await authFetch('/api/organizations/');
+        const response = await authFetch('/api/organizations/?omit=contacts');
         if (!response.ok) throw new Error('Failed to fetch organizations');
         const data = await response.json();
         setOrganizations(data);
@@ -15,7 +15,7 @@ function WeeklyReport() {
   useEffect(() => {
     async function fetchOrganizations() {
       try {
-        const response = await authFetch('/api/organizations/');
+        const response = await authFetch('/api/organizations/?fields=id,name');
         if (!response.ok) throw new Error('Failed to fetch organizations');
         const data = await response.json();
         setOrganizations(data);
@@ -33,7 +33,7 @@ function SessionCreate() {
     // Fetch organizations for dropdown
     (async () => {
       try {
-        const resp = await authFetch("/api/organizations/");
+        const resp = await authFetch("/api/organizations/?fields=id,name");
         if (resp.ok) {
           const data = await resp.json();
           setOrganizations(Array.isArray(data) ? data : data.organizations || []);
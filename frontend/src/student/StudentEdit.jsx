@@ -14,7 +14,7 @@ function StudentEdit() {
   useEffect(() => {
     async function fetchStudent() {
       try {
-        const url = `/api/students/${id}/details/`;
+        const url = `/api/students/${id}/details/?omit=current_classes,waitlist_classes`;
         const resp = await authFetch(url);
         if (!resp.ok) throw new Error("Failed to fetch student");
         const data = await resp.json();
@@ -5,50 +5,72 @@ import { authFetch } from "../utils/authFetch";
 import "./StudentsList.css";
 import Tooltip from "../utils/Tooltip";
 
+const PAGE_SIZE = 100;
+const SEARCH_DELAY_MS = 300;
+
 function StudentsList() {
   const [students, setStudents] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [showInactive, setShowInactive] = useState(false);
   const [searchQuery, setSearchQuery] = useState("");
+  const [search, setSearch] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
 
+  // Wait for a pause in typing before searching on the server
   useEffect(() => {
-    async function fetchStudents() {
-      try {
-        let resp;
-        if (showInactive) {
-          // Get both active and inactive students
-          resp = await authFetch("/api/students/?status=all");
-        } else {
-          resp = await authFetch("/api/students/?status=active");
-        }
-        if (!resp.ok) throw new Error("Failed to fetch students");
-        const data = await resp.json();
-        setStudents(Array.isArray(data) ? data : data.students || []);
-      } catch (err) {
-        setError("Unable to connect to backend server. Please check that the backend is running.");
-      } finally {
-        setLoading(false);
-      }
-    }
-    fetchStudents();
-  }, [showInactive]);
+    const timer = setTimeout(() => setSearch(searchQuery.trim()), SEARCH_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
 
-  // Filter students based on search query
-  const filteredStudents = students.filter(student => {
-    if (!searchQuery.trim()) return true;
+  // Students come sorted by last name, then first name, one page at a time
+  async function fetchPage(cursor) {
+    const params = new URLSearchParams({
+      status: showInactive ? "all" : "active",
+      page_size: PAGE_SIZE,
+    });
+    if (search) params.set("search", search);
+    if (cursor) params.set("cursor", cursor);
 
-    const query = searchQuery.toLowerCase();
-    const firstName = (student.first_name || '').toLowerCase();
-    const lastName = (student.last_name || '').toLowerCase();
-    const fullName = `${firstName} ${lastName}`;
-    const email = (student.email || '').toLowerCase();
+    const resp = await authFetch(`/api/students/?${params}`);
+    if (!resp.ok) throw new Error("Failed to fetch students");
+    const data = await resp.json();
+    const next = data.next ? new URL(data.next, window.location.origin).searchParams.get("cursor") : null;
+    return { results: data.results || [], next };
+  }
 
-    return firstName.includes(query) ||
-           lastName.includes(query) ||
-           fullName.includes(query) ||
-           email.includes(query);
-  });
+  useEffect(() => {
+    let cancelled = false;
+    setLoading(true);
+    fetchPage(null)
+      .then(({ results, next }) => {
+        if (cancelled) return;
+        setStudents(results);
+        setNextCursor(next);
+        setError(null);
+      })
+      .catch(() => {
+        if (!cancelled) setError("Unable to connect to backend server. Please check that the backend is running.");
+      })
+      .finally(() => {
+        if (!cancelled) setLoading(false);
+      });
+    return () => { cancelled = true; };
+  }, [showInactive, search]);
+
+  async function loadMore() {
+    setLoadingMore(true);
+    try {
+      const { results, next } = await fetchPage(nextCursor);
+      setStudents(prev => [...prev, ...results]);
+      setNextCursor(next);
+    } catch (err) {
+      setError("Unable to connect to backend server. Please check that the backend is running.");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
 
   return (
     <div className="container mt-4">
@@ -128,19 +150,7 @@ function StudentsList() {
                     <col className="phone-col" />
                   </colgroup>
                   <tbody>
-                    {filteredStudents
-                      .slice()
-                      .sort((a, b) => {
-                        const lastA = (a.last_name || '').toLowerCase();
-                        const lastB = (b.last_name || '').toLowerCase();
-                        if (lastA < lastB) return -1;
-                        if (lastA > lastB) return 1;
-                        const firstA = (a.first_name || '').toLowerCase();
-                        const firstB = (b.first_name || '').toLowerCase();
-                        if (firstA < firstB) return -1;
-                        if (firstA > firstB) return 1;
-                        return 0;
-                      })
+                    {students
                       .map(student => (
                         <tr key={student.id} className="reactive-student-row">
                           <td style={{ textAlign: 'center' }}>
@@ -224,6 +234,20 @@ function StudentsList() {
                       ))}
                   </tbody>
                 </table>
+                {!loading && students.length === 0 && (
+                  <div className="p-3 text-muted">No students found.</div>
+                )}
+                {nextCursor && (
+                  <div className="text-center my-2">
+                    <button
+                      className="btn btn-sm btn-outline-primary"
+                      onClick={loadMore}
+                      disabled={loadingMore}
+                    >
+                      {loadingMore ? "Loading..." : "Load More Students"}
+                    </button>
+                  </div>
+                )}
               </div>
             </div>
           )}
@@ -55,6 +55,10 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'activity.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 MIDDLEWARE = [
@@ -161,6 +165,26 @@ GOOGLE_SHEETS_OWNER_EMAIL=env('GOOGLE_SHEETS_OWNER_EMAIL', default=None)
 
 # Path to OAuth token file (stored in same directory as service account file)
 TOKEN_FILE_PATH = os.path.join(os.path.dirname(GOOGLE_SERVICE_ACCOUNT_FILE), 'token.json')
+# How often each process checks whether another process has refreshed token.json
+GOOGLE_TOKEN_CACHE_SECONDS = env.int('GOOGLE_TOKEN_CACHE_SECONDS', default=30)
+
+# Google API requests allowed per minute across all sheet generation threads in a process
+GOOGLE_API_REQUESTS_PER_MINUTE = env.int('GOOGLE_API_REQUESTS_PER_MINUTE', default=60)
+# Retries for Google API quota (429) and server (5xx) errors, with exponential backoff and full jitter
+GOOGLE_API_MAX_RETRIES = env.int('GOOGLE_API_MAX_RETRIES', default=5)
+GOOGLE_API_BACKOFF_SECONDS = env.float('GOOGLE_API_BACKOFF_SECONDS', default=1.0)
+GOOGLE_API_MAX_BACKOFF_SECONDS = env.float('GOOGLE_API_MAX_BACKOFF_SECONDS', default=32.0)
+# Consecutive Google calls failing after all their retries before calls fail fast, and how long before trying again
+GOOGLE_CIRCUIT_FAILURE_THRESHOLD = env.int('GOOGLE_CIRCUIT_FAILURE_THRESHOLD', default=5)
+GOOGLE_CIRCUIT_RESET_SECONDS = env.int('GOOGLE_CIRCUIT_RESET_SECONDS', default=60)
+# How long a cached sign-in spreadsheet ID is trusted before checking it still exists in Drive
+SIGNIN_SHEET_FILE_VALIDATE_SECONDS = env.int('SIGNIN_SHEET_FILE_VALIDATE_SECONDS', default=86400)
+# Background threads per process generating queued sign-in sheets (0 leaves jobs to the run_signin_sheet_jobs worker)
+SIGNIN_SHEET_JOB_THREADS = env.int('SIGNIN_SHEET_JOB_THREADS', default=2)
+# A running job not finished within this many seconds is assumed abandoned and marked failed
+SIGNIN_SHEET_JOB_CLAIM_TIMEOUT_SECONDS = env.int('SIGNIN_SHEET_JOB_CLAIM_TIMEOUT_SECONDS', default=600)
+# Worker processes rendering PDFs for a printable roster bundle
+SIGNIN_PDF_MAX_WORKERS = env.int('SIGNIN_PDF_MAX_WORKERS', default=2)
 
 # settings.py
 
@@ -189,3 +213,15 @@ DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL')
 # --- COMMUNICATION SETTINGS ---
 # Default "To" email address for session enrollment emails
 DEFAULT_EMAIL_TO_ADDRESS = env('DEFAULT_EMAIL_TO_ADDRESS', default='noreply@example.com')
+
+# --- OUTBOX SETTINGS ---
+# Delivery attempts before a queued message is moved aside as dead
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=6)
+# First retry delay in seconds; doubles with each failed attempt
+OUTBOX_BACKOFF_SECONDS = env.int('OUTBOX_BACKOFF_SECONDS', default=30)
+# Upper bound on the retry delay
+OUTBOX_MAX_BACKOFF_SECONDS = env.int('OUTBOX_MAX_BACKOFF_SECONDS', default=3600)
+# A claimed message not finished within this many seconds is assumed abandoned and reclaimed
+OUTBOX_CLAIM_TIMEOUT_SECONDS = env.int('OUTBOX_CLAIM_TIMEOUT_SECONDS', default=600)
+# Maximum BCC recipients per queued notification message
+NOTIFICATION_BCC_BATCH_SIZE = env.int('NOTIFICATION_BCC_BATCH_SIZE', default=50)